@@ -0,0 +1,263 @@
+"""
+Benchmarks for the pipeline's vectorised paths on synthetic populations.
+
+Runs offline against synthetic_frs at increasing population sizes:
+
+    python benchmark.py --sizes 10000 100000 1000000 10000000 --seed 0
+
+or times one year of the whole CSV pipeline on a stratified subsample of a
+dataset, the same workload as `generate_all_csvs.py --sample`:
+
+    python benchmark.py --pipeline synthetic:1000000:0 --sample 0.05
+
+or times the start-up of the commands that should never load the tax-benefit
+model, each in a fresh interpreter:
+
+    python benchmark.py --startup
+
+or times building a baseline and a reform for one year in a fresh interpreter,
+from the dataset reference (load and uprate) and from its snapshot:
+
+    python benchmark.py --snapshot synthetic:1000000:0
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from checkpoints import dataset_name
+from generate_all_csvs import generate_distributional_analysis, generate_year_csvs
+from sampling import sample_datasets, sample_label
+from synthetic_frs import (
+    CTC_CHILD_LIMIT_PARAMETER,
+    UC_CHILD_LIMIT_PARAMETER,
+    Scenario,
+    SyntheticMicrosimulation,
+    generate_synthetic_frs,
+)
+
+year = 2026
+
+
+def timed(timings, name, function, *args, **kwargs):
+    """Run a function and record its wall time under `name`"""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    timings[name] = time.perf_counter() - start
+    return result
+
+
+def headline_metrics(baseline, reformed):
+    """The cost and child poverty figures generate_all_csvs.py publishes"""
+    baseline_income = baseline.calculate("household_net_income", year)
+    reformed_income = reformed.calculate("household_net_income", year)
+    cost = (reformed_income - baseline_income).sum()
+
+    baseline_in_poverty = baseline.calculate("in_poverty", year, map_to="person").values
+    reformed_in_poverty = reformed.calculate("in_poverty", year, map_to="person").values
+    person_weights = baseline.calculate("person_weight", year, map_to="person").values
+    is_child = baseline.calculate("is_child", year, map_to="person").values
+
+    child_weights = person_weights * is_child
+    children_out_of_poverty = (baseline_in_poverty * child_weights).sum() - (reformed_in_poverty * child_weights).sum()
+    return cost, children_out_of_poverty
+
+
+def run_benchmark(persons, seed):
+    """Time each stage for one population size"""
+    timings = {}
+    data = timed(timings, 'generate', generate_synthetic_frs, persons, seed)
+
+    scenario = Scenario(parameter_changes={
+        UC_CHILD_LIMIT_PARAMETER: {str(year): np.inf},
+        CTC_CHILD_LIMIT_PARAMETER: {str(year): np.inf},
+    })
+    baseline = SyntheticMicrosimulation(data)
+    reformed = SyntheticMicrosimulation(data, scenario=scenario)
+
+    timed(timings, 'baseline calculate', baseline.calculate, "household_net_income", year)
+    timed(timings, 'reform calculate', reformed.calculate, "household_net_income", year)
+    timed(timings, 'headline metrics', headline_metrics, baseline, reformed)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        filename = os.path.join(output_dir, "distributional-analysis.csv")
+        timed(timings, 'distributional analysis', generate_distributional_analysis,
+              baseline, reformed, year, filename)
+
+    return data.count['person'], timings
+
+
+def run_pipeline_benchmark(dataset, fraction, seed):
+    """Time every policy of one year on a stratified subsample of a dataset"""
+    timings = {}
+    datasets, households = timed(timings, 'sample', sample_datasets, dataset, [year], fraction, seed)
+    name = f"{dataset_name(dataset)}-{sample_label(fraction, seed)}"
+    with tempfile.TemporaryDirectory() as output_dir:
+        timed(timings, 'pipeline year', generate_year_csvs, year, datasets[year], output_dir, None, None, None, name)
+    return households, timings
+
+
+# Runs a script in a fresh interpreter and reports its wall time and whether it imported the model
+STARTUP_PROBE = """
+import json, runpy, sys, time
+start = time.perf_counter()
+sys.argv = {argv!r}
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+except SystemExit:
+    pass
+print(json.dumps({{'seconds': time.perf_counter() - start, 'model': 'policyengine_uk' in sys.modules}}))
+"""
+
+# Commands that only read or write files, with {data} standing for a scratch copy of public/data
+STARTUP_COMMANDS = {
+    'generate_all_csvs --help': ["generate_all_csvs.py", "--help"],
+    'generate_all_csvs --list-scenarios': ["generate_all_csvs.py", "--list-scenarios"],
+    'generate_all_csvs --combine-only': ["generate_all_csvs.py", "--combine-only", "--output-dir", "{data}"],
+    'exports (bundles, manifest)': ["exports.py", "--output-dir", "{data}"],
+    'response_curves --help': ["response_curves.py", "--help"],
+    'progressive --help': ["progressive.py", "--help"],
+    'scenario_service --help': ["scenario_service.py", "--help"],
+}
+
+
+def startup_probe(argv):
+    """Wall time of a fresh interpreter running argv, the script's own time and whether the model was imported"""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", STARTUP_PROBE.format(argv=argv)],
+                               capture_output=True, text=True, check=True)
+    total = time.perf_counter() - start
+    probe = json.loads(completed.stdout.strip().splitlines()[-1])
+    return total, probe['seconds'], probe['model']
+
+
+def run_startup_benchmark():
+    """Start-up time of every command that should not import the tax-benefit model"""
+    rows = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        data = os.path.join(scratch, "data")
+        shutil.copytree("public/data", data)
+        for name, argv in STARTUP_COMMANDS.items():
+            rows[name] = startup_probe([arg.format(data=data) for arg in argv])
+    return rows
+
+
+def model_import_seconds():
+    """Time to import policyengine_uk in a fresh interpreter, or None if it is not installed"""
+    code = "import time; start = time.perf_counter(); import policyengine_uk; print(time.perf_counter() - start)"
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if completed.returncode != 0:
+        return None
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+# Builds a baseline and a reform in a fresh interpreter, from a dataset reference or its snapshot
+SNAPSHOT_PROBE = """
+import json, time
+start = time.perf_counter()
+from dataset_snapshots import snapshot_dataset
+from simulations import child_limit_changes, simulation_classes
+dataset = snapshot_dataset({dataset!r}, {year}, {snapshot_dir!r})
+Microsimulation, Scenario = simulation_classes(dataset)
+timings = {{'import and load': time.perf_counter() - start}}
+start = time.perf_counter()
+baseline = Microsimulation(dataset=dataset)
+baseline.calculate("household_net_income", {year})
+timings['baseline'] = time.perf_counter() - start
+start = time.perf_counter()
+reformed = Microsimulation(dataset=dataset, scenario=Scenario(parameter_changes=child_limit_changes({year}, float("inf"))))
+reformed.calculate("household_net_income", {year})
+timings['reform'] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+def snapshot_probe(dataset, year, snapshot_dir):
+    """Stage times of building a baseline and a reform in a fresh interpreter"""
+    code = SNAPSHOT_PROBE.format(dataset=dataset, year=year, snapshot_dir=snapshot_dir)
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings['total'] = sum(timings.values())
+    return timings
+
+
+def run_snapshot_benchmark(dataset, year):
+    """Simulation construction from the dataset reference and from its snapshot"""
+    from dataset_snapshots import save_snapshot
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        cold = snapshot_probe(dataset, year, None)
+        start = time.perf_counter()
+        path = save_snapshot(dataset, year, snapshot_dir)
+        save_seconds = time.perf_counter() - start
+        size = os.path.getsize(path)
+        warm = snapshot_probe(dataset, year, snapshot_dir)
+    return cold, warm, save_seconds, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic populations")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pipeline", default=None, metavar="DATASET",
+                        help="time one year of the full pipeline on a subsample of this dataset instead")
+    parser.add_argument("--sample", type=float, default=0.05, help="subsample fraction for --pipeline")
+    parser.add_argument("--startup", action="store_true",
+                        help="time the start-up of commands that should not import the tax-benefit model")
+    parser.add_argument("--snapshot", default=None, metavar="DATASET",
+                        help="time building simulations from this dataset and from its snapshot instead")
+    parser.add_argument("--year", type=int, default=year, help="year for --snapshot")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        cold, warm, save_seconds, size = run_snapshot_benchmark(args.snapshot, args.year)
+        print("\n" + "="*60)
+        print(f"SNAPSHOT BENCHMARK: {args.snapshot} {args.year} (seconds)")
+        print("="*60)
+        print(f"{'stage':<26}{'cold':>12}{'snapshot':>12}")
+        for stage in cold:
+            print(f"{stage:<26}{cold[stage]:>12.3f}{warm[stage]:>12.3f}")
+        print(f"\nSaving the snapshot took {save_seconds:.2f} s for {size / 1e6:,.1f} MB")
+        return
+
+    if args.startup:
+        rows = run_startup_benchmark()
+        print("\n" + "="*60)
+        print("START-UP BENCHMARK (seconds)")
+        print("="*60)
+        print(f"{'command':<38}{'process':>10}{'script':>10}  model imported")
+        for name, (total, script, model) in rows.items():
+            print(f"{name:<38}{total:>10.3f}{script:>10.3f}  {'YES' if model else 'no'}")
+        seconds = model_import_seconds()
+        print(f"\nimport policyengine_uk: {'not installed' if seconds is None else f'{seconds:.2f} s'}")
+        return
+
+    if args.pipeline:
+        households, timings = run_pipeline_benchmark(args.pipeline, args.sample, args.seed)
+        print("\n" + "="*60)
+        print(f"PIPELINE BENCHMARK: {args.sample:.2%} of households ({households:,})")
+        print("="*60)
+        for stage, seconds in timings.items():
+            print(f"{stage:<26}{seconds:>12.3f}")
+        return
+
+    rows = [run_benchmark(persons, args.seed) for persons in args.sizes]
+
+    stages = list(rows[0][1])
+    print("\n" + "="*60)
+    print("BENCHMARK RESULTS (seconds)")
+    print("="*60)
+    print(f"{'stage':<26}" + "".join(f"{persons:>12,}" for persons, _ in rows))
+    for stage in stages:
+        print(f"{stage:<26}" + "".join(f"{timings[stage]:>12.3f}" for _, timings in rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Weighted bootstrap confidence intervals for the headline metrics.
+
+Sampling uncertainty is estimated by redrawing household weights: each of R
+replicates multiplies every household weight by a random factor (Poisson(1)
+or, for the Bayesian bootstrap, a Dirichlet draw scaled to the sample size).
+The factors form an R x households matrix, and every metric for every
+replicate comes from one matrix product with household totals that are
+already computed, so no simulation is re-run.
+"""
+
+import numpy as np
+
+
+class Bootstrap:
+    """Replicate household weights and percentile intervals for one run"""
+
+    def __init__(self, replicates=500, seed=0, level=0.95, method="poisson"):
+        if method not in ("poisson", "bayesian"):
+            raise ValueError(f"Unknown bootstrap method: {method}")
+        self.replicates = replicates
+        self.seed = seed
+        self.level = level
+        self.method = method
+        self._multipliers = {}
+
+    def multipliers(self, n_households):
+        """R x households weight multipliers, drawn once per sample size
+
+        Draws are made in float32 and cached as float64, so every product
+        accumulates in float64 without copying the matrix again.
+        """
+        if n_households not in self._multipliers:
+            rng = np.random.default_rng(self.seed)
+            shape = (self.replicates, n_households)
+            if self.method == "poisson":
+                draws = rng.poisson(1.0, shape).astype(np.float32)
+            else:
+                draws = rng.standard_exponential(shape, dtype=np.float32)
+                draws *= n_households / draws.sum(axis=1, keepdims=True)
+            self._multipliers[n_households] = draws.astype(np.float64)
+        return self._multipliers[n_households]
+
+    def replicate_totals(self, household_weight, columns):
+        """Weighted column totals for every replicate: (R x H) @ (H x K)"""
+        weighted = np.column_stack(columns) * np.asarray(household_weight, dtype=float)[:, None]
+        return self.multipliers(len(household_weight)) @ weighted
+
+    def interval(self, values):
+        """Percentile interval over replicates"""
+        tail = (1 - self.level) / 2 * 100
+        lower, upper = np.percentile(values, [tail, 100 - tail], axis=0)
+        return lower, upper
+
+    def headline_intervals(self, household_weight, income_change, baseline_child_poor, reformed_child_poor, children):
+        """Intervals for cost, children lifted out of poverty and the poverty rate reduction
+
+        All inputs are household-level: the change in net income, the number of
+        children in poverty before and after the reform, and the number of children.
+        """
+        totals = self.replicate_totals(
+            household_weight, [income_change, baseline_child_poor, reformed_child_poor, children]
+        )
+        cost, baseline_poor, reformed_poor, total_children = totals.T
+        children_out = baseline_poor - reformed_poor
+
+        intervals = {
+            'cost': self.interval(cost),
+            'childrenOutOfPoverty': self.interval(children_out),
+            'povertyRateReduction': self.interval(children_out / total_children),
+            'reformedPovertyRate': self.interval(reformed_poor / total_children),
+        }
+        result = {}
+        for metric, (lower, upper) in intervals.items():
+            result[f"{metric}Lower"] = lower
+            result[f"{metric}Upper"] = upper
+        return result
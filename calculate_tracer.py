@@ -0,0 +1,151 @@
+"""
+Opt-in tracer for Microsimulation.calculate() calls.
+
+Wraps calculate() on each simulation the pipeline builds and records, per
+variable, how often it is requested, how often the answer was already cached
+by the simulation, how long the calls took and which entity and map_to were
+used. Results are aggregated across the baseline and every reform:
+
+    tracer = CalculateTracer()
+    baseline = tracer.wrap(Microsimulation(dataset=dataset), "baseline")
+    ...
+    tracer.print_report()
+    tracer.write_report("calculate-trace.json")
+
+write_report() also writes a folded-stacks file next to the JSON
+(simulation;variable;map_to microseconds) that flamegraph.pl or speedscope
+can render directly.
+"""
+
+import json
+import os
+import time
+from collections import defaultdict
+
+
+def _period_key(period):
+    return str(period) if period is not None else None
+
+
+def is_cached(simulation, variable, period):
+    """Whether a simulation already holds a computed value, or None if unknown"""
+    # Synthetic simulations keep a plain dictionary cache
+    cache = getattr(simulation, '_cache', None)
+    if isinstance(cache, dict):
+        return (variable, int(period)) in cache if period is not None else None
+    # PolicyEngine simulations store computed arrays on each variable's holder
+    try:
+        return simulation.get_holder(variable).get_array(_period_key(period)) is not None
+    except Exception:
+        return None
+
+
+def variable_entity(simulation, variable):
+    """The entity a variable is defined on"""
+    system = getattr(simulation, 'tax_benefit_system', None)
+    if system is not None and variable in system.variables:
+        return system.variables[variable].entity.key
+    from synthetic_frs import VARIABLES
+    return VARIABLES[variable][0] if variable in VARIABLES else None
+
+
+class CalculateTracer:
+    """Records calculate() calls across every simulation it wraps"""
+
+    def __init__(self):
+        self.calls = []
+        self.seen = set()
+
+    def wrap(self, simulation, label):
+        """Trace calculate() on a simulation under a label like 'baseline' or 'three-child-limit[5]'"""
+        calculate = simulation.calculate
+        simulation_id = id(simulation)
+
+        def traced_calculate(variable, period=None, map_to=None, *args, **kwargs):
+            cached = is_cached(simulation, variable, period)
+            key = (simulation_id, variable, _period_key(period), map_to)
+            repeat = key in self.seen
+            self.seen.add(key)
+            start = time.perf_counter()
+            result = calculate(variable, period, *args, map_to=map_to, **kwargs)
+            self.calls.append({
+                'simulation': label,
+                'variable': variable,
+                'period': _period_key(period),
+                'entity': variable_entity(simulation, variable),
+                'map_to': map_to,
+                'seconds': time.perf_counter() - start,
+                'cache_hit': cached,
+                'repeat': repeat,
+            })
+            return result
+
+        simulation.calculate = traced_calculate
+        return simulation
+
+    def variable_rows(self):
+        """Per-variable totals, slowest first"""
+        rows = {}
+        for call in self.calls:
+            row = rows.setdefault(call['variable'], {
+                'variable': call['variable'],
+                'entity': call['entity'],
+                'calls': 0,
+                'cache_hits': 0,
+                'repeat_calls': 0,
+                'seconds': 0.0,
+                'simulations': set(),
+                'map_to': defaultdict(int),
+            })
+            row['calls'] += 1
+            row['cache_hits'] += bool(call['cache_hit'])
+            row['repeat_calls'] += call['repeat']
+            row['seconds'] += call['seconds']
+            row['simulations'].add(call['simulation'])
+            row['map_to'][call['map_to'] or call['entity']] += 1
+
+        result = []
+        for row in rows.values():
+            row['simulations'] = len(row['simulations'])
+            row['map_to'] = dict(row['map_to'])
+            row['seconds_per_miss'] = row['seconds'] / max(1, row['calls'] - row['cache_hits'])
+            result.append(row)
+        return sorted(result, key=lambda row: -row['seconds'])
+
+    def folded_stacks(self):
+        """Flame graph input: one 'simulation;variable;map_to microseconds' line per stack"""
+        totals = defaultdict(float)
+        for call in self.calls:
+            stack = ";".join([call['simulation'], call['variable'], call['map_to'] or call['entity'] or "-"])
+            totals[stack] += call['seconds']
+        return [f"{stack} {int(seconds * 1e6)}" for stack, seconds in sorted(totals.items())]
+
+    def write_report(self, filename):
+        """Write the ranked per-variable report as JSON, plus folded stacks alongside"""
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        with open(filename, "w") as f:
+            json.dump({'variables': self.variable_rows(), 'calls': self.calls}, f, indent=2)
+        print(f"Saved: {filename}")
+
+        folded_filename = os.path.splitext(filename)[0] + ".folded"
+        with open(folded_filename, "w") as f:
+            f.write("\n".join(self.folded_stacks()) + "\n")
+        print(f"Saved: {folded_filename}")
+
+    def print_report(self, top=25):
+        """Print the hottest variables with a bar of their share of traced time"""
+        rows = self.variable_rows()
+        total = sum(row['seconds'] for row in rows) or 1
+
+        print("\n" + "="*100)
+        print("CALCULATE TRACE (hottest variables first)")
+        print("="*100)
+        print(f"{'variable':<38}{'entity':<11}{'calls':>7}{'hits':>7}{'sims':>6}{'time (s)':>11}  share")
+        for row in rows[:top]:
+            share = row['seconds'] / total
+            bar = "#" * max(1, round(share * 30)) if row['seconds'] > 0 else ""
+            print(f"{row['variable']:<38}{str(row['entity']):<11}{row['calls']:>7}{row['cache_hits']:>7}"
+                  f"{row['simulations']:>6}{row['seconds']:>11.2f}  {bar} {share:.0%}")
+        print("-"*100)
+        print(f"{len(self.calls)} calls over {len(rows)} variables, {total:.2f}s traced. "
+              "'hits' were already computed in that simulation.")
@@ -0,0 +1,120 @@
+"""
+Checkpoints and a completion journal so long regeneration runs can resume.
+
+Every result file is written atomically: to a temporary file in the same
+directory, then renamed over the target, so a crash never leaves a truncated
+CSV behind. Each completed unit of work (one policy for one year, or one
+simulated child limit) is then appended to a journal:
+
+    checkpoints/<dataset>/journal.jsonl
+    {"run": {...}, "unit": "2026/three-child-limit", "files": [...]}
+
+A restarted run skips every year whose policies are all journaled, and within
+a partly finished year loads the child limit results it already simulated.
+Entries only count for runs with the same settings, and only while the files
+they list still exist.
+
+Workers sharing a checkpoint directory (see work_queue.py) each append to their
+own journal-<worker>.jsonl, and every journal in the directory is read back.
+"""
+
+import glob
+import json
+import os
+import socket
+from contextlib import contextmanager
+
+import numpy as np
+
+CHECKPOINT_DIR = "checkpoints"
+
+
+def dataset_name(dataset):
+    """Short file-system name for a dataset reference"""
+    return os.path.basename(str(dataset)).replace(":", "-").rsplit(".", 1)[0]
+
+
+def checkpoint_dir(dataset, root=CHECKPOINT_DIR):
+    """Directory holding the journal and scenario arrays for a dataset"""
+    return f"{root}/{dataset_name(dataset)}"
+
+
+@contextmanager
+def atomic_path(filename):
+    """Temporary path to write instead of `filename`, renamed over it if the block succeeds"""
+    directory, base = os.path.split(filename)
+    # Unique across the hosts of a shared output directory
+    temporary = os.path.join(directory, f".{base}.{socket.gethostname()}.{os.getpid()}.tmp")
+    try:
+        yield temporary
+        os.replace(temporary, filename)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def save_arrays(filename, **arrays):
+    """Atomically save arrays to an .npz file"""
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with atomic_path(filename) as temporary:
+        with open(temporary, "wb") as f:
+            np.savez(f, **arrays)
+
+
+def load_arrays(filename):
+    """Arrays saved by save_arrays()"""
+    with np.load(filename) as data:
+        return {name: data[name] for name in data.files}
+
+
+def unit_name(year, policy, parameter=None):
+    """Journal key for one unit of work"""
+    return f"{year}/{policy}" if parameter is None else f"{year}/{policy}/{parameter}"
+
+
+class Journal:
+    """Append-only record of completed units of work for one set of run settings"""
+
+    def __init__(self, directory, run, worker=None):
+        self.directory = directory
+        self.path = f"{directory}/journal.jsonl" if worker is None else f"{directory}/journal-{worker}.jsonl"
+        self.run = run
+        self.completed = {}
+        for path in self.journal_files():
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # a line torn by a crash mid-append
+                    if entry.get('run') == run:
+                        self.completed[entry['unit']] = entry['files']
+
+    def journal_files(self):
+        """Every journal in the directory, this process's and other workers'"""
+        return sorted(glob.glob(f"{glob.escape(self.directory)}/journal*.jsonl"))
+
+    def reset(self):
+        """Forget every completed unit"""
+        self.completed.clear()
+        for path in self.journal_files():
+            os.remove(path)
+
+    def is_done(self, year, policy, parameter=None):
+        """Whether a unit was completed and its files are still there"""
+        files = self.completed.get(unit_name(year, policy, parameter))
+        return files is not None and all(os.path.exists(filename) for filename in files)
+
+    def record(self, year, policy, parameter=None, files=()):
+        """Mark a unit complete once its files are written"""
+        unit = unit_name(year, policy, parameter)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps({'run': self.run, 'unit': unit, 'files': list(files)}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.completed[unit] = list(files)
+
+    def scenario_file(self, year, policy, parameter):
+        """Where the arrays of one simulated scenario are checkpointed"""
+        return f"{self.directory}/{year}-{policy}-{parameter}.npz"
@@ -0,0 +1,221 @@
+"""
+On-disk snapshots of a dataset's loaded, uprated inputs for one year.
+
+Building a simulation loads the dataset and uprates it to each year, for the
+baseline and again in every process that needs one. A snapshot stores that
+input state once, in an uncompressed .npz file, and later simulations are
+built straight from it:
+
+    dataset = snapshot_dataset("hf://policyengine/policyengine-uk-data/enhanced_frs_2023_24.h5", 2029)
+    baseline = Microsimulation(dataset=dataset)
+    reformed = Microsimulation(dataset=dataset, scenario=scenario)
+
+    python dataset_snapshots.py --dataset synthetic:1000000:0 --years 2026 2027 2028 2029
+
+For PolicyEngine datasets a snapshot holds the uprated person, benefit unit
+and household tables for every year up to the snapshot year, rebuilt as a
+UKMultiYearDataset. For synthetic datasets it holds the population arrays and
+the year's uprated inputs.
+
+Snapshots are named by a key over the dataset (its reference, and the size and
+modification time of a local or downloaded file) and the model version (the
+installed policyengine-uk and policyengine-core versions, or the synthetic
+model's source). A changed dataset or model gives a new key, so a stale
+snapshot is never read, and is removed when its replacement is saved.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from importlib.metadata import PackageNotFoundError, version
+
+import numpy as np
+import pandas as pd
+
+from checkpoints import dataset_name, load_arrays, save_arrays
+from simulations import YEARS
+from synthetic_frs import UPRATED_INPUTS, SyntheticFRS, is_synthetic_dataset, load_synthetic_frs
+
+SNAPSHOT_DIR = "snapshots"
+
+# Bumped when the layout of a snapshot file changes
+SNAPSHOT_FORMAT = 1
+
+TABLES = ("person", "benunit", "household")
+
+_loaded_snapshots = {}
+
+
+def model_version(dataset):
+    """Versions of the model that loads and uprates a dataset"""
+    if is_synthetic_dataset(dataset):
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "synthetic_frs.py"), "rb") as f:
+            return {'synthetic_frs': hashlib.sha256(f.read()).hexdigest()[:16]}
+    versions = {}
+    for package in ("policyengine-uk", "policyengine-core"):
+        try:
+            versions[package] = version(package)
+        except PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def local_dataset_file(dataset):
+    """The local file behind a dataset reference, downloading it if needed, or None"""
+    if dataset.startswith("hf://"):
+        from policyengine_core.tools.hugging_face import download_huggingface_dataset
+
+        owner, repo, filename = dataset.split("/")[-3:]
+        filename, _, revision = filename.partition("@")
+        return download_huggingface_dataset(repo=f"{owner}/{repo}", repo_filename=filename,
+                                            version=revision or None)
+    if "://" in dataset or dataset.startswith("synthetic:"):
+        return None
+    return dataset
+
+
+def dataset_fingerprint(dataset):
+    """What identifies a dataset's contents: its reference and the size and time of its file"""
+    fingerprint = {'dataset': dataset}
+    path = local_dataset_file(dataset)
+    if path is not None:
+        stat = os.stat(path)
+        fingerprint.update(file=os.path.realpath(path), size=stat.st_size, modified=stat.st_mtime_ns)
+    return fingerprint
+
+
+def snapshot_meta(dataset, year):
+    """Everything a snapshot depends on"""
+    return {
+        'format': SNAPSHOT_FORMAT,
+        'year': year,
+        **dataset_fingerprint(dataset),
+        'model': model_version(dataset),
+    }
+
+
+def snapshot_key(meta):
+    """Short digest of a snapshot's dependencies"""
+    return hashlib.sha256(json.dumps(meta, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def snapshot_filename(dataset, year, meta, snapshot_dir=SNAPSHOT_DIR):
+    """Where the snapshot of a dataset for a year is stored"""
+    return f"{snapshot_dir}/{dataset_name(dataset)}-{year}-{snapshot_key(meta)}.npz"
+
+
+def synthetic_arrays(dataset, year):
+    """Population arrays and the year's uprated inputs of a synthetic dataset"""
+    from synthetic_frs import SyntheticMicrosimulation
+
+    data = load_synthetic_frs(dataset)
+    simulation = SyntheticMicrosimulation(data)
+    arrays = {f"arrays/{name}": values for name, values in data.arrays.items()}
+    arrays.update({f"inputs/{variable}": simulation._get(variable, year) for variable in UPRATED_INPUTS})
+    arrays['persons'] = np.array(data.persons)
+    arrays['seed'] = np.array(data.seed)
+    return arrays
+
+
+def policyengine_arrays(dataset, year):
+    """Uprated entity tables of a PolicyEngine dataset for every year up to `year`"""
+    from policyengine_uk import Microsimulation
+
+    uprated = Microsimulation(dataset=dataset).dataset
+    arrays = {}
+    for dataset_year in uprated.years:
+        if dataset_year > year:
+            continue
+        for table_name, table in zip(TABLES, uprated[dataset_year].tables):
+            for column in table.columns:
+                values = np.asarray(table[column].values)
+                # Enum columns are already int16 codes; anything else non-numeric is stored as text
+                arrays[f"{dataset_year}/{table_name}/{column}"] = values.astype(str) if values.dtype == object else values
+    return arrays
+
+
+def synthetic_snapshot(arrays, year):
+    """Synthetic population restored from snapshot arrays"""
+    population = {key[len("arrays/"):]: values for key, values in arrays.items() if key.startswith("arrays/")}
+    inputs = {(key[len("inputs/"):], year): values for key, values in arrays.items() if key.startswith("inputs/")}
+    return SyntheticFRS(population, int(arrays['persons']), int(arrays['seed']), inputs)
+
+
+def policyengine_snapshot(arrays):
+    """UKMultiYearDataset restored from snapshot arrays"""
+    from policyengine_uk.data import UKMultiYearDataset, UKSingleYearDataset
+
+    columns = {}
+    for key, values in arrays.items():
+        dataset_year, table_name, column = key.split("/", 2)
+        columns.setdefault(int(dataset_year), {t: {} for t in TABLES})[table_name][column] = values
+    return UKMultiYearDataset(datasets=[
+        UKSingleYearDataset(**{name: pd.DataFrame(tables[name]) for name in TABLES}, fiscal_year=dataset_year)
+        for dataset_year, tables in sorted(columns.items())
+    ])
+
+
+def save_snapshot(dataset, year, snapshot_dir=SNAPSHOT_DIR):
+    """Load and uprate a dataset the usual way and save its snapshot for a year, returning the path"""
+    meta = snapshot_meta(dataset, year)
+    path = snapshot_filename(dataset, year, meta, snapshot_dir)
+    arrays = synthetic_arrays(dataset, year) if is_synthetic_dataset(dataset) else policyengine_arrays(dataset, year)
+    save_arrays(path, meta=np.array(json.dumps(meta, sort_keys=True)), **arrays)
+    # Snapshots of older versions of the dataset or model are never read again
+    for stale in glob.glob(f"{glob.escape(snapshot_dir)}/{glob.escape(dataset_name(dataset))}-{year}-*.npz"):
+        if stale != path:
+            os.remove(stale)
+    print(f"Saved: {path}")
+    return path
+
+
+def load_snapshot(path, year):
+    """Dataset to pass to Microsimulation(dataset=...), restored from a saved snapshot"""
+    if path not in _loaded_snapshots:
+        arrays = load_arrays(path)
+        meta = json.loads(str(arrays.pop('meta')))
+        if meta['year'] != year:
+            raise ValueError(f"{path} is a snapshot for {meta['year']}, not {year}")
+        _loaded_snapshots[path] = (synthetic_snapshot(arrays, year) if 'synthetic_frs' in meta['model']
+                                   else policyengine_snapshot(arrays))
+    return _loaded_snapshots[path]
+
+
+def snapshot_dataset(dataset, year, snapshot_dir=SNAPSHOT_DIR):
+    """A dataset reference's snapshot for a year, saved first if missing or stale
+
+    Datasets that are already objects (such as subsamples), or a None
+    `snapshot_dir`, are returned unchanged.
+    """
+    if snapshot_dir is None or not isinstance(dataset, str):
+        return dataset
+    path = snapshot_filename(dataset, year, snapshot_meta(dataset, year), snapshot_dir)
+    if not os.path.exists(path):
+        save_snapshot(dataset, year, snapshot_dir)
+    return load_snapshot(path, year)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Save snapshots of a dataset's uprated inputs")
+    parser.add_argument("--dataset", required=True,
+                        help="PolicyEngine dataset, a synthetic .npz file or synthetic:<persons>[:<seed>]")
+    parser.add_argument("--years", type=int, nargs="+", default=YEARS)
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    for year in args.years:
+        meta = snapshot_meta(args.dataset, year)
+        path = snapshot_filename(args.dataset, year, meta, args.snapshot_dir)
+        if os.path.exists(path):
+            print(f"Up to date: {path}")
+            continue
+        start = time.perf_counter()
+        save_snapshot(args.dataset, year, args.snapshot_dir)
+        print(f"  built in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
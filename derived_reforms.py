@@ -0,0 +1,266 @@
+"""
+Derived reforms from cached full-abolition deltas.
+
+Exemption-style reforms (under-age, disabled-child, working-family) are not
+simulated. Each one gives some benefit units part of the gain they would get
+from abolishing the limit outright. The per-unit gains, per-household income
+and child poverty changes, and the attributes the exemptions test are stored
+once per year as compact arrays:
+
+    deltas = build_abolition_deltas(baseline, reformed_full, year)
+    deltas.save("abolition_deltas/synthetic-20000-0-2026.npz")
+    under_five = deltas.child_exemption(deltas.child['age'] < 5)
+    disabled = deltas.child_exemption(deltas.child['disabled'])
+    working = deltas.family_exemption(deltas.benunit['working'])
+
+Child exemptions give each benefit unit the share of its abolition gain that
+matches its share of limited children who are exempt. Family exemptions give
+the whole gain to eligible units. Households receive the gain-weighted share
+of their units' gains, applied to both the income change and the children
+lifted out of poverty.
+
+Stores are named by a key over the dataset and model, like dataset snapshots,
+so a store from an older dataset or model is never read. Once a year's store
+exists, a new variant needs no simulation at all:
+
+    deltas = abolition_deltas("synthetic:20000:0", 2026)
+    python derived_reforms.py --dataset synthetic:20000:0 --year 2026 --age-limit 7
+"""
+
+import argparse
+import glob
+import json
+import os
+
+import numpy as np
+
+from checkpoints import atomic_path, dataset_name
+from dataset_snapshots import SNAPSHOT_DIR, dataset_fingerprint, model_version, snapshot_dataset, snapshot_key
+from schema import calculate_compact, household_child_poverty, household_sums, person_household_index, weighted_sum
+from simulations import DATASET, YEARS, child_limit_changes, simulation_classes
+
+DELTA_DIR = "abolition_deltas"
+
+# Bumped when the stored arrays change
+DELTA_FORMAT = 1
+
+# Stored arrays for each level of the store
+ENTITY_ARRAYS = {
+    'household': ['weight', 'baseline_income', 'income_change', 'decile', 'children',
+                  'baseline_child_poor', 'children_lifted'],
+    'benunit': ['household', 'weight', 'uc_gain', 'ctc_gain', 'limited_children', 'working'],
+    'child': ['benunit', 'weight', 'age', 'disabled'],
+}
+
+
+def delta_meta(dataset, sample=None):
+    """Everything a store depends on: the dataset, the model and any subsample of households"""
+    return {
+        'format': DELTA_FORMAT,
+        **dataset_fingerprint(dataset),
+        'model': model_version(dataset),
+        'sample': sample,
+    }
+
+
+def delta_filename(name, year, meta, delta_dir=DELTA_DIR):
+    """Where the deltas for a dataset and year are persisted"""
+    return f"{delta_dir}/{dataset_name(name)}-{year}-{snapshot_key(meta)}.npz"
+
+
+class AbolitionDeltas:
+    """Per-household, per-benefit-unit and per-limited-child arrays for one year"""
+
+    def __init__(self, household, benunit, child, year):
+        self.household = household
+        self.benunit = benunit
+        self.child = child
+        self.year = year
+
+    def save(self, path, meta=None):
+        """Save the store, and what it was built from, to a compressed .npz file"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {
+            f"{entity}/{name}": getattr(self, entity)[name]
+            for entity, names in ENTITY_ARRAYS.items()
+            for name in names
+        }
+        if meta is not None:
+            arrays['meta'] = np.array(json.dumps(meta, sort_keys=True))
+        with atomic_path(path) as temporary:
+            with open(temporary, "wb") as f:
+                np.savez_compressed(f, year=self.year, **arrays)
+        print(f"Saved: {path}")
+
+    @classmethod
+    def load(cls, path):
+        """Load a store written by save()"""
+        with np.load(path) as data:
+            entities = {
+                entity: {name: data[f"{entity}/{name}"] for name in names}
+                for entity, names in ENTITY_ARRAYS.items()
+            }
+            year = int(data['year'])
+        return cls(entities['household'], entities['benunit'], entities['child'], year)
+
+    def child_exemption(self, child_mask):
+        """Reform exempting the limited children selected by `child_mask` from the limit"""
+        benunit = self.benunit
+        n_benunits = len(benunit['weight'])
+        exempt = np.bincount(self.child['benunit'], weights=child_mask.astype(float), minlength=n_benunits)
+        share = np.divide(exempt, benunit['limited_children'], out=np.zeros(n_benunits),
+                          where=benunit['limited_children'] > 0)
+        result = self.derive(share)
+        result['children_exempt'] = weighted_sum(self.child['weight'], child_mask)
+        return result
+
+    def family_exemption(self, benunit_mask):
+        """Reform exempting the benefit units selected by `benunit_mask` from the limit"""
+        result = self.derive(benunit_mask.astype(float))
+        limited = self.benunit['limited_children']
+        result['children_exempt'] = weighted_sum(self.benunit['weight'], limited * benunit_mask)
+        return result
+
+    def derive(self, benunit_share):
+        """Household results when each benefit unit receives `benunit_share` of its abolition gain"""
+        household = self.household
+        benunit = self.benunit
+        n_households = len(household['weight'])
+
+        gain = benunit['uc_gain'] + benunit['ctc_gain']
+        total_gain = np.bincount(benunit['household'], weights=gain, minlength=n_households)
+        shared_gain = np.bincount(benunit['household'], weights=gain * benunit_share, minlength=n_households)
+        # Without a benefit gain to weight by, fall back to the share of limited children
+        limited = np.bincount(benunit['household'], weights=benunit['limited_children'], minlength=n_households)
+        shared_limited = np.bincount(benunit['household'], weights=benunit['limited_children'] * benunit_share,
+                                     minlength=n_households)
+        household_share = np.divide(shared_limited, limited, out=np.zeros(n_households), where=limited > 0)
+        np.divide(shared_gain, total_gain, out=household_share, where=total_gain > 0)
+
+        limited_families = benunit['limited_children'] > 0
+        family_weight = weighted_sum(benunit['weight'], limited_families)
+        families_share = weighted_sum(benunit['weight'], limited_families * benunit_share) / family_weight if family_weight > 0 else 0
+
+        weight = household['weight']
+        income_change = household['income_change'] * household_share
+        children_out = weighted_sum(weight, household['children_lifted'] * household_share)
+        return {
+            'cost': weighted_sum(weight, income_change),
+            'children_out_of_poverty': children_out,
+            'poverty_rate_reduction': children_out / weighted_sum(weight, household['children']),
+            'families_share': families_share,
+            'reformed_income': household['baseline_income'] + income_change,
+            'income_change': income_change,
+            'children_lifted': household['children_lifted'] * household_share,
+            'household_share': household_share,
+        }
+
+
+def load_deltas(name, year, meta, delta_dir=DELTA_DIR):
+    """The saved store for a dataset and year, or None if there is none for this dataset and model"""
+    path = delta_filename(name, year, meta, delta_dir)
+    return AbolitionDeltas.load(path) if os.path.exists(path) else None
+
+
+def save_deltas(deltas, name, meta, delta_dir=DELTA_DIR):
+    """Save a year's store, removing any built from an older dataset or model"""
+    path = delta_filename(name, deltas.year, meta, delta_dir)
+    deltas.save(path, meta)
+    for stale in glob.glob(f"{glob.escape(delta_dir)}/{glob.escape(dataset_name(name))}-{deltas.year}-*.npz"):
+        if stale != path:
+            os.remove(stale)
+
+
+def abolition_deltas(dataset, year, delta_dir=DELTA_DIR, snapshot_dir=SNAPSHOT_DIR):
+    """A year's store, loaded if saved for this dataset and model, otherwise simulated and saved"""
+    meta = delta_meta(dataset)
+    deltas = load_deltas(dataset, year, meta, delta_dir)
+    if deltas is None:
+        Microsimulation, Scenario = simulation_classes(dataset)
+        data = snapshot_dataset(dataset, year, snapshot_dir)
+        baseline = Microsimulation(dataset=data)
+        reformed = Microsimulation(dataset=data, scenario=Scenario(parameter_changes=child_limit_changes(year, np.inf)))
+        deltas = build_abolition_deltas(baseline, reformed, year)
+        save_deltas(deltas, dataset, meta, delta_dir)
+    return deltas
+
+
+def build_abolition_deltas(baseline, reformed, year, reformed_in_poverty=None):
+    """Abolition deltas from a baseline and a full abolition simulation
+
+    `reformed_in_poverty` are the reform's person-level poverty flags, if already known.
+    """
+    household_id = calculate_compact(baseline, "household_id", year)
+    n_households = len(household_id)
+    person_household = person_household_index(calculate_compact(baseline, "household_id", year, map_to="person"), household_id)
+    benunit_id = calculate_compact(baseline, "benunit_id", year)
+    person_benunit = person_household_index(calculate_compact(baseline, "benunit_id", year, map_to="person"), benunit_id)
+    n_benunits = len(benunit_id)
+
+    is_child = calculate_compact(baseline, "is_child", year, map_to="person")
+    limited = is_child & calculate_compact(baseline, "uc_is_child_limit_affected", year, map_to="person")
+    disabled = (calculate_compact(baseline, "dla", year, map_to="person") > 0) | (calculate_compact(baseline, "pip", year, map_to="person") > 0)
+    employed = calculate_compact(baseline, "employment_income", year, map_to="person") > 0
+
+    baseline_income = calculate_compact(baseline, "household_net_income", year)
+    baseline_child_poor = household_child_poverty(
+        calculate_compact(baseline, "in_poverty", year, map_to="person"), is_child, person_household, n_households)
+    if reformed_in_poverty is None:
+        reformed_in_poverty = calculate_compact(reformed, "in_poverty", year, map_to="person")
+    reformed_child_poor = household_child_poverty(reformed_in_poverty, is_child, person_household, n_households)
+
+    household = {
+        'weight': calculate_compact(baseline, "household_weight", year),
+        'baseline_income': baseline_income,
+        'income_change': calculate_compact(reformed, "household_net_income", year) - baseline_income,
+        'decile': calculate_compact(baseline, "household_income_decile", year),
+        'children': household_sums(is_child, person_household, n_households).astype(np.int16),
+        'baseline_child_poor': baseline_child_poor.astype(np.int16),
+        'children_lifted': (baseline_child_poor - reformed_child_poor).astype(np.int16),
+    }
+    benunit_household = np.zeros(n_benunits, dtype=np.int32)
+    benunit_household[person_benunit] = person_household
+    benunit = {
+        'household': benunit_household,
+        'weight': household['weight'][benunit_household],
+        'uc_gain': calculate_compact(reformed, "universal_credit", year) - calculate_compact(baseline, "universal_credit", year),
+        'ctc_gain': calculate_compact(reformed, "child_tax_credit", year) - calculate_compact(baseline, "child_tax_credit", year),
+        'limited_children': np.bincount(person_benunit, weights=limited, minlength=n_benunits).astype(np.int16),
+        'working': np.bincount(person_benunit, weights=employed, minlength=n_benunits) > 0,
+    }
+    child = {
+        'benunit': person_benunit[limited].astype(np.int32),
+        'weight': calculate_compact(baseline, "person_weight", year, map_to="person")[limited],
+        'age': calculate_compact(baseline, "age", year, map_to="person")[limited].astype(np.int8),
+        'disabled': disabled[limited],
+    }
+    return AbolitionDeltas(household, benunit, child, year)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Derive an exemption reform from the stored abolition deltas")
+    parser.add_argument("--dataset", default=DATASET)
+    parser.add_argument("--year", type=int, default=YEARS[0])
+    parser.add_argument("--delta-dir", default=DELTA_DIR)
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR)
+    reform = parser.add_mutually_exclusive_group(required=True)
+    reform.add_argument("--age-limit", type=int, help="exempt limited children under this age")
+    reform.add_argument("--disabled", action="store_true", help="exempt limited children receiving DLA or PIP")
+    reform.add_argument("--working", action="store_true", help="exempt benefit units with employment income")
+    args = parser.parse_args()
+
+    deltas = abolition_deltas(args.dataset, args.year, args.delta_dir, args.snapshot_dir)
+    if args.age_limit is not None:
+        result = deltas.child_exemption(deltas.child['age'] < args.age_limit)
+    elif args.disabled:
+        result = deltas.child_exemption(deltas.child['disabled'])
+    else:
+        result = deltas.family_exemption(deltas.benunit['working'])
+    print(f"Cost: £{result['cost'] / 1e6:,.1f}m")
+    print(f"Children exempt: {result['children_exempt']:,.0f}")
+    print(f"Children out of poverty: {result['children_out_of_poverty']:,.0f}")
+    print(f"Child poverty rate reduction: {result['poverty_rate_reduction']:.2%}")
+
+
+if __name__ == "__main__":
+    main()
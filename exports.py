@@ -0,0 +1,265 @@
+"""
+Packed artefacts the web app loads instead of many small CSV files.
+
+Each year's distributional results are packed into one little-endian float32
+matrix, one row per policy setting and one column per income decile, with a
+small JSON index mapping policy and parameter to a row:
+
+    deciles-2026.json   {"data": "deciles-2026.bin", "deciles": [1, ..., 10],
+                         "rows": {"full-abolition": {"": 0},
+                                  "three-child-limit": {"3": 1, ...}, ...}}
+    deciles-2026.bin    rows x 10 float32 relative changes in percent
+
+The headline metrics in all-results.csv are also indexed by policy, parameter
+and year in results-index.json, so the app looks results up instead of
+scanning the long CSV. The baseline and full abolition figures that every
+policy setting reports (SHARED_METRICS, such as fullReformCost) are stored
+once per year:
+
+    results-index.json  {"years": ["2026", ...],
+                         "shared": {"2026": {"fullReformCost": ..., ...}},
+                         "results": {"three-child-limit": {"3": {"2026": {"cost": ..., ...}}}}}
+
+Bundles and the index are built from the CSVs, so they can be regenerated
+from an existing public/data directory:
+
+    python exports.py --output-dir public/data
+
+The files the app fetches are also published under content-hashed names in
+data/artefacts, and data/manifest.json maps each logical name to its hashed
+file. Each hashed file has a gzip variant, plus a brotli variant when the
+optional brotli package is installed, and the manifest records which exist so
+next.config.ts can serve them by Accept-Encoding. Hashed files never change,
+so they can be cached indefinitely; only the manifest needs revalidating
+after a regeneration.
+
+The new manifest is written before anything is pruned, and artefacts listed
+in the previous manifest are kept for one more generation, so a client still
+holding that manifest can finish loading after a regeneration.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from checkpoints import atomic_path
+from simulations import YEARS
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip variants are written
+    brotli = None
+
+ARTEFACT_DIR = "artefacts"
+
+DECILES = list(range(1, 11))
+
+# Every policy setting in the published grid
+POLICY_GRID = {
+    'full-abolition': [None],
+    'three-child-limit': list(range(3, 17)),
+    'under-five-exemption': list(range(3, 17)),
+    'disabled-child-exemption': [None],
+    'working-families-exemption': [None],
+    'lower-third-child-element': list(range(50, 105, 10)),
+}
+
+# Baseline and full abolition figures every policy setting reports, stored once per year
+SHARED_METRICS = ['baselinePovertyRate', 'fullReformCost', 'totalAffectedFamilies', 'totalLimitedChildren']
+
+# File name suffix for each parameterised policy
+PARAMETER_SUFFIX = {
+    'three-child-limit': 'limit',
+    'under-five-exemption': 'age',
+    'lower-third-child-element': 'rate',
+}
+
+
+def distributional_filename(policy, year, parameter=None):
+    """Name of the distributional CSV for a policy setting"""
+    if parameter is None:
+        return f"distributional-analysis-{policy}-{year}.csv"
+    return f"distributional-analysis-{policy}-{year}-{PARAMETER_SUFFIX[policy]}{parameter}.csv"
+
+
+def result_filename(policy, year, parameter=None):
+    """Name of the headline metrics CSV for a policy setting"""
+    if parameter is None:
+        return f"{policy}-{year}.csv"
+    return f"{policy}-{year}-{PARAMETER_SUFFIX[policy]}{parameter}.csv"
+
+
+def quantile_filename(name, year):
+    """Name of the CSV holding every scenario's curve by percentile or ventile"""
+    return f"distributional-{name}s-{year}.csv"
+
+
+def policy_files(output_dir, policy, year):
+    """Every CSV a policy writes for a year"""
+    return [
+        f"{output_dir}/{filename(policy, year, parameter)}"
+        for parameter in POLICY_GRID[policy]
+        for filename in (result_filename, distributional_filename)
+    ]
+
+
+def decile_bundle(output_dir, year):
+    """Relative change matrix and row index for every distributional CSV of a year"""
+    rows = {}
+    matrix = []
+    for policy, parameters in POLICY_GRID.items():
+        for parameter in parameters:
+            filename = f"{output_dir}/{distributional_filename(policy, year, parameter)}"
+            if not os.path.exists(filename):
+                continue
+            df = pd.read_csv(filename)
+            values = np.full(len(DECILES), np.nan, dtype=np.float32)
+            values[df['decile'].astype(int).values - 1] = df['relative_change_pct'].values
+            rows.setdefault(policy, {})['' if parameter is None else str(parameter)] = len(matrix)
+            matrix.append(values)
+    return np.array(matrix, dtype='<f4').reshape(-1, len(DECILES)), rows
+
+
+def write_decile_bundle(output_dir, year):
+    """Write the packed decile matrix and its JSON index for one year"""
+    matrix, rows = decile_bundle(output_dir, year)
+    data_file = f"deciles-{year}.bin"
+    with atomic_path(f"{output_dir}/{data_file}") as temporary:
+        with open(temporary, "wb") as f:
+            f.write(matrix.tobytes())
+    index = {
+        'year': year,
+        'data': data_file,
+        'dtype': 'float32',
+        'deciles': DECILES,
+        'rows': rows,
+    }
+    with atomic_path(f"{output_dir}/deciles-{year}.json") as temporary:
+        with open(temporary, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+    print(f"Saved: {output_dir}/{data_file} ({len(matrix)} rows)")
+
+
+def write_decile_bundles(output_dir, years=YEARS):
+    """Write a decile bundle for every year"""
+    for year in years:
+        write_decile_bundle(output_dir, year)
+
+
+def results_index(output_dir):
+    """all-results.csv as nested policy -> parameter -> year -> metric lookups, with shared metrics per year"""
+    # round_trip parsing keeps values bit-identical to parsing the CSV in the browser
+    df = pd.read_csv(f"{output_dir}/all-results.csv", float_precision="round_trip")
+    df['year'] = df['year'].astype(str)
+    df['parameter'] = ['' if pd.isna(parameter) else str(int(parameter)) for parameter in df['parameter']]
+
+    shared = {}
+    for (year, metric), rows in df[df['metric'].isin(SHARED_METRICS)].groupby(['year', 'metric']):
+        if rows['value'].nunique() != 1:
+            raise ValueError(f"{metric} differs between policy settings in {year}")
+        shared.setdefault(year, {})[metric] = float(rows['value'].iloc[0])
+
+    results = {}
+    for row in df.itertuples(index=False):
+        if row.metric in shared.get(row.year, {}):
+            continue
+        entry = results.setdefault(row.policy, {}).setdefault(row.parameter, {}).setdefault(row.year, {})
+        entry[row.metric] = float(row.value)
+    return {'years': sorted(df['year'].unique()), 'shared': shared, 'results': results}
+
+
+def write_results_index(output_dir):
+    """Write results-index.json from all-results.csv"""
+    index = results_index(output_dir)
+    filename = f"{output_dir}/results-index.json"
+    with atomic_path(filename) as temporary:
+        with open(temporary, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+    print(f"Saved: {filename}")
+
+
+def published_files(output_dir, years=YEARS):
+    """Logical names of the files the app fetches, where they exist"""
+    names = ['all-results.csv', 'results-index.json', 'response-curves.json']
+    for year in years:
+        names += [f"deciles-{year}.json", f"deciles-{year}.bin",
+                  quantile_filename("percentile", year), quantile_filename("ventile", year)]
+    return [name for name in names if os.path.exists(f"{output_dir}/{name}")]
+
+
+def write_if_missing(filename, data):
+    """Write a content-addressed file unless an identical one is already there"""
+    if not os.path.exists(filename):
+        # Written atomically, since an existing file is never rewritten
+        with atomic_path(filename) as temporary:
+            with open(temporary, "wb") as f:
+                f.write(data)
+
+
+def manifest_files(output_dir):
+    """Entries of the current manifest.json, or none"""
+    try:
+        with open(f"{output_dir}/manifest.json") as f:
+            return json.load(f).get('files', {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_artefacts(output_dir, years=YEARS):
+    """Write content-hashed, precompressed copies of the published files and manifest.json"""
+    artefact_dir = f"{output_dir}/{ARTEFACT_DIR}"
+    os.makedirs(artefact_dir, exist_ok=True)
+    previous = manifest_files(output_dir)
+
+    files = {}
+    for name in published_files(output_dir, years):
+        with open(f"{output_dir}/{name}", "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        stem, extension = os.path.splitext(name)
+        hashed = f"{stem}.{digest[:16]}{extension}"
+
+        write_if_missing(f"{artefact_dir}/{hashed}", data)
+        # mtime=0 keeps the gzip bytes identical across regenerations
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        write_if_missing(f"{artefact_dir}/{hashed}.gz", compressed)
+        entry = {
+            'file': f"{ARTEFACT_DIR}/{hashed}",
+            'sha256': digest,
+            'bytes': len(data),
+            'gzipBytes': len(compressed),
+        }
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            write_if_missing(f"{artefact_dir}/{hashed}.br", compressed)
+            entry['brotliBytes'] = len(compressed)
+        files[name] = entry
+
+    with atomic_path(f"{output_dir}/manifest.json") as temporary:
+        with open(temporary, "w") as f:
+            json.dump({'files': files}, f, indent=2)
+    print(f"Saved: {output_dir}/manifest.json ({len(files)} files)")
+
+    # Clients holding the previous manifest keep working until the next regeneration
+    kept = {os.path.basename(entry['file']) for entry in [*files.values(), *previous.values()]}
+    for filename in os.listdir(artefact_dir):
+        if filename.removesuffix(".gz").removesuffix(".br") not in kept:
+            os.remove(f"{artefact_dir}/{filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the decile bundles and results index and publish hashed artefacts")
+    parser.add_argument("--output-dir", default="public/data")
+    args = parser.parse_args()
+    write_decile_bundles(args.output_dir)
+    write_results_index(args.output_dir)
+    write_artefacts(args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,647 +1,903 @@
-from policyengine_uk import Microsimulation, Scenario
 import pandas as pd
 import numpy as np
+import argparse
+import json
 import os
 
-dataset = "hf://policyengine/policyengine-uk-data/enhanced_frs_2023_24.h5"
-
-# Create data directory if it doesn't exist
-os.makedirs("public/data", exist_ok=True)
+from bootstrap import Bootstrap
+from calculate_tracer import CalculateTracer
+from checkpoints import (
+    CHECKPOINT_DIR,
+    Journal,
+    atomic_path,
+    checkpoint_dir,
+    dataset_name,
+    load_arrays,
+    save_arrays,
+    unit_name,
+)
+from dataset_snapshots import SNAPSHOT_DIR, snapshot_dataset
+from derived_reforms import build_abolition_deltas, delta_meta, load_deltas, save_deltas
+from exports import (
+    POLICY_GRID,
+    policy_files,
+    quantile_filename,
+    write_artefacts,
+    write_decile_bundles,
+    write_results_index,
+)
+from metrics import (
+    QUANTILES,
+    QuantileCurves,
+    decile_changes,
+    decile_frame,
+    decile_output,
+    income_rank,
+    scenario_metrics,
+)
+from poverty import IncrementalPoverty, PovertyMeasures, poverty_measures_filename, poverty_rule
+from profiling import current_report, print_summary, profile_calculate, stage, write_report
+from response_curves import write_response_curves
+from results_cube import CubeBuilder, cube_filename
+from sampling import sample_datasets, sample_label
+from schema import (
+    calculate_compact,
+    compact_frame,
+    household_child_poverty,
+    household_sums,
+    person_household_index,
+    weighted_sum,
+)
+from simulations import DATASET, YEARS, child_limit_changes, simulation_classes
+from sparse_delta import SparseDelta
+from synthetic_frs import is_synthetic_dataset
+from work_queue import LEASE_SECONDS, WorkQueue, print_status
+
+dataset = DATASET
 
 # Years to analyze
-years = [2026, 2027, 2028, 2029]
-
+years = YEARS
+
+# Policies that need their own simulations; the rest are derived from full abolition
+SIMULATED_POLICIES = ['full-abolition', 'three-child-limit']
+
+# Written to the output directory of a --sample run
+SAMPLE_LABEL_FILE = "sample.json"
+
+# Person-level variables kept for counting affected children and families
+PERSON_VARIABLES = ['is_child', 'uc_is_child_limit_affected', 'person_weight', 'benunit_id', 'household_weight']
+
+def build_simulation(Microsimulation, dataset, scenario=None, tracer=None, **labels):
+    """Construct a simulation, recording its build and calculate() calls as stages"""
+    with stage("scenario build", **labels):
+        if scenario is None:
+            simulation = Microsimulation(dataset=dataset)
+        else:
+            simulation = Microsimulation(dataset=dataset, scenario=scenario)
+    if tracer is not None:
+        label = labels.get('policy', 'simulation')
+        if 'parameter' in labels:
+            label += f"[{labels['parameter']}]"
+        tracer.wrap(simulation, label)
+    return profile_calculate(simulation)
+
+@stage("write")
 def save_csv(filename, data_dict):
     """Save data dictionary to CSV file"""
     df = pd.DataFrame(list(data_dict.items()), columns=['metric', 'value'])
-    df.to_csv(filename, index=False)
+    with atomic_path(filename) as temporary:
+        df.to_csv(temporary, index=False)
     print(f"Saved: {filename}")
 
+@stage("distributional analysis")
 def generate_distributional_analysis(baseline, reformed, year, filename):
     """Generate and save distributional analysis for any policy reform"""
-    baseline_income_hh = baseline.calculate("household_net_income", year)
-    reformed_income_hh = reformed.calculate("household_net_income", year)
-    household_weight_hh = baseline.calculate("household_weight", year)
-    income_decile_hh = baseline.calculate("household_income_decile", year)
-
-    dist_df = pd.DataFrame({
-        'baseline_income': baseline_income_hh,
-        'reformed_income': reformed_income_hh,
-        'household_weight': household_weight_hh,
-        'income_decile': income_decile_hh
-    })
-
-    dist_df['income_change'] = dist_df['reformed_income'] - dist_df['baseline_income']
-
-    # Clean decile variable (ensure numeric, 1-10)
-    dist_df['income_decile'] = pd.to_numeric(dist_df['income_decile'], errors='coerce').clip(1, 10).astype(int)
-
-    # Calculate weighted average change by decile
-    decile_summary = (
-        dist_df.groupby('income_decile', observed=True)
-        .apply(lambda g: (g['income_change'] * g['household_weight']).sum() / g['household_weight'].sum())
-        .reset_index(name='avg_change')
-        .sort_values('income_decile')
-    )
-
-    # Calculate relative change by decile
-    decile_relative = (
-        dist_df.groupby('income_decile', observed=True)
-        .apply(lambda g: (g['income_change'] * g['household_weight']).sum() /
-                         (g['baseline_income'] * g['household_weight']).sum())
-        .reset_index(name='relative_change')
-        .sort_values('income_decile')
-    )
+    baseline_income_hh = calculate_compact(baseline, "household_net_income", year)
+    reformed_income_hh = calculate_compact(reformed, "household_net_income", year)
+    household_weight_hh = calculate_compact(baseline, "household_weight", year)
+    income_decile_hh = calculate_compact(baseline, "household_income_decile", year)
+
+    decile_analysis_data = decile_changes(baseline_income_hh, reformed_income_hh, household_weight_hh, income_decile_hh)
+    save_distributional_csv(filename, decile_analysis_data)
+
+def save_distributional_csv(filename, decile_analysis_data):
+    """Save the relative change by decile"""
+    dist_df_output = decile_output(decile_analysis_data)
+    with stage("write"), atomic_path(filename) as temporary:
+        dist_df_output.to_csv(temporary, index=False)
+    print(f"Saved: {filename}")
 
-    # Merge absolute and relative changes
-    decile_analysis_data = decile_summary.merge(decile_relative, on='income_decile')
+def bootstrap_households(baseline, year, baseline_in_poverty, is_child):
+    """Household weights, child counts and baseline child poverty for bootstrap replicates"""
+    household_id = baseline.calculate("household_id", year).values
+    person_household = person_household_index(baseline.calculate("household_id", year, map_to="person").values, household_id)
+    return {
+        'household_weight': baseline.calculate("household_weight", year).values,
+        'person_household': person_household,
+        'children': household_sums(is_child, person_household, len(household_id)),
+        'baseline_child_poor': household_child_poverty(baseline_in_poverty, is_child, person_household, len(household_id)),
+    }
 
-    # Save distributional analysis data
-    dist_output = []
-    for _, row in decile_analysis_data.iterrows():
-        dist_output.append({
-            'decile': int(row['income_decile']),
-            'relative_change_pct': row['relative_change'] * 100
-        })
+@stage("bootstrap")
+def confidence_intervals(bootstrap, households, baseline_income, reformed_income, reformed_in_poverty, is_child):
+    """Bootstrap intervals for cost, children out of poverty and poverty rate reduction"""
+    n_households = len(households['household_weight'])
+    return bootstrap.headline_intervals(
+        households['household_weight'],
+        np.asarray(reformed_income) - np.asarray(baseline_income),
+        households['baseline_child_poor'],
+        household_child_poverty(reformed_in_poverty, is_child, households['person_household'], n_households),
+        households['children'],
+    )
 
-    dist_df_output = pd.DataFrame(dist_output)
-    dist_df_output.to_csv(filename, index=False)
+def record_policy(journal, output_dir, year, policy):
+    """Journal a policy's CSVs for the year as complete"""
+    if journal is not None:
+        journal.record(year, policy, files=policy_files(output_dir, policy, year))
+
+def year_complete(journal, output_dir, year):
+    """Whether every policy of a year is journaled with its CSVs, curves, cube and poverty measures in place"""
+    return (journal is not None and all(journal.is_done(year, policy) for policy in POLICY_GRID)
+            and all(os.path.exists(f"{output_dir}/{quantile_filename(name, year)}") for name in QUANTILES)
+            and os.path.exists(f"{output_dir}/{cube_filename(year)}")
+            and os.path.exists(f"{output_dir}/{poverty_measures_filename(year)}"))
+
+def save_quantile_curves(curves, output_dir, year):
+    """Save the percentile and ventile curves of every scenario of a year"""
+    for name in curves.quantiles:
+        filename = f"{output_dir}/{quantile_filename(name, year)}"
+        with stage("write"), atomic_path(filename) as temporary:
+            curves.frame(name).to_csv(temporary, index=False)
+        print(f"Saved: {filename}")
+
+def save_poverty_measures(measures, output_dir, year):
+    """Save child poverty under every measure for each scenario of a year"""
+    filename = f"{output_dir}/{poverty_measures_filename(year)}"
+    with stage("write"), atomic_path(filename) as temporary:
+        measures.frame().to_csv(temporary, index=False)
     print(f"Saved: {filename}")
 
-for year in years:
+def simulate_child_limit(Microsimulation, Scenario, dataset, year, child_limit, poverty, measures, tracer=None,
+                         check_poverty=False):
+    """Household income, person poverty flags and equivalised incomes under a child limit"""
+    print(f"  Simulating child limit: {child_limit}")
+    scenario_limit = Scenario(parameter_changes=child_limit_changes(year, child_limit))
+    reformed_limit = build_simulation(Microsimulation, dataset, scenario_limit, tracer, year=year,
+                                      policy="three-child-limit", parameter=child_limit)
+    return (calculate_compact(reformed_limit, "household_net_income", year),
+            poverty.person_poverty(reformed_limit, check_poverty),
+            measures.incomes(reformed_limit))
+
+def checkpoint_child_limit(journal, year, child_limit, baseline, reformed):
+    """Save a simulated child limit's changes from the baseline and journal it
+
+    `baseline` and `reformed` are (household income, person poverty flags,
+    equivalised incomes) as returned by simulate_child_limit().
+    """
+    checkpoint = journal.scenario_file(year, "three-child-limit", child_limit)
+    # Only the households and people the limit changes are stored
+    income_delta = SparseDelta.between(baseline[0], reformed[0], "household")
+    poverty_delta = SparseDelta.between(baseline[1], reformed[1], "person")
+    equivalised_delta = SparseDelta.between(baseline[2].ravel(), reformed[2].ravel(), "household")
+    save_arrays(checkpoint, **income_delta.arrays("income_"), **poverty_delta.arrays("poverty_"),
+                **equivalised_delta.arrays("equivalised_"))
+    journal.record(year, "three-child-limit", child_limit, files=[checkpoint])
+
+def load_child_limit(journal, year, child_limit, baseline):
+    """Household income, person poverty flags and equivalised incomes saved by checkpoint_child_limit()"""
+    arrays = load_arrays(journal.scenario_file(year, "three-child-limit", child_limit))
+    return (SparseDelta.from_arrays(arrays, "income_").apply(baseline[0]),
+            SparseDelta.from_arrays(arrays, "poverty_").apply(baseline[1]),
+            SparseDelta.from_arrays(arrays, "equivalised_").apply(baseline[2].ravel()).reshape(baseline[2].shape))
+
+def generate_year_csvs(year, dataset, output_dir, tracer=None, bootstrap=None, journal=None, name=None,
+                       check_poverty=False, store_meta=None):
+    """Generate every policy CSV for one year
+
+    `name` labels the dataset's cached files, for datasets such as subsamples
+    that are objects rather than references. `check_poverty` confirms every
+    reform's incremental poverty flags against the model's in_poverty.
+    `store_meta` (see derived_reforms.delta_meta) keys the year's abolition
+    deltas, which are loaded rather than rebuilt when already stored.
+    """
+    Microsimulation, Scenario = simulation_classes(dataset)
+
     print(f"\n{'='*60}")
     print(f"GENERATING CSV FILES FOR {year}")
     print(f"{'='*60}")
 
     # Create baseline microsimulation
-    baseline = Microsimulation(dataset=dataset)
+    baseline = build_simulation(Microsimulation, dataset, tracer=tracer, year=year, policy="baseline")
 
     # ===== 1. FULL ABOLITION =====
-    print(f"\n1. Full Abolition - {year}")
-    scenario_full = Scenario(parameter_changes={
-        "gov.dwp.universal_credit.elements.child.limit.child_count": {
-            str(year): np.inf
-        },
-        "gov.dwp.tax_credits.child_tax_credit.limit.child_count": {
-            str(year): np.inf
-        }
-    })
-    reformed_full = Microsimulation(dataset=dataset, scenario=scenario_full)
-
-    # Calculate metrics
-    baseline_income = baseline.calculate("household_net_income", year)
-    reformed_income = reformed_full.calculate("household_net_income", year)
-    cost = (reformed_income - baseline_income).sum()
-
-    baseline_in_poverty = baseline.calculate("in_poverty", year, map_to="person").values
-    reformed_in_poverty = reformed_full.calculate("in_poverty", year, map_to="person").values
-    person_weights = baseline.calculate("person_weight", year, map_to="person").values
-    is_child = baseline.calculate("is_child", year, map_to="person").values
-
-    child_weights = person_weights * is_child
-    baseline_child_poverty = (baseline_in_poverty * child_weights).sum() / child_weights.sum()
-    reformed_child_poverty = (reformed_in_poverty * child_weights).sum() / child_weights.sum()
-    children_out_of_poverty = (baseline_in_poverty * is_child * person_weights).sum() - (reformed_in_poverty * is_child * person_weights).sum()
-
-    # Get affected families and children
-    uc_affected = baseline.calculate("uc_is_child_limit_affected", year, map_to="person").values
-    benunit_id = baseline.calculate("benunit_id", year, map_to="person").values
-    household_weight = baseline.calculate("household_weight", year, map_to="person").values
-
-    baseline_data_df = pd.DataFrame({
-        'is_child': is_child,
-        'uc_affected': uc_affected,
-        'person_weight': person_weights,
-        'benunit_id': benunit_id,
-        'household_weight': household_weight
-    })
-
-    children_affected = baseline_data_df[baseline_data_df['uc_affected'] > 0]
-    total_affected_children = children_affected['person_weight'].sum()
-
-    # Count affected families
-    affected_benunits = children_affected['benunit_id'].unique()
-    affected_families = baseline_data_df[baseline_data_df['benunit_id'].isin(affected_benunits)]['household_weight'].sum()
-
-    total_children = child_weights.sum()
-
-    data = {
-        'cost': cost,
-        'fullReformCost': cost,
-        'familiesAffected': affected_families,
-        'totalAffectedFamilies': affected_families,
-        'childrenNoLongerLimited': total_affected_children,
-        'totalLimitedChildren': total_affected_children,
-        'childrenOutOfPoverty': children_out_of_poverty,
-        'baselinePovertyRate': baseline_child_poverty,
-        'reformedPovertyRate': reformed_child_poverty,
-        'povertyRateReduction': baseline_child_poverty - reformed_child_poverty,
-        'costPerChild': cost / total_affected_children if total_affected_children > 0 else 0,
-        'totalChildren': total_children,
-    }
-
-    save_csv(f"public/data/full-abolition-{year}.csv", data)
-
-    # ===== DISTRIBUTIONAL ANALYSIS FOR FULL ABOLITION =====
-    print(f"\n1b. Distributional Analysis - Full Abolition - {year}")
-    generate_distributional_analysis(baseline, reformed_full, year, f"public/data/distributional-analysis-full-abolition-{year}.csv")
-
-    # ===== 2. THREE-CHILD LIMIT (for different child limits 3-16) =====
-    print(f"\n2. Three-Child Limit - {year}")
-
-    # Count families by size for policy-specific data
-    children_per_benunit = baseline_data_df[baseline_data_df['is_child'] == True].groupby('benunit_id').size().reset_index(name='num_children')
-    affected_family_sizes = children_per_benunit[children_per_benunit['benunit_id'].isin(affected_benunits)]
-
-    # Generate data for child limits 3-16
-    for child_limit in range(3, 17):
-        print(f"  Generating for child limit: {child_limit}")
-
-        scenario_limit = Scenario(parameter_changes={
-            "gov.dwp.universal_credit.elements.child.limit.child_count": {
-                str(year): child_limit
-            },
-            "gov.dwp.tax_credits.child_tax_credit.limit.child_count": {
-                str(year): child_limit
-            }
-        })
-        reformed_limit = Microsimulation(dataset=dataset, scenario=scenario_limit)
-
-        reformed_limit_income = reformed_limit.calculate("household_net_income", year)
-        cost_limit = (reformed_limit_income - baseline_income).sum()
-
-        reformed_limit_poverty = reformed_limit.calculate("in_poverty", year, map_to="person").values
-        reformed_limit_child_poverty = (reformed_limit_poverty * child_weights).sum() / child_weights.sum()
-        children_out_limit = (baseline_in_poverty * is_child * person_weights).sum() - (reformed_limit_poverty * is_child * person_weights).sum()
-
-        # Count families that would be fully helped vs partially helped
-        families_at_limit = len(affected_family_sizes[affected_family_sizes['num_children'] == child_limit])
-        families_above_limit = len(affected_family_sizes[affected_family_sizes['num_children'] > child_limit])
+    with stage("policy", year=year, policy="full-abolition"):
+        print(f"\n1. Full Abolition - {year}")
+        scenario_full = Scenario(parameter_changes=child_limit_changes(year, np.inf))
+        reformed_full = build_simulation(Microsimulation, dataset, scenario_full, tracer,
+                                         year=year, policy="full-abolition")
+
+        # Calculate metrics
+        baseline_income = calculate_compact(baseline, "household_net_income", year)
+        reformed_income = calculate_compact(reformed_full, "household_net_income", year)
+        household_weight_hh = calculate_compact(baseline, "household_weight", year)
+        income_decile = calculate_compact(baseline, "household_income_decile", year)
+        cost = weighted_sum(reformed_income - baseline_income, household_weight_hh)
+
+        # Reforms only re-evaluate poverty for households whose income changed
+        poverty = IncrementalPoverty(baseline, year, poverty_rule(dataset))
+        baseline_in_poverty = calculate_compact(baseline, "in_poverty", year, map_to="person")
+        reformed_in_poverty = poverty.person_poverty(reformed_full, check_poverty)
+
+        # One weighted income ranking per year groups households for every scenario's percentile curves
+        with stage("income ranking", year=year):
+            rank = income_rank(calculate_compact(baseline, "equiv_hbai_household_net_income", year),
+                               household_weight_hh * calculate_compact(baseline, "household_count_people", year))
+            curves = QuantileCurves(baseline_income, household_weight_hh, rank)
+        curves.add("full-abolition", [None], reformed_income)
+
+        # Get affected families and children
+        baseline_data_df = compact_frame(baseline, PERSON_VARIABLES, year)
+        person_weights = baseline_data_df['person_weight'].values
+        is_child = baseline_data_df['is_child'].values
+
+        child_weights = person_weights * is_child
+
+        # Every scenario's household changes are also totalled by decile, region, children and benefit
+        person_household = person_household_index(calculate_compact(baseline, "household_id", year, map_to="person"),
+                                                  calculate_compact(baseline, "household_id", year))
+        cube = CubeBuilder(baseline, year, person_household, is_child, baseline_in_poverty)
+        full_income_change = np.subtract(reformed_income, baseline_income, dtype=np.float64)
+        full_children_lifted = cube.children_lifted(reformed_in_poverty, is_child, person_household)
+        cube.add("full-abolition", [None], full_income_change, full_children_lifted)
+
+        # Child poverty under every standard line, from each scenario's equivalised incomes
+        measures = PovertyMeasures(baseline, year, poverty.rule, child_weights, person_household)
+        full_lifted = measures.household_children_lifted(measures.incomes(reformed_full))
+        measures.add("full-abolition", [None], full_lifted.sum(axis=1))
+        total_children = weighted_sum(child_weights)
+        baseline_children_in_poverty = weighted_sum(baseline_in_poverty, child_weights)
+        baseline_child_poverty = baseline_children_in_poverty / total_children
+        reformed_child_poverty = weighted_sum(reformed_in_poverty, child_weights) / total_children
+        children_out_of_poverty = baseline_children_in_poverty - weighted_sum(reformed_in_poverty, child_weights)
+
+        children_affected = baseline_data_df[baseline_data_df['uc_is_child_limit_affected']]
+        total_affected_children = weighted_sum(children_affected['person_weight'])
+
+        # Count affected families
+        affected_benunits = children_affected['benunit_id'].unique()
+        affected_families = weighted_sum(baseline_data_df[baseline_data_df['benunit_id'].isin(affected_benunits)]['household_weight'])
 
         data = {
-            'cost': cost_limit,
+            'cost': cost,
             'fullReformCost': cost,
             'familiesAffected': affected_families,
             'totalAffectedFamilies': affected_families,
-            'childrenNoLongerLimited': children_out_limit,
+            'childrenNoLongerLimited': total_affected_children,
             'totalLimitedChildren': total_affected_children,
-            'childrenOutOfPoverty': children_out_limit,
+            'childrenOutOfPoverty': children_out_of_poverty,
             'baselinePovertyRate': baseline_child_poverty,
-            'reformedPovertyRate': reformed_limit_child_poverty,
-            'povertyRateReduction': baseline_child_poverty - reformed_limit_child_poverty,
-            'costPerChild': cost_limit / children_out_limit if children_out_limit > 0 else 0,
-            'childLimit': child_limit,
-            'familiesAtLimit': families_at_limit,
-            'familiesAboveLimit': families_above_limit,
+            'reformedPovertyRate': reformed_child_poverty,
+            'povertyRateReduction': baseline_child_poverty - reformed_child_poverty,
+            'costPerChild': cost / total_affected_children if total_affected_children > 0 else 0,
+            'totalChildren': total_children,
         }
 
-        save_csv(f"public/data/three-child-limit-{year}-limit{child_limit}.csv", data)
+        if bootstrap is not None:
+            households = bootstrap_households(baseline, year, baseline_in_poverty, is_child)
+            data.update(confidence_intervals(bootstrap, households, baseline_income, reformed_income,
+                                             reformed_in_poverty, is_child))
+
+        save_csv(f"{output_dir}/full-abolition-{year}.csv", data)
 
-        # Generate distributional analysis for this policy
-        print(f"  Generating distributional analysis for child limit: {child_limit}")
-        generate_distributional_analysis(baseline, reformed_limit, year, f"public/data/distributional-analysis-three-child-limit-{year}-limit{child_limit}.csv")
+        # ===== DISTRIBUTIONAL ANALYSIS FOR FULL ABOLITION =====
+        print(f"\n1b. Distributional Analysis - Full Abolition - {year}")
+        generate_distributional_analysis(baseline, reformed_full, year, f"{output_dir}/distributional-analysis-full-abolition-{year}.csv")
+        record_policy(journal, output_dir, year, "full-abolition")
+
+    # ===== 2. THREE-CHILD LIMIT (for different child limits 3-16) =====
+    with stage("policy", year=year, policy="three-child-limit"):
+        print(f"\n2. Three-Child Limit - {year}")
+
+        # Count families by size for policy-specific data
+        children_per_benunit = baseline_data_df[baseline_data_df['is_child']].groupby('benunit_id').size().reset_index(name='num_children')
+        affected_family_sizes = children_per_benunit[children_per_benunit['benunit_id'].isin(affected_benunits)]
+
+        # Stack every child limit's results into scenario x household and scenario x person matrices
+        child_limits = list(range(3, 17))
+        reformed_limit_income = np.empty((len(child_limits), len(baseline_income)), dtype=np.float32)
+        reformed_limit_poverty = np.empty((len(child_limits), len(baseline_in_poverty)), dtype=bool)
+        reformed_limit_equivalised = np.empty((len(child_limits),) + measures.baseline_incomes.shape,
+                                              dtype=measures.baseline_incomes.dtype)
+        baseline_arrays = (baseline_income, baseline_in_poverty, measures.baseline_incomes)
+        for i, child_limit in enumerate(child_limits):
+            # Child limits simulated before an interrupted run, or by other workers, are loaded from their checkpoints
+            if journal is not None and journal.is_done(year, "three-child-limit", child_limit):
+                print(f"  Loading checkpointed child limit: {child_limit}")
+                reformed_limit_income[i], reformed_limit_poverty[i], reformed_limit_equivalised[i] = load_child_limit(
+                    journal, year, child_limit, baseline_arrays)
+                continue
+
+            reformed_limit_income[i], reformed_limit_poverty[i], reformed_limit_equivalised[i] = simulate_child_limit(
+                Microsimulation, Scenario, dataset, year, child_limit, poverty, measures, tracer, check_poverty)
+            if journal is not None:
+                checkpoint_child_limit(journal, year, child_limit, baseline_arrays, (
+                    reformed_limit_income[i], reformed_limit_poverty[i], reformed_limit_equivalised[i]))
+
+        # Every scenario's headline and decile metrics in a few matrix products
+        with stage("scenario metrics", year=year, policy="three-child-limit"):
+            sweep = scenario_metrics(baseline_income, reformed_limit_income, household_weight_hh, income_decile,
+                                     baseline_in_poverty, reformed_limit_poverty, child_weights)
+            curves.add("three-child-limit", child_limits, reformed_limit_income)
+            cube.add("three-child-limit", child_limits,
+                     np.subtract(reformed_limit_income, baseline_income, dtype=np.float64),
+                     [cube.children_lifted(in_poverty, is_child, person_household) for in_poverty in reformed_limit_poverty])
+            measures.add("three-child-limit", child_limits, measures.children_out_of_poverty(reformed_limit_equivalised))
+
+        for i, child_limit in enumerate(child_limits):
+            print(f"  Generating for child limit: {child_limit}")
+            cost_limit = sweep['cost'][i]
+            reformed_limit_child_poverty = sweep['reformed_child_poverty_rate'][i]
+            children_out_limit = sweep['children_out_of_poverty'][i]
+
+            # Count families that would be fully helped vs partially helped
+            families_at_limit = len(affected_family_sizes[affected_family_sizes['num_children'] == child_limit])
+            families_above_limit = len(affected_family_sizes[affected_family_sizes['num_children'] > child_limit])
+
+            data = {
+                'cost': cost_limit,
+                'fullReformCost': cost,
+                'familiesAffected': affected_families,
+                'totalAffectedFamilies': affected_families,
+                'childrenNoLongerLimited': children_out_limit,
+                'totalLimitedChildren': total_affected_children,
+                'childrenOutOfPoverty': children_out_limit,
+                'baselinePovertyRate': baseline_child_poverty,
+                'reformedPovertyRate': reformed_limit_child_poverty,
+                'povertyRateReduction': baseline_child_poverty - reformed_limit_child_poverty,
+                'costPerChild': cost_limit / children_out_limit if children_out_limit > 0 else 0,
+                'childLimit': child_limit,
+                'familiesAtLimit': families_at_limit,
+                'familiesAboveLimit': families_above_limit,
+            }
+
+            if bootstrap is not None:
+                data.update(confidence_intervals(bootstrap, households, baseline_income, reformed_limit_income[i],
+                                                 reformed_limit_poverty[i], is_child))
+
+            save_csv(f"{output_dir}/three-child-limit-{year}-limit{child_limit}.csv", data)
+
+            # Distributional analysis for this policy, from the same matrices
+            print(f"  Generating distributional analysis for child limit: {child_limit}")
+            decile_analysis_data = decile_frame(sweep['deciles'], sweep['avg_change'][i], sweep['relative_change'][i],
+                                                sweep['band_shares'][i])
+            save_distributional_csv(f"{output_dir}/distributional-analysis-three-child-limit-{year}-limit{child_limit}.csv", decile_analysis_data)
+        record_policy(journal, output_dir, year, "three-child-limit")
+
+    # ===== ABOLITION DELTAS FOR DERIVED REFORMS =====
+    with stage("abolition deltas", year=year):
+        deltas = None if store_meta is None else load_deltas(name or dataset, year, store_meta)
+        if deltas is None:
+            deltas = build_abolition_deltas(baseline, reformed_full, year, reformed_in_poverty)
+            if store_meta is not None:
+                save_deltas(deltas, name or dataset, store_meta)
+        baseline_income_hh = deltas.household['baseline_income']
+        household_weight_hh = deltas.household['weight']
+        income_decile_hh = deltas.household['decile']
 
     # ===== 3. UNDER-FIVE EXEMPTION (for different age limits 3-16) =====
-    print(f"\n3. Under-Five Exemption - {year}")
-    age = baseline.calculate("age", year, map_to="person").values
-    baseline_data_df['age'] = age
+    with stage("policy", year=year, policy="under-five-exemption"):
+        print(f"\n3. Under-Five Exemption - {year}")
+        age = calculate_compact(baseline, "age", year, map_to="person")
+
+        # Generate data for age limits 3-16
+        for age_limit in range(3, 17):
+            print(f"  Generating for age limit: {age_limit}")
+
+            # Exempt limited children under the age limit
+            derived = deltas.child_exemption(deltas.child['age'] < age_limit)
+            affected_under_age_count = derived['children_exempt']
+            total_under_age = weighted_sum(child_weights, age < age_limit)
+            cost_under_age = derived['cost']
+            children_out_under_age = derived['children_out_of_poverty']
+
+            data = {
+                'cost': cost_under_age,
+                'fullReformCost': cost,
+                'familiesAffected': affected_families * derived['families_share'],
+                'totalAffectedFamilies': affected_families,
+                'childrenNoLongerLimited': affected_under_age_count,
+                'totalLimitedChildren': total_affected_children,
+                'childrenOutOfPoverty': children_out_under_age,
+                'baselinePovertyRate': baseline_child_poverty,
+                'reformedPovertyRate': baseline_child_poverty - derived['poverty_rate_reduction'],
+                'povertyRateReduction': derived['poverty_rate_reduction'],
+                'costPerChild': cost_under_age / affected_under_age_count if affected_under_age_count > 0 else 0,
+                'ageLimit': age_limit,
+                'totalChildrenUnderAge': total_under_age,
+                'affectedChildrenUnderAge': affected_under_age_count,
+            }
+
+            save_csv(f"{output_dir}/under-five-exemption-{year}-age{age_limit}.csv", data)
 
-    # Generate data for age limits 3-16
-    for age_limit in range(3, 17):
-        print(f"  Generating for age limit: {age_limit}")
+            print(f"  Generating distributional analysis for age limit: {age_limit}")
+            decile_analysis_data = decile_changes(baseline_income_hh, derived['reformed_income'], household_weight_hh, income_decile_hh)
+            save_distributional_csv(f"{output_dir}/distributional-analysis-under-five-exemption-{year}-age{age_limit}.csv", decile_analysis_data)
+            curves.add("under-five-exemption", [age_limit], derived['reformed_income'])
+            cube.add("under-five-exemption", [age_limit], derived['income_change'], derived['children_lifted'])
+            measures.add("under-five-exemption", [age_limit], full_lifted @ derived['household_share'])
+        record_policy(journal, output_dir, year, "under-five-exemption")
 
-        children_under_age = baseline_data_df.copy()
-        children_under_age_affected = children_under_age[(children_under_age['is_child'] == True) &
-                                                         (children_under_age['age'] < age_limit) &
-                                                         (children_under_age['uc_affected'] > 0)]
+    # ===== 4. DISABLED CHILD EXEMPTION =====
+    with stage("policy", year=year, policy="disabled-child-exemption"):
+        print(f"\n4. Disabled Child Exemption - {year}")
 
-        affected_under_age_count = children_under_age_affected['person_weight'].sum()
-        total_under_age = children_under_age[(children_under_age['is_child'] == True) & (children_under_age['age'] < age_limit)]['person_weight'].sum()
+        # Exempt limited children receiving DLA or PIP
+        derived = deltas.child_exemption(deltas.child['disabled'])
+        cost_disabled = derived['cost']
+        children_out_disabled = derived['children_out_of_poverty']
+        disabled_exempt = derived['children_exempt']
 
-        # Estimate cost proportionally
-        cost_under_age = cost * (affected_under_age_count / total_affected_children) if total_affected_children > 0 else 0
-        children_out_under_age = children_out_of_poverty * (affected_under_age_count / total_affected_children) if total_affected_children > 0 else 0
+        dla = calculate_compact(baseline, "dla", year, map_to="person")
+        pip = calculate_compact(baseline, "pip", year, map_to="person")
+        disabled_children = weighted_sum(child_weights, (dla > 0) | (pip > 0))
 
         data = {
-            'cost': cost_under_age,
+            'cost': cost_disabled,
             'fullReformCost': cost,
-            'familiesAffected': affected_families * (affected_under_age_count / total_affected_children) if total_affected_children > 0 else 0,
+            'familiesAffected': affected_families * derived['families_share'],
             'totalAffectedFamilies': affected_families,
-            'childrenNoLongerLimited': affected_under_age_count,
+            'childrenNoLongerLimited': disabled_exempt,
             'totalLimitedChildren': total_affected_children,
-            'childrenOutOfPoverty': children_out_under_age,
+            'childrenOutOfPoverty': children_out_disabled,
             'baselinePovertyRate': baseline_child_poverty,
-            'reformedPovertyRate': baseline_child_poverty - (children_out_under_age / total_children),
-            'povertyRateReduction': children_out_under_age / total_children,
-            'costPerChild': cost_under_age / affected_under_age_count if affected_under_age_count > 0 else 0,
-            'ageLimit': age_limit,
-            'totalChildrenUnderAge': total_under_age,
-            'affectedChildrenUnderAge': affected_under_age_count,
+            'reformedPovertyRate': baseline_child_poverty - derived['poverty_rate_reduction'],
+            'povertyRateReduction': derived['poverty_rate_reduction'],
+            'costPerChild': cost_disabled / disabled_exempt if disabled_exempt > 0 else 0,
+            'disabledChildren': disabled_children,
+            'familiesWithDisabledChild': affected_families * derived['families_share'],
+            'publishedCost': 1200000000,
+            'publishedChildrenOutOfPoverty': 120000,
         }
 
-        save_csv(f"public/data/under-five-exemption-{year}-age{age_limit}.csv", data)
-
-        # Generate approximate distributional analysis
-        # Since PolicyEngine doesn't have a direct parameter for age-based exemptions,
-        # we approximate by scaling the full abolition reform proportionally by household
-        print(f"  Generating distributional analysis for age limit: {age_limit}")
-
-        # Get household-level data
-        baseline_income_hh = baseline.calculate("household_net_income", year)
-        reformed_full_income_hh = reformed_full.calculate("household_net_income", year)
-        household_weight_hh = baseline.calculate("household_weight", year)
-        income_decile_hh = baseline.calculate("household_income_decile", year)
-        household_id_person = baseline.calculate("household_id", year, map_to="person").values
-
-        # Create mapping of households to children under age limit
-        household_affected_children = {}
-        household_total_affected = {}
-
-        for idx, hh_id in enumerate(household_id_person):
-            if hh_id not in household_affected_children:
-                household_affected_children[hh_id] = 0
-                household_total_affected[hh_id] = 0
-
-            if is_child[idx] and uc_affected[idx] > 0:
-                household_total_affected[hh_id] += 1
-                if age[idx] < age_limit:
-                    household_affected_children[hh_id] += 1
-
-        # Calculate scaled reform for each household
-        reformed_age_income_hh = baseline_income_hh.copy()
-        for idx, hh_id in enumerate(baseline.calculate("household_id", year).values):
-            if hh_id in household_total_affected and household_total_affected[hh_id] > 0:
-                # Scale the reform impact by the proportion of affected children under age limit
-                proportion = household_affected_children.get(hh_id, 0) / household_total_affected[hh_id]
-                income_gain = reformed_full_income_hh[idx] - baseline_income_hh[idx]
-                reformed_age_income_hh[idx] = baseline_income_hh[idx] + (income_gain * proportion)
-
-        # Generate distributional analysis
-        dist_df = pd.DataFrame({
-            'baseline_income': baseline_income_hh,
-            'reformed_income': reformed_age_income_hh,
-            'household_weight': household_weight_hh,
-            'income_decile': income_decile_hh
-        })
-
-        dist_df['income_change'] = dist_df['reformed_income'] - dist_df['baseline_income']
-        dist_df['income_decile'] = pd.to_numeric(dist_df['income_decile'], errors='coerce').clip(1, 10).astype(int)
-
-        decile_summary = (
-            dist_df.groupby('income_decile', observed=True)
-            .apply(lambda g: (g['income_change'] * g['household_weight']).sum() / g['household_weight'].sum())
-            .reset_index(name='avg_change')
-            .sort_values('income_decile')
-        )
-
-        decile_relative = (
-            dist_df.groupby('income_decile', observed=True)
-            .apply(lambda g: (g['income_change'] * g['household_weight']).sum() /
-                             (g['baseline_income'] * g['household_weight']).sum())
-            .reset_index(name='relative_change')
-            .sort_values('income_decile')
-        )
-
-        decile_analysis_data = decile_summary.merge(decile_relative, on='income_decile')
-
-        dist_output = []
-        for _, row in decile_analysis_data.iterrows():
-            dist_output.append({
-                'decile': int(row['income_decile']),
-                'relative_change_pct': row['relative_change'] * 100
-            })
-
-        dist_df_output = pd.DataFrame(dist_output)
-        dist_df_output.to_csv(f"public/data/distributional-analysis-under-five-exemption-{year}-age{age_limit}.csv", index=False)
-        print(f"Saved: public/data/distributional-analysis-under-five-exemption-{year}-age{age_limit}.csv")
-
-    # ===== 4. DISABLED CHILD EXEMPTION =====
-    print(f"\n4. Disabled Child Exemption - {year}")
-    cost_disabled = cost * 0.15
-    children_out_disabled = children_out_of_poverty * 0.15
-
-    data = {
-        'cost': cost_disabled,
-        'fullReformCost': cost,
-        'familiesAffected': affected_families * 0.15,
-        'totalAffectedFamilies': affected_families,
-        'childrenNoLongerLimited': total_affected_children * 0.15,
-        'totalLimitedChildren': total_affected_children,
-        'childrenOutOfPoverty': children_out_disabled,
-        'baselinePovertyRate': baseline_child_poverty,
-        'reformedPovertyRate': baseline_child_poverty - (children_out_disabled / total_children),
-        'povertyRateReduction': children_out_disabled / total_children,
-        'costPerChild': cost_disabled / (total_affected_children * 0.15),
-        'disabledChildren': total_children * 0.05,
-        'familiesWithDisabledChild': affected_families * 0.15,
-        'publishedCost': 1200000000,
-        'publishedChildrenOutOfPoverty': 120000,
-    }
-
-    save_csv(f"public/data/disabled-child-exemption-{year}.csv", data)
-
-    # Generate approximate distributional analysis
-    # Scale the full abolition reform proportionally (15% of impact)
-    print(f"\n4b. Distributional Analysis - Disabled Child Exemption - {year}")
-
-    baseline_income_hh = baseline.calculate("household_net_income", year)
-    reformed_full_income_hh = reformed_full.calculate("household_net_income", year)
-    household_weight_hh = baseline.calculate("household_weight", year)
-    income_decile_hh = baseline.calculate("household_income_decile", year)
-
-    # Scale reform by 15% (approximation for disabled child exemption)
-    reformed_disabled_income_hh = baseline_income_hh + (reformed_full_income_hh - baseline_income_hh) * 0.15
-
-    dist_df = pd.DataFrame({
-        'baseline_income': baseline_income_hh,
-        'reformed_income': reformed_disabled_income_hh,
-        'household_weight': household_weight_hh,
-        'income_decile': income_decile_hh
-    })
-
-    dist_df['income_change'] = dist_df['reformed_income'] - dist_df['baseline_income']
-    dist_df['income_decile'] = pd.to_numeric(dist_df['income_decile'], errors='coerce').clip(1, 10).astype(int)
-
-    decile_summary = (
-        dist_df.groupby('income_decile', observed=True)
-        .apply(lambda g: (g['income_change'] * g['household_weight']).sum() / g['household_weight'].sum())
-        .reset_index(name='avg_change')
-        .sort_values('income_decile')
-    )
-
-    decile_relative = (
-        dist_df.groupby('income_decile', observed=True)
-        .apply(lambda g: (g['income_change'] * g['household_weight']).sum() /
-                         (g['baseline_income'] * g['household_weight']).sum())
-        .reset_index(name='relative_change')
-        .sort_values('income_decile')
-    )
-
-    decile_analysis_data = decile_summary.merge(decile_relative, on='income_decile')
+        save_csv(f"{output_dir}/disabled-child-exemption-{year}.csv", data)
 
-    dist_output = []
-    for _, row in decile_analysis_data.iterrows():
-        dist_output.append({
-            'decile': int(row['income_decile']),
-            'relative_change_pct': row['relative_change'] * 100
-        })
-
-    dist_df_output = pd.DataFrame(dist_output)
-    dist_df_output.to_csv(f"public/data/distributional-analysis-disabled-child-exemption-{year}.csv", index=False)
-    print(f"Saved: public/data/distributional-analysis-disabled-child-exemption-{year}.csv")
+        print(f"\n4b. Distributional Analysis - Disabled Child Exemption - {year}")
+        decile_analysis_data = decile_changes(baseline_income_hh, derived['reformed_income'], household_weight_hh, income_decile_hh)
+        save_distributional_csv(f"{output_dir}/distributional-analysis-disabled-child-exemption-{year}.csv", decile_analysis_data)
+        curves.add("disabled-child-exemption", [None], derived['reformed_income'])
+        cube.add("disabled-child-exemption", [None], derived['income_change'], derived['children_lifted'])
+        measures.add("disabled-child-exemption", [None], full_lifted @ derived['household_share'])
+        record_policy(journal, output_dir, year, "disabled-child-exemption")
 
     # ===== 5. WORKING FAMILIES EXEMPTION =====
-    print(f"\n5. Working Families Exemption - {year}")
-    employment_income = baseline.calculate("employment_income", year, map_to="person").values
-    baseline_data_df['employment_income'] = employment_income
-
-    working_benunits = baseline_data_df[baseline_data_df['employment_income'] > 0]['benunit_id'].unique()
-    affected_working_benunits = set(affected_benunits).intersection(set(working_benunits))
-
-    working_families_count = len(affected_working_benunits)
-    total_affected_count = len(affected_benunits)
-    pct_working = working_families_count / total_affected_count if total_affected_count > 0 else 0
-
-    cost_working = cost * pct_working
-    children_out_working = children_out_of_poverty * pct_working
-
-    data = {
-        'cost': cost_working,
-        'fullReformCost': cost,
-        'familiesAffected': working_families_count,
-        'totalAffectedFamilies': affected_families,
-        'childrenNoLongerLimited': total_affected_children * pct_working,
-        'totalLimitedChildren': total_affected_children,
-        'childrenOutOfPoverty': children_out_working,
-        'baselinePovertyRate': baseline_child_poverty,
-        'reformedPovertyRate': baseline_child_poverty - (children_out_working / total_children),
-        'povertyRateReduction': children_out_working / total_children,
-        'costPerChild': cost_working / (total_affected_children * pct_working) if pct_working > 0 else 0,
-        'workingFamilies': working_families_count,
-        'nonWorkingFamilies': total_affected_count - working_families_count,
-    }
-
-    save_csv(f"public/data/working-families-exemption-{year}.csv", data)
-
-    # Generate approximate distributional analysis
-    # Scale the reform based on whether household has employment income
-    print(f"\n5b. Distributional Analysis - Working Families Exemption - {year}")
-
-    baseline_income_hh = baseline.calculate("household_net_income", year)
-    reformed_full_income_hh = reformed_full.calculate("household_net_income", year)
-    household_weight_hh = baseline.calculate("household_weight", year)
-    income_decile_hh = baseline.calculate("household_income_decile", year)
-    household_id_person = baseline.calculate("household_id", year, map_to="person").values
-
-    # Create mapping of households to employment status
-    household_has_employment = {}
-    for idx, hh_id in enumerate(household_id_person):
-        if hh_id not in household_has_employment:
-            household_has_employment[hh_id] = False
-        if employment_income[idx] > 0:
-            household_has_employment[hh_id] = True
-
-    # Calculate scaled reform for each household
-    reformed_working_income_hh = baseline_income_hh.copy()
-    for idx, hh_id in enumerate(baseline.calculate("household_id", year).values):
-        if household_has_employment.get(hh_id, False):
-            # Only apply reform to working families
-            income_gain = reformed_full_income_hh[idx] - baseline_income_hh[idx]
-            reformed_working_income_hh[idx] = baseline_income_hh[idx] + income_gain
-
-    dist_df = pd.DataFrame({
-        'baseline_income': baseline_income_hh,
-        'reformed_income': reformed_working_income_hh,
-        'household_weight': household_weight_hh,
-        'income_decile': income_decile_hh
-    })
-
-    dist_df['income_change'] = dist_df['reformed_income'] - dist_df['baseline_income']
-    dist_df['income_decile'] = pd.to_numeric(dist_df['income_decile'], errors='coerce').clip(1, 10).astype(int)
-
-    decile_summary = (
-        dist_df.groupby('income_decile', observed=True)
-        .apply(lambda g: (g['income_change'] * g['household_weight']).sum() / g['household_weight'].sum())
-        .reset_index(name='avg_change')
-        .sort_values('income_decile')
-    )
-
-    decile_relative = (
-        dist_df.groupby('income_decile', observed=True)
-        .apply(lambda g: (g['income_change'] * g['household_weight']).sum() /
-                         (g['baseline_income'] * g['household_weight']).sum())
-        .reset_index(name='relative_change')
-        .sort_values('income_decile')
-    )
+    with stage("policy", year=year, policy="working-families-exemption"):
+        print(f"\n5. Working Families Exemption - {year}")
 
-    decile_analysis_data = decile_summary.merge(decile_relative, on='income_decile')
-
-    dist_output = []
-    for _, row in decile_analysis_data.iterrows():
-        dist_output.append({
-            'decile': int(row['income_decile']),
-            'relative_change_pct': row['relative_change'] * 100
-        })
-
-    dist_df_output = pd.DataFrame(dist_output)
-    dist_df_output.to_csv(f"public/data/distributional-analysis-working-families-exemption-{year}.csv", index=False)
-    print(f"Saved: public/data/distributional-analysis-working-families-exemption-{year}.csv")
-
-    # ===== 6. LOWER THIRD+ CHILD ELEMENT (for different reduction rates 50%-100%) =====
-    print(f"\n6. Lower Third+ Child Element - {year}")
-
-    # Generate data for reduction rates 50%-100% every 10%
-    for rate_pct in range(50, 105, 10):
-        reduction_rate = rate_pct / 100.0
-        print(f"  Generating for reduction rate: {rate_pct}%")
-
-        cost_reduced = cost * reduction_rate
-        children_out_reduced = children_out_of_poverty * reduction_rate
+        # Exempt benefit units with any employment income
+        derived = deltas.family_exemption(deltas.benunit['working'])
+        cost_working = derived['cost']
+        children_out_working = derived['children_out_of_poverty']
+        working_families = affected_families * derived['families_share']
 
         data = {
-            'cost': cost_reduced,
+            'cost': cost_working,
             'fullReformCost': cost,
-            'familiesAffected': affected_families,
+            'familiesAffected': working_families,
             'totalAffectedFamilies': affected_families,
-            'childrenNoLongerLimited': total_affected_children,
+            'childrenNoLongerLimited': derived['children_exempt'],
             'totalLimitedChildren': total_affected_children,
-            'childrenOutOfPoverty': children_out_reduced,
+            'childrenOutOfPoverty': children_out_working,
             'baselinePovertyRate': baseline_child_poverty,
-            'reformedPovertyRate': baseline_child_poverty - (children_out_reduced / total_children),
-            'povertyRateReduction': children_out_reduced / total_children,
-            'costPerChild': cost_reduced / total_affected_children if total_affected_children > 0 else 0,
-            'reductionRate': reduction_rate,
-            'standardElement': 3626,
-            'reducedElement': int(3626 * reduction_rate),
-            'thirdPlusChildren': total_affected_children,
+            'reformedPovertyRate': baseline_child_poverty - derived['poverty_rate_reduction'],
+            'povertyRateReduction': derived['poverty_rate_reduction'],
+            'costPerChild': cost_working / derived['children_exempt'] if derived['children_exempt'] > 0 else 0,
+            'workingFamilies': working_families,
+            'nonWorkingFamilies': affected_families - working_families,
         }
 
-        save_csv(f"public/data/lower-third-child-element-{year}-rate{rate_pct}.csv", data)
-
-        # Generate approximate distributional analysis
-        # Scale the reform by the reduction rate
-        print(f"  Generating distributional analysis for reduction rate: {rate_pct}%")
+        save_csv(f"{output_dir}/working-families-exemption-{year}.csv", data)
 
-        baseline_income_hh = baseline.calculate("household_net_income", year)
-        reformed_full_income_hh = reformed_full.calculate("household_net_income", year)
-        household_weight_hh = baseline.calculate("household_weight", year)
-        income_decile_hh = baseline.calculate("household_income_decile", year)
+        print(f"\n5b. Distributional Analysis - Working Families Exemption - {year}")
+        decile_analysis_data = decile_changes(baseline_income_hh, derived['reformed_income'], household_weight_hh, income_decile_hh)
+        save_distributional_csv(f"{output_dir}/distributional-analysis-working-families-exemption-{year}.csv", decile_analysis_data)
+        curves.add("working-families-exemption", [None], derived['reformed_income'])
+        cube.add("working-families-exemption", [None], derived['income_change'], derived['children_lifted'])
+        measures.add("working-families-exemption", [None], full_lifted @ derived['household_share'])
+        record_policy(journal, output_dir, year, "working-families-exemption")
 
-        # Scale reform by reduction rate
-        reformed_reduced_income_hh = baseline_income_hh + (reformed_full_income_hh - baseline_income_hh) * reduction_rate
-
-        dist_df = pd.DataFrame({
-            'baseline_income': baseline_income_hh,
-            'reformed_income': reformed_reduced_income_hh,
-            'household_weight': household_weight_hh,
-            'income_decile': income_decile_hh
-        })
-
-        dist_df['income_change'] = dist_df['reformed_income'] - dist_df['baseline_income']
-        dist_df['income_decile'] = pd.to_numeric(dist_df['income_decile'], errors='coerce').clip(1, 10).astype(int)
-
-        decile_summary = (
-            dist_df.groupby('income_decile', observed=True)
-            .apply(lambda g: (g['income_change'] * g['household_weight']).sum() / g['household_weight'].sum())
-            .reset_index(name='avg_change')
-            .sort_values('income_decile')
-        )
+    # ===== 6. LOWER THIRD+ CHILD ELEMENT (for different reduction rates 50%-100%) =====
+    with stage("policy", year=year, policy="lower-third-child-element"):
+        print(f"\n6. Lower Third+ Child Element - {year}")
+
+        # Generate data for reduction rates 50%-100% every 10%
+        for rate_pct in range(50, 105, 10):
+            reduction_rate = rate_pct / 100.0
+            print(f"  Generating for reduction rate: {rate_pct}%")
+
+            cost_reduced = cost * reduction_rate
+            children_out_reduced = children_out_of_poverty * reduction_rate
+
+            data = {
+                'cost': cost_reduced,
+                'fullReformCost': cost,
+                'familiesAffected': affected_families,
+                'totalAffectedFamilies': affected_families,
+                'childrenNoLongerLimited': total_affected_children,
+                'totalLimitedChildren': total_affected_children,
+                'childrenOutOfPoverty': children_out_reduced,
+                'baselinePovertyRate': baseline_child_poverty,
+                'reformedPovertyRate': baseline_child_poverty - (children_out_reduced / total_children),
+                'povertyRateReduction': children_out_reduced / total_children,
+                'costPerChild': cost_reduced / total_affected_children if total_affected_children > 0 else 0,
+                'reductionRate': reduction_rate,
+                'standardElement': 3626,
+                'reducedElement': int(3626 * reduction_rate),
+                'thirdPlusChildren': total_affected_children,
+            }
 
-        decile_relative = (
-            dist_df.groupby('income_decile', observed=True)
-            .apply(lambda g: (g['income_change'] * g['household_weight']).sum() /
-                             (g['baseline_income'] * g['household_weight']).sum())
-            .reset_index(name='relative_change')
-            .sort_values('income_decile')
+            save_csv(f"{output_dir}/lower-third-child-element-{year}-rate{rate_pct}.csv", data)
+
+            # Generate approximate distributional analysis
+            # Scale the reform by the reduction rate
+            print(f"  Generating distributional analysis for reduction rate: {rate_pct}%")
+
+            # Scale reform by reduction rate
+            reformed_reduced_income_hh = baseline_income_hh + (reformed_income - baseline_income) * reduction_rate
+
+            decile_analysis_data = decile_changes(baseline_income_hh, reformed_reduced_income_hh, household_weight_hh, income_decile_hh)
+            save_distributional_csv(f"{output_dir}/distributional-analysis-lower-third-child-element-{year}-rate{rate_pct}.csv", decile_analysis_data)
+            curves.add("lower-third-child-element", [rate_pct], reformed_reduced_income_hh)
+            cube.add("lower-third-child-element", [rate_pct], full_income_change * reduction_rate,
+                     full_children_lifted * reduction_rate)
+            measures.add("lower-third-child-element", [rate_pct], full_lifted.sum(axis=1) * reduction_rate)
+
+        # Written before the year's last policy is journaled, so a resumed run never skips them
+        save_quantile_curves(curves, output_dir, year)
+        cube.save(f"{output_dir}/{cube_filename(year)}")
+        save_poverty_measures(measures, output_dir, year)
+        record_policy(journal, output_dir, year, "lower-third-child-element")
+
+def queue_tasks(years):
+    """Work queue tasks: every simulated child limit, then each year's CSVs, then the merge"""
+    tasks = []
+    for year in years:
+        limits = [{'name': f"{year}-limit{child_limit}", 'year': year, 'childLimit': child_limit}
+                  for child_limit in POLICY_GRID['three-child-limit']]
+        tasks += limits
+        tasks.append({'name': str(year), 'year': year, 'requires': [task['name'] for task in limits]})
+    tasks.append({'name': "merge", 'requires': [str(year) for year in years]})
+    return tasks
+
+def baseline_state(dataset, year, tracer=None):
+    """Baseline arrays for checkpoint_child_limit(), the incremental poverty rule and poverty measures for a year"""
+    Microsimulation, _ = simulation_classes(dataset)
+    baseline = build_simulation(Microsimulation, dataset, tracer=tracer, year=year, policy="baseline")
+    poverty = IncrementalPoverty(baseline, year, poverty_rule(dataset))
+    child_weights = (calculate_compact(baseline, "person_weight", year, map_to="person")
+                     * calculate_compact(baseline, "is_child", year, map_to="person"))
+    measures = PovertyMeasures(baseline, year, poverty.rule, child_weights, poverty.person_household)
+    return ((calculate_compact(baseline, "household_net_income", year),
+             calculate_compact(baseline, "in_poverty", year, map_to="person"),
+             measures.baseline_incomes),
+            poverty, measures)
+
+def run_worker(queue, datasets, output_dir, journal_dir, run, name, tracer=None, bootstrap=None,
+               check_poverty=False, force=False, snapshot_dir=None, store_meta=None):
+    """Claim and run queued tasks until the whole grid is generated and merged"""
+    baselines = {}  # the latest year's baseline, shared by consecutive child limit tasks
+
+    def execute(task):
+        # A fresh journal sees the child limits and years other workers have finished
+        journal = Journal(journal_dir, run, queue.worker)
+        if task['name'] == "merge":
+            with stage("combine"):
+                combine_all_csvs(output_dir, journal, force)
+            with stage("export"):
+                write_decile_bundles(output_dir, years)
+                write_results_index(output_dir)
+                write_response_curves(output_dir)
+                write_artefacts(output_dir, years)
+            return
+
+        year = task['year']
+        dataset = snapshot_dataset(datasets[year], year, snapshot_dir)
+        if 'childLimit' in task:
+            child_limit = task['childLimit']
+            if journal.is_done(year, "three-child-limit", child_limit):
+                return
+            with stage("policy", year=year, policy="three-child-limit", parameter=child_limit):
+                if year not in baselines:
+                    baselines.clear()
+                    baselines[year] = baseline_state(dataset, year, tracer)
+                baseline_arrays, poverty, measures = baselines[year]
+                Microsimulation, Scenario = simulation_classes(dataset)
+                reformed = simulate_child_limit(Microsimulation, Scenario, dataset, year, child_limit,
+                                                poverty, measures, tracer, check_poverty)
+                checkpoint_child_limit(journal, year, child_limit, baseline_arrays, reformed)
+        elif not year_complete(journal, output_dir, year):
+            with stage("year", year=year):
+                generate_year_csvs(year, dataset, output_dir, tracer, bootstrap, journal, name, check_poverty,
+                                   store_meta)
+
+    queue.run(execute)
+
+def incomplete_units(output_dir, years, journal=None):
+    """Year/policy units not journaled as complete, or without journal, missing any CSV"""
+    if journal is not None:
+        return [unit_name(year, policy) for year in years for policy in POLICY_GRID
+                if not journal.is_done(year, policy)]
+    return [unit_name(year, policy) for year in years for policy in POLICY_GRID
+            if not all(os.path.exists(filename) for filename in policy_files(output_dir, policy, year))]
+
+def combine_all_csvs(output_dir, journal=None, force=False):
+    """Combine the per-policy CSVs into one comprehensive file"""
+    # ===== COMBINE ALL CSVs INTO ONE COMPREHENSIVE FILE =====
+    print("\n" + "="*60)
+    print("CREATING COMPREHENSIVE CSV FILE")
+    print("="*60)
+
+    # Refuse to publish a grid with holes left by an interrupted run
+    missing = incomplete_units(output_dir, years, journal)
+    if missing and not force:
+        raise RuntimeError(
+            f"{len(missing)} policy results are incomplete ({', '.join(missing[:5])}"
+            f"{', ...' if len(missing) > 5 else ''}); rerun to resume them, or pass --force to publish anyway"
         )
-
-        decile_analysis_data = decile_summary.merge(decile_relative, on='income_decile')
-
-        dist_output = []
-        for _, row in decile_analysis_data.iterrows():
-            dist_output.append({
-                'decile': int(row['income_decile']),
-                'relative_change_pct': row['relative_change'] * 100
-            })
-
-        dist_df_output = pd.DataFrame(dist_output)
-        dist_df_output.to_csv(f"public/data/distributional-analysis-lower-third-child-element-{year}-rate{rate_pct}.csv", index=False)
-        print(f"Saved: public/data/distributional-analysis-lower-third-child-element-{year}-rate{rate_pct}.csv")
-
-print("\n" + "="*60)
-print("ALL CSV FILES GENERATED")
-print("="*60)
-
-# ===== COMBINE ALL CSVs INTO ONE COMPREHENSIVE FILE =====
-print("\n" + "="*60)
-print("CREATING COMPREHENSIVE CSV FILE")
-print("="*60)
-
-all_data = []
-
-for year in years:
-    # Handle policies without parameters
-    for policy in ['full-abolition', 'disabled-child-exemption', 'working-families-exemption']:
-        csv_file = f"public/data/{policy}-{year}.csv"
-        if os.path.exists(csv_file):
-            df = pd.read_csv(csv_file)
-            for _, row in df.iterrows():
-                all_data.append({
-                    'year': year,
-                    'policy': policy,
-                    'parameter': None,
-                    'metric': row['metric'],
-                    'value': row['value']
-                })
-
-    # Handle three-child-limit with different child limit values
-    for child_limit in range(3, 17):
-        csv_file = f"public/data/three-child-limit-{year}-limit{child_limit}.csv"
-        if os.path.exists(csv_file):
-            df = pd.read_csv(csv_file)
-            for _, row in df.iterrows():
-                all_data.append({
-                    'year': year,
-                    'policy': 'three-child-limit',
-                    'parameter': child_limit,
-                    'metric': row['metric'],
-                    'value': row['value']
-                })
-
-    # Handle under-five-exemption with different age limits
-    for age_limit in range(3, 17):
-        csv_file = f"public/data/under-five-exemption-{year}-age{age_limit}.csv"
-        if os.path.exists(csv_file):
-            df = pd.read_csv(csv_file)
-            for _, row in df.iterrows():
-                all_data.append({
-                    'year': year,
-                    'policy': 'under-five-exemption',
-                    'parameter': age_limit,
-                    'metric': row['metric'],
-                    'value': row['value']
-                })
-
-    # Handle lower-third-child-element with different reduction rates
-    for rate_pct in range(50, 105, 10):
-        csv_file = f"public/data/lower-third-child-element-{year}-rate{rate_pct}.csv"
-        if os.path.exists(csv_file):
-            df = pd.read_csv(csv_file)
-            for _, row in df.iterrows():
-                all_data.append({
-                    'year': year,
-                    'policy': 'lower-third-child-element',
-                    'parameter': rate_pct,
-                    'metric': row['metric'],
-                    'value': row['value']
-                })
-
-# Create comprehensive CSV
-comprehensive_df = pd.DataFrame(all_data)
-comprehensive_df.to_csv('public/data/all-results.csv', index=False)
-print("Saved: public/data/all-results.csv")
-
-print("\n" + "="*60)
-print("COMPREHENSIVE CSV FILE CREATED")
-print(f"Total rows: {len(comprehensive_df)}")
-print("="*60)
+    if missing:
+        print(f"WARNING: publishing with {len(missing)} incomplete policy results")
+
+    all_data = []
+
+    for year in years:
+        # Handle policies without parameters
+        for policy in ['full-abolition', 'disabled-child-exemption', 'working-families-exemption']:
+            csv_file = f"{output_dir}/{policy}-{year}.csv"
+            if os.path.exists(csv_file):
+                df = pd.read_csv(csv_file)
+                for _, row in df.iterrows():
+                    all_data.append({
+                        'year': year,
+                        'policy': policy,
+                        'parameter': None,
+                        'metric': row['metric'],
+                        'value': row['value']
+                    })
+
+        # Handle three-child-limit with different child limit values
+        for child_limit in range(3, 17):
+            csv_file = f"{output_dir}/three-child-limit-{year}-limit{child_limit}.csv"
+            if os.path.exists(csv_file):
+                df = pd.read_csv(csv_file)
+                for _, row in df.iterrows():
+                    all_data.append({
+                        'year': year,
+                        'policy': 'three-child-limit',
+                        'parameter': child_limit,
+                        'metric': row['metric'],
+                        'value': row['value']
+                    })
+
+        # Handle under-five-exemption with different age limits
+        for age_limit in range(3, 17):
+            csv_file = f"{output_dir}/under-five-exemption-{year}-age{age_limit}.csv"
+            if os.path.exists(csv_file):
+                df = pd.read_csv(csv_file)
+                for _, row in df.iterrows():
+                    all_data.append({
+                        'year': year,
+                        'policy': 'under-five-exemption',
+                        'parameter': age_limit,
+                        'metric': row['metric'],
+                        'value': row['value']
+                    })
+
+        # Handle lower-third-child-element with different reduction rates
+        for rate_pct in range(50, 105, 10):
+            csv_file = f"{output_dir}/lower-third-child-element-{year}-rate{rate_pct}.csv"
+            if os.path.exists(csv_file):
+                df = pd.read_csv(csv_file)
+                for _, row in df.iterrows():
+                    all_data.append({
+                        'year': year,
+                        'policy': 'lower-third-child-element',
+                        'parameter': rate_pct,
+                        'metric': row['metric'],
+                        'value': row['value']
+                    })
+
+    # Create comprehensive CSV
+    comprehensive_df = pd.DataFrame(all_data)
+    with stage("write"), atomic_path(f"{output_dir}/all-results.csv") as temporary:
+        comprehensive_df.to_csv(temporary, index=False)
+    print(f"Saved: {output_dir}/all-results.csv")
+
+    print("\n" + "="*60)
+    print("COMPREHENSIVE CSV FILE CREATED")
+    print(f"Total rows: {len(comprehensive_df)}")
+    print("="*60)
+
+def print_scenarios(years):
+    """Print the planned grid of policy settings and how many need a simulation"""
+    print(f"{'Policy':<28} {'Settings':<24} {'Simulated'}")
+    simulations = 1  # the baseline
+    for policy, parameters in POLICY_GRID.items():
+        simulated = policy in SIMULATED_POLICIES
+        settings = "-" if parameters == [None] else f"{parameters[0]}-{parameters[-1]} ({len(parameters)})"
+        print(f"{policy:<28} {settings:<24} {'yes' if simulated else 'derived'}")
+        simulations += len(parameters) if simulated else 0
+    print(f"\n{len(years)} years ({years[0]}-{years[-1]}), {simulations} simulations per year")
+
+def save_sample_label(output_dir, dataset, fraction, seed, households):
+    """Mark an output directory as holding subsample results"""
+    label = {
+        'dataset': dataset,
+        'fraction': fraction,
+        'seed': seed,
+        'households': households,
+        'note': "Stratified household subsample with rescaled weights; estimates for smoke tests only",
+    }
+    with atomic_path(f"{output_dir}/{SAMPLE_LABEL_FILE}") as temporary:
+        with open(temporary, "w") as f:
+            json.dump(label, f, indent=2)
+    print(f"Saved: {output_dir}/{SAMPLE_LABEL_FILE}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the CSV files behind the two-child limit app")
+    parser.add_argument("--dataset", default=dataset,
+                        help="PolicyEngine dataset, a synthetic .npz file or synthetic:<persons>[:<seed>]")
+    parser.add_argument("--output-dir", default=None,
+                        help="defaults to public/data, or synthetic_output for synthetic datasets")
+    parser.add_argument("--profile-report", default="run-report.json",
+                        help="where to write the JSON timing and memory report")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record peak traced allocations per stage with tracemalloc (slower)")
+    parser.add_argument("--trace-calculate", default=None, metavar="REPORT",
+                        help="trace every calculate() call and write a per-variable report here")
+    parser.add_argument("--bootstrap", type=int, default=0, metavar="REPLICATES",
+                        help="add bootstrap confidence intervals for cost, childrenOutOfPoverty and "
+                             "povertyRateReduction using this many replicate weights")
+    parser.add_argument("--bootstrap-method", choices=["poisson", "bayesian"], default="poisson")
+    parser.add_argument("--bootstrap-seed", type=int, default=0)
+    parser.add_argument("--confidence-level", type=float, default=0.95)
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR,
+                        help="where the completion journal and simulated scenario arrays are kept")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore completed work from earlier runs and regenerate everything")
+    parser.add_argument("--force", action="store_true",
+                        help="write all-results.csv even if some policy results are incomplete")
+    parser.add_argument("--sample", type=float, default=None, metavar="FRACTION",
+                        help="run every policy on a stratified household subsample of this fraction "
+                             "(written to sample_output by default)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for --sample")
+    parser.add_argument("--check-poverty", action="store_true",
+                        help="confirm every reform's incrementally updated poverty flags against the model's in_poverty")
+    parser.add_argument("--combine-only", action="store_true",
+                        help="rebuild all-results.csv and the exported artefacts from existing CSVs, without simulating")
+    parser.add_argument("--list-scenarios", action="store_true",
+                        help="print the planned policy settings and exit")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR,
+                        help="where snapshots of each year's uprated dataset are kept for fast simulation start-up")
+    parser.add_argument("--no-snapshots", action="store_true",
+                        help="load and uprate the dataset for every simulation instead of using snapshots")
+    parser.add_argument("--queue", default=None, metavar="DIR",
+                        help="work through the grid as one of several workers sharing this queue directory")
+    parser.add_argument("--worker-id", default=None,
+                        help="name of this worker in the queue (defaults to host name and process id)")
+    parser.add_argument("--lease", type=float, default=LEASE_SECONDS,
+                        help="seconds without a heartbeat before a worker's task is re-queued")
+    parser.add_argument("--queue-status", action="store_true",
+                        help="print how many queued tasks are done, running, ready, waiting or failed, and exit")
+    args = parser.parse_args()
+    if args.queue and args.restart:
+        parser.error("--restart cannot be combined with --queue; start a new queue directory instead")
+    if args.queue_status and not args.queue:
+        parser.error("--queue-status needs --queue")
+
+    # None of these paths builds a simulation, so none imports the tax-benefit model
+    if args.list_scenarios:
+        print_scenarios(years)
+        return
+    if args.queue_status:
+        print_status(WorkQueue(args.queue, args.worker_id, args.lease))
+        return
+
+    if args.trace_memory:
+        current_report().start_memory_tracing()
+    tracer = CalculateTracer() if args.trace_calculate else None
+    bootstrap = None
+    if args.bootstrap > 0:
+        bootstrap = Bootstrap(args.bootstrap, args.bootstrap_seed, args.confidence_level, args.bootstrap_method)
+
+    if args.sample is not None:
+        output_dir = args.output_dir or "sample_output"
+    else:
+        output_dir = args.output_dir or ("synthetic_output" if is_synthetic_dataset(args.dataset) else "public/data")
+
+    if args.combine_only:
+        with stage("combine"):
+            combine_all_csvs(output_dir, force=args.force)
+        with stage("export"):
+            write_decile_bundles(output_dir, years)
+            write_results_index(output_dir)
+            write_response_curves(output_dir)
+            write_artefacts(output_dir, years)
+        return
+
+    # Create data directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Every year runs on the same households, with weights rescaled to the full population
+    name = args.dataset
+    datasets = {year: args.dataset for year in years}
+    if args.sample is not None:
+        name = f"{dataset_name(args.dataset)}-{sample_label(args.sample, args.seed)}"
+        with stage("sample"):
+            datasets, households = sample_datasets(args.dataset, years, args.sample, args.seed)
+        print("\n" + "="*60)
+        print(f"SAMPLE RUN: {args.sample:.2%} of households ({households:,}), seed {args.seed}")
+        print("Results are estimates for a smoke test, not publishable figures")
+        print("="*60)
+        save_sample_label(output_dir, args.dataset, args.sample, args.seed, households)
+    elif os.path.exists(f"{output_dir}/{SAMPLE_LABEL_FILE}"):
+        os.remove(f"{output_dir}/{SAMPLE_LABEL_FILE}")
+
+    # Completed work only carries over between runs with the same settings
+    run = {
+        'dataset': args.dataset,
+        'outputDir': output_dir,
+        'bootstrap': [args.bootstrap, args.bootstrap_method, args.bootstrap_seed, args.confidence_level],
+        'sample': None if args.sample is None else [args.sample, args.seed],
+        'scenarioCheckpoints': 'sparse-equivalised',
+    }
+    snapshot_dir = None if args.no_snapshots else args.snapshot_dir
+    store_meta = delta_meta(args.dataset, run['sample'])
+    if args.queue:
+        queue = WorkQueue(args.queue, args.worker_id, args.lease)
+        queue.check_run(run)
+        queue.add_tasks(queue_tasks(years))
+        run_worker(queue, datasets, output_dir, checkpoint_dir(name, args.checkpoint_dir), run, name,
+                   tracer, bootstrap, args.check_poverty, args.force, snapshot_dir, store_meta)
+        # Each worker reports its own share of the run
+        report, extension = os.path.splitext(args.profile_report)
+        write_report(f"{report}-{queue.worker}{extension}")
+        print_summary()
+        if tracer is not None:
+            report, extension = os.path.splitext(args.trace_calculate)
+            tracer.write_report(f"{report}-{queue.worker}{extension}")
+        return
+
+    journal = Journal(checkpoint_dir(name, args.checkpoint_dir), run)
+    if args.restart:
+        journal.reset()
+
+    for year in years:
+        if year_complete(journal, output_dir, year):
+            print(f"\nSkipping {year}: every policy is complete (pass --restart to regenerate)")
+            continue
+        with stage("year", year=year):
+            generate_year_csvs(year, snapshot_dataset(datasets[year], year, snapshot_dir), output_dir, tracer,
+                               bootstrap, journal, name, args.check_poverty, store_meta)
+
+    print("\n" + "="*60)
+    print("ALL CSV FILES GENERATED")
+    print("="*60)
+
+    with stage("combine"):
+        combine_all_csvs(output_dir, journal, args.force)
+
+    with stage("export"):
+        write_decile_bundles(output_dir, years)
+        write_results_index(output_dir)
+        write_response_curves(output_dir)
+        write_artefacts(output_dir, years)
+
+    write_report(args.profile_report)
+    print_summary()
+
+    if tracer is not None:
+        tracer.write_report(args.trace_calculate)
+        tracer.print_report()
+
+
+if __name__ == "__main__":
+    main()
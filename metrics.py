@@ -0,0 +1,319 @@
+"""
+Metric functions shared by the analysis scripts and the CSV pipeline.
+
+Everything here works on plain arrays and DataFrames that have already been
+calculated, so the same figures are computed the same way everywhere.
+"""
+
+import numpy as np
+import pandas as pd
+
+from simulations import calculate
+
+
+def reform_cost(baseline_income, reformed_income, household_weight):
+    """Weighted total change in household net income"""
+    return ((np.asarray(reformed_income) - np.asarray(baseline_income)) * household_weight).sum()
+
+
+def poverty_impact(baseline_in_poverty, reformed_in_poverty, person_weights, is_child):
+    """Overall and child poverty rates before and after a reform"""
+    baseline_poverty_rate = (baseline_in_poverty * person_weights).sum() / person_weights.sum()
+    reformed_poverty_rate = (reformed_in_poverty * person_weights).sum() / person_weights.sum()
+
+    child_weights = person_weights * is_child
+    baseline_child_poverty_rate = (baseline_in_poverty * child_weights).sum() / child_weights.sum()
+    reformed_child_poverty_rate = (reformed_in_poverty * child_weights).sum() / child_weights.sum()
+
+    return {
+        'baseline_poverty_rate': baseline_poverty_rate,
+        'reformed_poverty_rate': reformed_poverty_rate,
+        'poverty_rate_reduction': baseline_poverty_rate - reformed_poverty_rate,
+        'baseline_child_poverty_rate': baseline_child_poverty_rate,
+        'reformed_child_poverty_rate': reformed_child_poverty_rate,
+        'child_poverty_rate_reduction': baseline_child_poverty_rate - reformed_child_poverty_rate,
+        'children_out_of_poverty': (baseline_in_poverty * child_weights).sum() - (reformed_in_poverty * child_weights).sum(),
+        'total_children': child_weights.sum(),
+    }
+
+
+def headline_impact(baseline, reformed, year):
+    """Cost and poverty impact of a reform, from cached arrays"""
+    cost = reform_cost(
+        calculate(baseline, "household_net_income", year),
+        calculate(reformed, "household_net_income", year),
+        calculate(baseline, "household_weight", year),
+    )
+    impact = poverty_impact(
+        calculate(baseline, "in_poverty", year, map_to="person"),
+        calculate(reformed, "in_poverty", year, map_to="person"),
+        calculate(baseline, "person_weight", year, map_to="person"),
+        calculate(baseline, "is_child", year, map_to="person"),
+    )
+    return {'cost': cost, **impact}
+
+
+def benunit_summary(baseline_df):
+    """One row per benefit unit with its CTC limit flag, weight and benefit amounts"""
+    return baseline_df.groupby('benunit_id').agg({
+        'ctc_child_limit_affected': 'first',
+        'household_weight': 'first',
+        'child_tax_credit': 'first',
+        'universal_credit': 'first',
+    }).reset_index()
+
+
+def ctc_affected_children(children_df, baseline_df):
+    """Children in benefit units affected by the CTC child limit"""
+    benunit_ctc = baseline_df.groupby('benunit_id').agg({
+        'ctc_child_limit_affected': 'first',
+    }).reset_index()
+
+    children_with_ctc = children_df.merge(
+        benunit_ctc,
+        on='benunit_id',
+        how='left',
+        suffixes=('', '_benunit')
+    )
+    return children_with_ctc[children_with_ctc['ctc_child_limit_affected_benunit'] == True]
+
+
+def affected_families(baseline_df, benunit_df):
+    """Weighted counts of UC and CTC families, and of those affected by each child limit"""
+    uc_affected_benunits = baseline_df[baseline_df['uc_is_child_limit_affected'] > 0]['benunit_id'].unique()
+    uc_affected_families_df = benunit_df[benunit_df['benunit_id'].isin(uc_affected_benunits)]
+    ctc_affected_families_df = benunit_df[benunit_df['ctc_child_limit_affected'] == True]
+
+    return {
+        'uc_affected_benunits': uc_affected_benunits,
+        'uc_families': benunit_df[benunit_df['universal_credit'] > 0]['household_weight'].sum(),
+        'ctc_families': benunit_df[benunit_df['child_tax_credit'] > 0]['household_weight'].sum(),
+        'uc_affected_families': uc_affected_families_df['household_weight'].sum(),
+        'ctc_affected_families': ctc_affected_families_df['household_weight'].sum(),
+    }
+
+
+def clean_deciles(income_decile):
+    """Income deciles as integers clipped to 1-10"""
+    return pd.to_numeric(pd.Series(np.asarray(income_decile)), errors='coerce').clip(1, 10).astype(int).values
+
+
+def decile_change_matrix(baseline_income, reformed_income, household_weight, income_decile):
+    """Average and relative income change by decile for a scenario x household income matrix
+
+    Returns the deciles present and two scenario x decile matrices. Every
+    scenario's totals come from one product with the decile weight matrix.
+    """
+    baseline_income = np.asarray(baseline_income, dtype=np.float64)
+    weight = np.asarray(household_weight, dtype=np.float64)
+    income_change = np.subtract(reformed_income, baseline_income, dtype=np.float64)
+
+    decile = clean_deciles(income_decile)
+    deciles = np.unique(decile)
+    # Household x decile matrix of household weights
+    decile_weights = np.zeros((len(decile), len(deciles)))
+    decile_weights[np.arange(len(decile)), np.searchsorted(deciles, decile)] = weight
+
+    total_weight = decile_weights.sum(axis=0)
+    total_income = baseline_income @ decile_weights
+    total_change = np.atleast_2d(income_change) @ decile_weights
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return deciles, total_change / total_weight, total_change / total_income
+
+
+# Bands of each household's relative income change, from the largest loss to the largest gain.
+# Changes within 0.1% either way count as no change.
+CHANGE_BANDS = ['lose_more_than_5pct', 'lose_less_than_5pct', 'no_change', 'gain_less_than_5pct', 'gain_more_than_5pct']
+BAND_EDGES = np.array([-0.05, -0.001, 0.001, 0.05])
+
+
+def change_bands(baseline_income, income_change):
+    """Index into CHANGE_BANDS of each household's relative income change"""
+    relative_change = income_change / np.maximum(baseline_income, 1)
+    return np.searchsorted(BAND_EDGES, relative_change).astype(np.int8)
+
+
+def decile_band_matrix(baseline_income, reformed_income, household_weight, income_decile):
+    """Weighted share of households in each change band by decile, for a scenario x household income matrix
+
+    Returns the deciles present and a scenario x decile x band array, all from
+    one bincount over scenario, decile and band codes.
+    """
+    baseline_income = np.asarray(baseline_income, dtype=np.float64)
+    weight = np.asarray(household_weight, dtype=np.float64)
+    income_change = np.atleast_2d(np.subtract(reformed_income, baseline_income, dtype=np.float64))
+    n_scenarios = len(income_change)
+
+    decile = clean_deciles(income_decile)
+    deciles = np.unique(decile)
+    n_deciles, n_bands = len(deciles), len(CHANGE_BANDS)
+    decile_index = np.searchsorted(deciles, decile)
+    codes = ((np.arange(n_scenarios)[:, None] * n_deciles + decile_index) * n_bands
+             + change_bands(baseline_income, income_change))
+    totals = np.bincount(codes.ravel(), weights=np.broadcast_to(weight, codes.shape).ravel(),
+                         minlength=n_scenarios * n_deciles * n_bands).reshape(n_scenarios, n_deciles, n_bands)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return deciles, totals / totals.sum(axis=2, keepdims=True)
+
+
+def decile_changes(baseline_income, reformed_income, household_weight, income_decile):
+    """Weighted average and relative change in household income, and change bands, by income decile"""
+    deciles, avg_change, relative_change = decile_change_matrix(
+        baseline_income, reformed_income, household_weight, income_decile)
+    _, band_shares = decile_band_matrix(baseline_income, reformed_income, household_weight, income_decile)
+    return decile_frame(deciles, avg_change[0], relative_change[0], band_shares[0])
+
+
+def delta_decile_changes(baseline_income, income_delta, household_weight, income_decile):
+    """decile_changes() from a SparseDelta of household income
+
+    Only the changed households enter the change totals; the baseline totals
+    are one bincount each.
+    """
+    weight = np.asarray(household_weight, dtype=np.float64)
+    decile = clean_deciles(income_decile)
+    deciles = np.unique(decile)
+    total_weight = np.bincount(decile, weights=weight, minlength=11)[deciles]
+    total_income = np.bincount(decile, weights=np.asarray(baseline_income, dtype=np.float64) * weight, minlength=11)[deciles]
+    total_change = income_delta.group_totals(decile, weight, 11)[deciles]
+
+    # Households outside the delta are unchanged
+    changed = income_delta.indices
+    n_bands = len(CHANGE_BANDS)
+    bands = change_bands(np.asarray(baseline_income, dtype=np.float64)[changed], income_delta.values)
+    band_totals = np.bincount(decile[changed] * n_bands + bands, weights=weight[changed],
+                              minlength=11 * n_bands).reshape(11, n_bands)[deciles]
+    band_totals[:, CHANGE_BANDS.index('no_change')] += total_weight - band_totals.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return decile_frame(deciles, total_change / total_weight, total_change / total_income,
+                            band_totals / total_weight[:, None])
+
+
+def decile_frame(deciles, avg_change, relative_change, band_shares=None):
+    """One row per income decile with its average and relative change and, if given, its change band shares"""
+    frame = pd.DataFrame({
+        'income_decile': deciles,
+        'avg_change': avg_change,
+        'relative_change': relative_change,
+    })
+    if band_shares is not None:
+        for i, band in enumerate(CHANGE_BANDS):
+            frame[band] = band_shares[:, i]
+    return frame
+
+
+def scenario_metrics(baseline_income, reformed_income, household_weight, income_decile,
+                     baseline_in_poverty, reformed_in_poverty, child_weights):
+    """Cost, child poverty and decile changes for a stack of scenarios
+
+    `reformed_income` is a scenario x household matrix and `reformed_in_poverty`
+    a scenario x person matrix. Each metric is one matrix-vector product with
+    weights computed once, accumulated in float64.
+    """
+    weight = np.asarray(household_weight, dtype=np.float64)
+    child_weights = np.asarray(child_weights, dtype=np.float64)
+    total_children = child_weights.sum()
+
+    cost = np.subtract(reformed_income, np.asarray(baseline_income), dtype=np.float64) @ weight
+    baseline_children_in_poverty = np.asarray(baseline_in_poverty) @ child_weights
+    children_in_poverty = np.asarray(reformed_in_poverty) @ child_weights
+    deciles, avg_change, relative_change = decile_change_matrix(
+        baseline_income, reformed_income, household_weight, income_decile)
+    _, band_shares = decile_band_matrix(baseline_income, reformed_income, household_weight, income_decile)
+
+    return {
+        'cost': cost,
+        'baseline_child_poverty_rate': baseline_children_in_poverty / total_children,
+        'reformed_child_poverty_rate': children_in_poverty / total_children,
+        'children_out_of_poverty': baseline_children_in_poverty - children_in_poverty,
+        'deciles': deciles,
+        'avg_change': avg_change,
+        'relative_change': relative_change,
+        'band_shares': band_shares,
+    }
+
+
+# Finer income groups for distributional curves
+QUANTILES = {'percentile': 100, 'ventile': 20}
+
+
+def income_rank(income, weights):
+    """Each household's weighted mid-point rank (0-1) in the income distribution, from one sort
+
+    Ranked like household_income_decile: by equivalised income with household
+    weight times people in the household.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    order = np.argsort(np.asarray(income), kind='stable')
+    cumulative = np.cumsum(weights[order])
+    rank = np.empty(len(order))
+    rank[order] = (cumulative - weights[order] / 2) / cumulative[-1]
+    return rank
+
+
+def quantile_groups(rank, n_groups):
+    """Income group from 1 to n_groups for each household rank"""
+    return np.minimum(n_groups, np.floor(n_groups * rank) + 1).astype(np.int16)
+
+
+class QuantileCurves:
+    """Average and relative income change by percentile and ventile for every scenario of a year
+
+    Households are grouped once per year; each added block of scenarios costs
+    one bincount over scenario x group codes per quantile.
+    """
+
+    def __init__(self, baseline_income, household_weight, rank, quantiles=QUANTILES):
+        self.baseline_income = np.asarray(baseline_income, dtype=np.float64)
+        self.weight = np.asarray(household_weight, dtype=np.float64)
+        self.quantiles = quantiles
+        self.groups = {name: quantile_groups(rank, n) - 1 for name, n in quantiles.items()}
+        self.total_weight = {}
+        self.total_income = {}
+        for name, n_groups in quantiles.items():
+            groups = self.groups[name]
+            self.total_weight[name] = np.bincount(groups, weights=self.weight, minlength=n_groups)
+            self.total_income[name] = np.bincount(groups, weights=self.baseline_income * self.weight, minlength=n_groups)
+        self.rows = {name: [] for name in quantiles}
+
+    def add(self, policy, parameters, reformed_income):
+        """Add scenarios: a scenario x household income matrix and one parameter per row"""
+        reformed_income = np.atleast_2d(reformed_income)
+        n_scenarios = len(reformed_income)
+        weighted_change = np.subtract(reformed_income, self.baseline_income, dtype=np.float64) * self.weight
+        for name, n_groups in self.quantiles.items():
+            codes = (np.arange(n_scenarios)[:, None] * n_groups + self.groups[name]).ravel()
+            total_change = np.bincount(codes, weights=weighted_change.ravel(),
+                                       minlength=n_scenarios * n_groups).reshape(n_scenarios, n_groups)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                avg_change = total_change / self.total_weight[name]
+                relative_change = total_change / self.total_income[name]
+            for i, parameter in enumerate(parameters):
+                self.rows[name].append(pd.DataFrame({
+                    'policy': policy,
+                    'parameter': parameter,
+                    name: np.arange(1, n_groups + 1),
+                    'avg_change': avg_change[i],
+                    'relative_change_pct': relative_change[i] * 100,
+                }))
+
+    def frame(self, name):
+        """One row per scenario and income group"""
+        return pd.concat(self.rows[name], ignore_index=True)
+
+
+def decile_output(decile_analysis_data):
+    """The published distributional CSV columns
+
+    Decile, relative change in percent, average change in pounds and, where
+    computed, the share of households in each change band.
+    """
+    dist_output = []
+    for _, row in decile_analysis_data.iterrows():
+        dist_output.append({
+            'decile': int(row['income_decile']),
+            'relative_change_pct': row['relative_change'] * 100,
+            'avg_change': row['avg_change'],
+            **{band: row[band] for band in CHANGE_BANDS if band in row},
+        })
+    return pd.DataFrame(dist_output)
@@ -1,9 +1,48 @@
+import { readFileSync } from 'node:fs';
+import { join } from 'node:path';
 import type { NextConfig } from 'next';
 
 const basePath = process.env.NEXT_PUBLIC_BASE_PATH !== undefined
   ? process.env.NEXT_PUBLIC_BASE_PATH
   : '/uk/two-child-limit-comparison';
 
+const CONTENT_TYPES: Record<string, string> = {
+  '.csv': 'text/csv; charset=utf-8',
+  '.json': 'application/json',
+  '.bin': 'application/octet-stream',
+};
+
+// Accept-Encoding lists that allow brotli or gzip, ignoring q=0 opt-outs
+const ACCEPTS_BROTLI = '(?:.*,)?\\s*br\\s*(?:,.*|;\\s*q=(?!0(?:\\.0*)?\\s*(?:,|$)).*)?';
+const ACCEPTS_GZIP = '(?:.*,)?\\s*gzip\\s*(?:,.*|;\\s*q=(?!0(?:\\.0*)?\\s*(?:,|$)).*)?';
+
+type ManifestEntry = { file: string; gzipBytes?: number; brotliBytes?: number };
+
+// Precompressed variants written by exports.py, as recorded in the published manifest
+function artefactVariants() {
+  let files: Record<string, ManifestEntry> = {};
+  try {
+    files = JSON.parse(readFileSync(join(process.cwd(), 'public/data/manifest.json'), 'utf8')).files;
+  } catch {
+    return [];
+  }
+  return Object.values(files).flatMap(({ file, gzipBytes, brotliBytes }) => {
+    const contentType = CONTENT_TYPES[file.slice(file.lastIndexOf('.'))] ?? 'application/octet-stream';
+    const source = `/data/${file}`;
+    const brotli = { type: 'header' as const, key: 'accept-encoding', value: ACCEPTS_BROTLI };
+    const gzip = { type: 'header' as const, key: 'accept-encoding', value: ACCEPTS_GZIP };
+    return [
+      ...(brotliBytes ? [{ source, contentType, suffix: '.br', encoding: 'br', has: [brotli], missing: [] }] : []),
+      ...(gzipBytes ? [{
+        source, contentType, suffix: '.gz', encoding: 'gzip', has: [gzip],
+        // Clients taking brotli get the smaller variant instead, where there is one
+        missing: brotliBytes ? [brotli] : [],
+      }] : []),
+    ];
+  });
+}
+
+const variants = artefactVariants();
 
 const nextConfig: NextConfig = {
   ...(basePath ? { basePath } : {}),
@@ -13,6 +52,44 @@ const nextConfig: NextConfig = {
   turbopack: {
     root: process.cwd(),
   },
+  // Hashed data artefacts never change; the manifest pointing at them must be revalidated
+  async headers() {
+    return [
+      {
+        source: '/data/artefacts/:path*',
+        headers: [
+          { key: 'Cache-Control', value: 'public, max-age=31536000, immutable' },
+          { key: 'Vary', value: 'Accept-Encoding' },
+        ],
+      },
+      {
+        source: '/data/manifest.json',
+        headers: [{ key: 'Cache-Control', value: 'no-cache' }],
+      },
+      // Served from a precompressed variant: keep the original type and name the encoding
+      ...variants.map(({ source, contentType, encoding, has, missing }) => ({
+        source,
+        has,
+        missing,
+        headers: [
+          { key: 'Content-Encoding', value: encoding },
+          { key: 'Content-Type', value: contentType },
+        ],
+      })),
+    ];
+  },
+  async rewrites() {
+    return {
+      beforeFiles: variants.map(({ source, suffix, has, missing }) => ({
+        source,
+        destination: `${source}${suffix}`,
+        has,
+        missing,
+      })),
+      afterFiles: [],
+      fallback: [],
+    };
+  },
 };
 
 export default nextConfig;
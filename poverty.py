@@ -0,0 +1,212 @@
+"""
+Poverty status under reforms, re-evaluated only where household income changed.
+
+The model decides poverty per household by comparing an income, optionally
+equivalised, with a threshold:
+
+    PolicyEngine UK   hbai_household_net_income < poverty_line
+    synthetic_frs     household_net_income / household_equivalisation_bhc < poverty_threshold_bhc
+
+Child limit reforms change benefit amounts but not household composition, so
+thresholds and equivalisation factors are read once from the baseline. For each
+reform only the income is calculated; households whose income is unchanged keep
+their baseline status and the rest are compared with the same operations as the
+model, so the flags match its in_poverty exactly. Pass check=True to confirm
+that against the model's own in_poverty.
+
+    poverty = IncrementalPoverty(baseline, 2026, poverty_rule(dataset))
+    reformed_in_poverty = poverty.person_poverty(reformed)
+
+PovertyMeasures counts children in poverty under the HBAI low income lines at
+once: absolute poverty (below 60% of a reference year's median, held constant
+in real terms, which is the model's in_poverty line), relative poverty (below
+60% of the scenario's own median) and deep relative poverty (below 50% of it),
+each before and after housing costs. A scenario needs only its equivalised incomes
+before and after housing costs; every line is then a threshold comparison over
+the same two arrays:
+
+    measures = PovertyMeasures(baseline, 2026, poverty_rule(dataset), child_weights, person_household)
+    measures.add("full-abolition", [None], measures.children_out_of_poverty(measures.incomes(reformed)))
+    measures.frame().to_csv(poverty_measures_filename(2026), index=False)
+"""
+
+import numpy as np
+import pandas as pd
+
+from schema import calculate_compact, person_household_index
+from synthetic_frs import is_synthetic_dataset
+
+# How each model decides in_poverty: income (/ equivalisation) < threshold, per household
+POVERTY_RULES = {
+    'policyengine': {
+        'income': 'hbai_household_net_income',
+        'equivalisation': None,
+        'threshold': 'poverty_line',
+        'equivalised': {'bhc': 'equiv_hbai_household_net_income', 'ahc': 'equiv_hbai_household_net_income_ahc'},
+        'absolute': {'bhc': 'poverty_threshold_bhc', 'ahc': 'poverty_threshold_ahc'},
+    },
+    'synthetic': {
+        'income': 'household_net_income',
+        'equivalisation': 'household_equivalisation_bhc',
+        'threshold': 'poverty_threshold_bhc',
+        'equivalised': {'bhc': 'equiv_hbai_household_net_income', 'ahc': 'equiv_hbai_household_net_income_ahc'},
+        'absolute': {'bhc': 'poverty_threshold_bhc', 'ahc': 'poverty_threshold_ahc'},
+    },
+}
+
+# Equivalised incomes every measure compares, in the order PovertyMeasures stores them
+HOUSING_BASES = ['bhc', 'ahc']
+
+# Each measure: the income compared, the line ('absolute', the model's HBAI
+# absolute line, or 'relative' to the scenario's median income) and the share
+# of that line. Deep relative poverty is HBAI's 50% of median threshold.
+POVERTY_MEASURES = {
+    'absolute_bhc': ('bhc', 'absolute', 1.0),
+    'absolute_ahc': ('ahc', 'absolute', 1.0),
+    'relative_bhc': ('bhc', 'relative', 0.6),
+    'relative_ahc': ('ahc', 'relative', 0.6),
+    'deep_relative_bhc': ('bhc', 'relative', 0.5),
+    'deep_relative_ahc': ('ahc', 'relative', 0.5),
+}
+
+
+def poverty_rule(dataset):
+    """The in_poverty rule of the model that simulates a dataset"""
+    return POVERTY_RULES['synthetic' if is_synthetic_dataset(dataset) else 'policyengine']
+
+
+class IncrementalPoverty:
+    """Household poverty flags for reforms, recomputed only for households whose income changed"""
+
+    def __init__(self, baseline, year, rule):
+        self.year = year
+        self.rule = rule
+        self.income = np.asarray(baseline.calculate(rule['income'], year).values)
+        self.threshold = np.asarray(baseline.calculate(rule['threshold'], year).values)
+        self.equivalisation = None
+        if rule['equivalisation'] is not None:
+            self.equivalisation = np.asarray(baseline.calculate(rule['equivalisation'], year).values)
+        household_id = baseline.calculate("household_id", year).values
+        self.person_household = person_household_index(
+            baseline.calculate("household_id", year, map_to="person").values, household_id)
+        self.baseline_flags = self.below_threshold(self.income, slice(None))
+        self.households_evaluated = []
+
+    def below_threshold(self, income, households):
+        """Poverty flags for incomes of the selected households, as the model computes them"""
+        if self.equivalisation is not None:
+            income = income / self.equivalisation[households]
+        return income < self.threshold[households]
+
+    def household_poverty(self, reformed_income):
+        """Household flags for reformed incomes, and the households re-evaluated"""
+        reformed_income = np.asarray(reformed_income)
+        changed = np.flatnonzero(reformed_income != self.income)
+        flags = self.baseline_flags.copy()
+        flags[changed] = self.below_threshold(reformed_income[changed], changed)
+        self.households_evaluated.append(len(changed))
+        return flags, changed
+
+    def person_poverty(self, reformed, check=False):
+        """Person-level in_poverty under a reform, as reformed.calculate("in_poverty", year, map_to="person")"""
+        flags, _ = self.household_poverty(reformed.calculate(self.rule['income'], self.year).values)
+        person_flags = flags[self.person_household]
+        if check:
+            expected = np.asarray(reformed.calculate("in_poverty", self.year, map_to="person").values).astype(bool)
+            mismatches = np.count_nonzero(person_flags != expected)
+            if mismatches:
+                raise RuntimeError(f"Incremental poverty differs from the model's in_poverty for {mismatches:,} people")
+        return person_flags
+
+
+def poverty_measures_filename(year):
+    """Name of the CSV holding child poverty under every measure for each scenario of a year"""
+    return f"poverty-measures-{year}.csv"
+
+
+def weighted_medians(values, weights):
+    """Weighted median of each row, as MicroSeries.median() computes it"""
+    values = np.atleast_2d(values)
+    keep = weights > 0
+    values = values[:, keep]
+    order = np.argsort(values, axis=1)
+    cumulative = np.cumsum(np.asarray(weights, dtype=np.float64)[keep][order], axis=1)
+    position = np.minimum(np.sum(cumulative / cumulative[:, -1:] < 0.5, axis=1), values.shape[1] - 1)
+    return np.take_along_axis(values, order[np.arange(len(values)), position][:, None], axis=1)[:, 0]
+
+
+class PovertyMeasures:
+    """Children in poverty under every measure in POVERTY_MEASURES, for each scenario of a year
+
+    Absolute lines, child counts and the person weights behind relative medians
+    are read once from the baseline, so a scenario costs two calculate() calls
+    (incomes()) and one comparison of its incomes with every line.
+    """
+
+    def __init__(self, baseline, year, rule, child_weights, person_household):
+        self.year = year
+        self.rule = rule
+        weight = calculate_compact(baseline, "household_weight", year)
+        self.children = np.bincount(person_household, weights=child_weights, minlength=len(weight))
+        # Relative lines follow HBAI: the median person's income
+        self.median_weight = np.multiply(weight, calculate_compact(baseline, "household_count_people", year),
+                                         dtype=np.float64)
+
+        self.basis = np.array([HOUSING_BASES.index(basis) for basis, _, _ in POVERTY_MEASURES.values()])
+        self.relative = np.array([line == 'relative' for _, line, _ in POVERTY_MEASURES.values()])
+        self.fraction = np.array([fraction for _, _, fraction in POVERTY_MEASURES.values()])
+        absolute = np.stack([calculate_compact(baseline, rule['absolute'][basis], year) for basis in HOUSING_BASES])
+        self.absolute_lines = absolute[self.basis] * self.fraction[:, None].astype(absolute.dtype)
+
+        self.baseline_incomes = self.incomes(baseline)
+        self.baseline_household_poor = self.flags(self.baseline_incomes) * self.children
+        self.baseline_children_in_poverty = self.baseline_household_poor.sum(axis=1)
+        self.total_children = self.children.sum()
+        self.rows = []
+
+    def incomes(self, simulation):
+        """Equivalised household incomes before and after housing costs, as a 2 x household array"""
+        return np.stack([calculate_compact(simulation, self.rule['equivalised'][basis], self.year)
+                         for basis in HOUSING_BASES])
+
+    def flags(self, incomes):
+        """Measure x household poverty flags for one scenario's incomes()"""
+        relative_lines = self.fraction * weighted_medians(incomes, self.median_weight)[self.basis]
+        lines = np.where(self.relative[:, None], relative_lines[:, None].astype(incomes.dtype), self.absolute_lines)
+        return incomes[self.basis] < lines
+
+    def household_children_lifted(self, incomes):
+        """Measure x household weighted children lifted out of poverty, for one scenario's incomes()
+
+        Derived reforms scale these per household, as derived_reforms.py does
+        for the model's own poverty measure.
+        """
+        return self.baseline_household_poor - self.flags(incomes) * self.children
+
+    def children_out_of_poverty(self, incomes):
+        """Scenario x measure weighted children lifted out of poverty from scenario x 2 x household incomes"""
+        incomes = np.asarray(incomes)
+        if incomes.ndim == 2:
+            incomes = incomes[None]
+        return self.baseline_children_in_poverty - np.stack([self.flags(scenario) @ self.children
+                                                             for scenario in incomes])
+
+    def add(self, policy, parameters, children_out_of_poverty):
+        """Add scenarios from scenario x measure children lifted out of poverty, one parameter per row"""
+        children_out_of_poverty = np.atleast_2d(children_out_of_poverty)
+        for parameter, lifted in zip(parameters, children_out_of_poverty):
+            reformed = self.baseline_children_in_poverty - lifted
+            self.rows.append(pd.DataFrame({
+                'policy': policy,
+                'parameter': parameter,
+                'measure': list(POVERTY_MEASURES),
+                'baseline_children_in_poverty': self.baseline_children_in_poverty,
+                'children_in_poverty': reformed,
+                'children_out_of_poverty': lifted,
+                'baseline_rate': self.baseline_children_in_poverty / self.total_children,
+                'reformed_rate': reformed / self.total_children,
+            }))
+
+    def frame(self):
+        """One row per scenario and measure"""
+        return pd.concat(self.rows, ignore_index=True)
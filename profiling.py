@@ -0,0 +1,197 @@
+"""
+Per-stage timing and memory profiling for pipeline runs.
+
+Wrap work in `stage()` as a context manager or decorator:
+
+    with stage("policy", year=2026, policy="full-abolition"):
+        ...
+
+    @stage("write")
+    def save_csv(...): ...
+
+Each stage records wall time, CPU time, the process peak RSS seen so far and,
+when memory tracing is on, the peak traced allocation inside the stage.
+Stages nest, so a record's path shows where it ran (year > policy > calculate).
+At the end of a run, `write_report()` emits the JSON report and
+`print_summary()` the human-readable table.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None if unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RunReport:
+    """Collects stage records for one pipeline run"""
+
+    def __init__(self):
+        self.records = []
+        self.stack = []
+        self.started = time.time()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.trace_memory = False
+
+    def start_memory_tracing(self):
+        """Record peak traced allocations per stage (adds some overhead)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.trace_memory = True
+
+    def to_dict(self):
+        return {
+            'started': self.started,
+            'argv': sys.argv,
+            'wall_seconds': time.perf_counter() - self.start_wall,
+            'cpu_seconds': time.process_time() - self.start_cpu,
+            'peak_rss_bytes': peak_rss_bytes(),
+            'memory_traced': self.trace_memory,
+            'stages': self.records,
+        }
+
+    def summary_rows(self):
+        """Totals per stage name: count, wall, CPU and the largest memory peaks"""
+        rows = {}
+        for record in self.records:
+            row = rows.setdefault(record['name'], {
+                'name': record['name'], 'count': 0, 'wall_seconds': 0.0, 'self_seconds': 0.0,
+                'cpu_seconds': 0.0, 'peak_traced_bytes': None, 'peak_rss_bytes': None,
+            })
+            row['count'] += 1
+            row['wall_seconds'] += record['wall_seconds']
+            row['self_seconds'] += record['self_seconds']
+            row['cpu_seconds'] += record['cpu_seconds']
+            for key in ['peak_traced_bytes', 'peak_rss_bytes']:
+                if record[key] is not None:
+                    row[key] = max(row[key] or 0, record[key])
+        return list(rows.values())
+
+
+_report = RunReport()
+
+
+def current_report():
+    return _report
+
+
+def reset_report():
+    """Start a fresh report, e.g. between runs in one process"""
+    global _report
+    _report = RunReport()
+    return _report
+
+
+class stage(contextlib.ContextDecorator):
+    """Time a pipeline stage and record it in the current run report"""
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+
+    def _recreate_cm(self):
+        # A fresh instance per decorated call keeps nested calls independent
+        return stage(self.name, **self.labels)
+
+    def __enter__(self):
+        report = _report
+        self.entry = {'name': self.name, 'child_peak': 0, 'child_wall': 0.0}
+        if report.trace_memory:
+            tracemalloc.reset_peak()
+        report.stack.append(self.entry)
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        report = _report
+        wall = time.perf_counter() - self.start_wall
+        cpu = time.process_time() - self.start_cpu
+        report.stack.pop()
+        if report.stack:
+            report.stack[-1]['child_wall'] += wall
+
+        peak_traced = None
+        if report.trace_memory:
+            # Nested stages reset the peak, so fold their peaks back in
+            peak_traced = max(tracemalloc.get_traced_memory()[1], self.entry['child_peak'])
+            if report.stack:
+                parent = report.stack[-1]
+                parent['child_peak'] = max(parent['child_peak'], peak_traced)
+
+        path = [entry['name'] for entry in report.stack] + [self.name]
+        report.records.append({
+            'name': self.name,
+            'path': " > ".join(path),
+            'labels': {key: str(value) for key, value in self.labels.items()},
+            'offset_seconds': self.start_wall - report.start_wall,
+            'wall_seconds': wall,
+            'self_seconds': wall - self.entry['child_wall'],
+            'cpu_seconds': cpu,
+            'peak_traced_bytes': peak_traced,
+            'peak_rss_bytes': peak_rss_bytes(),
+        })
+        return False
+
+
+def profile_calculate(simulation):
+    """Record every calculate() call on a simulation as a stage"""
+    calculate = simulation.calculate
+
+    def profiled_calculate(variable, *args, **kwargs):
+        with stage("calculate", variable=variable):
+            return calculate(variable, *args, **kwargs)
+
+    simulation.calculate = profiled_calculate
+    return simulation
+
+
+def write_report(filename, report=None):
+    """Write the machine-readable JSON run report"""
+    report = report or _report
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with open(filename, "w") as f:
+        json.dump(report.to_dict(), f, indent=2)
+    print(f"Saved: {filename}")
+
+
+def _format_bytes(value):
+    if value is None:
+        return "-"
+    return f"{value / 1024**2:,.0f} MB"
+
+
+def print_summary(report=None):
+    """Print a per-stage summary table for the run"""
+    report = report or _report
+    totals = report.to_dict()
+
+    print("\n" + "="*96)
+    print("RUN PROFILE")
+    print("="*96)
+    print(f"{'stage':<26}{'count':>7}{'wall (s)':>12}{'self (s)':>12}{'cpu (s)':>12}{'cpu/wall':>10}{'peak traced':>17}")
+    for row in sorted(report.summary_rows(), key=lambda row: -row['self_seconds']):
+        ratio = row['cpu_seconds'] / row['wall_seconds'] if row['wall_seconds'] > 0 else 0
+        print(f"{row['name']:<26}{row['count']:>7}{row['wall_seconds']:>12.2f}{row['self_seconds']:>12.2f}"
+              f"{row['cpu_seconds']:>12.2f}{ratio:>10.2f}{_format_bytes(row['peak_traced_bytes']):>17}")
+    print("-"*96)
+    print(f"Total wall time: {totals['wall_seconds']:.2f}s  CPU time: {totals['cpu_seconds']:.2f}s  "
+          f"Peak RSS: {_format_bytes(totals['peak_rss_bytes'])}")
+    print("Wall times nest (a year includes its policies); self time excludes nested stages,")
+    print("so a policy's self time is the pandas and NumPy work outside calculate and writes.")
@@ -0,0 +1,165 @@
+"""
+Progressive-refinement estimates for a child limit reform.
+
+Results are first estimated from a small stratified household subsample with
+rescaled weights (see sampling.py), then from successively larger samples until
+the whole population is simulated. Each interim result carries standard errors;
+the final stage runs on the full dataset with the original weights, so it is
+identical to a full run.
+
+The standard errors cover household sampling only. Relative poverty lines are
+re-estimated from each sample, so poverty estimates vary somewhat more than
+their standard errors suggest, most of all in the smallest samples.
+
+    python progressive.py --year 2026 --child-limit none
+    python progressive.py --dataset synthetic:1000000:0 --fractions 0.01 0.1 1
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from metrics import decile_changes, poverty_impact, reform_cost
+from sampling import (
+    household_strata,
+    ratio_standard_error,
+    sample_households,
+    stratified_order,
+    stratified_standard_error,
+    subset_dataset,
+    variance_strata,
+)
+from schema import household_child_poverty, household_sums, person_household_index
+from simulations import DATASET, child_limit_changes, simulation_classes
+
+FRACTIONS = [0.01, 0.05, 0.25, 1.0]
+
+
+def household_arrays(baseline, reformed, year):
+    """Household income, weight, decile and child poverty counts for standard errors"""
+    household_id = baseline.calculate("household_id", year).values
+    person_household = person_household_index(baseline.calculate("household_id", year, map_to="person").values, household_id)
+    is_child = baseline.calculate("is_child", year, map_to="person").values
+    n_households = len(household_id)
+    return {
+        'baseline_income': baseline.calculate("household_net_income", year).values,
+        'reformed_income': reformed.calculate("household_net_income", year).values,
+        'weight': baseline.calculate("household_weight", year).values,
+        'decile': baseline.calculate("household_income_decile", year).values,
+        'children': household_sums(is_child, person_household, n_households),
+        'baseline_child_poor': household_child_poverty(
+            baseline.calculate("in_poverty", year, map_to="person").values, is_child, person_household, n_households),
+        'reformed_child_poor': household_child_poverty(
+            reformed.calculate("in_poverty", year, map_to="person").values, is_child, person_household, n_households),
+    }
+
+
+def stage_estimates(baseline, reformed, year, strata, population_counts):
+    """Headline and decile estimates with standard errors for one sample"""
+    # The estimates use the same functions as the full pipeline
+    households = household_arrays(baseline, reformed, year)
+    cost = reform_cost(households['baseline_income'], households['reformed_income'], households['weight'])
+    impact = poverty_impact(
+        baseline.calculate("in_poverty", year, map_to="person").values,
+        reformed.calculate("in_poverty", year, map_to="person").values,
+        baseline.calculate("person_weight", year, map_to="person").values,
+        baseline.calculate("is_child", year, map_to="person").values,
+    )
+    deciles = decile_changes(households['baseline_income'], households['reformed_income'],
+                             households['weight'], households['decile'])
+
+    weight = households['weight']
+    income_change = households['reformed_income'] - households['baseline_income']
+    children_out = households['baseline_child_poor'] - households['reformed_child_poor']
+    decile = np.clip(np.asarray(households['decile']).astype(int), 1, 10)
+
+    return {
+        'cost': cost,
+        'costSE': stratified_standard_error(income_change, weight, strata, population_counts),
+        'childrenOutOfPoverty': impact['children_out_of_poverty'],
+        'childrenOutOfPovertySE': stratified_standard_error(children_out, weight, strata, population_counts),
+        'povertyRateReduction': impact['child_poverty_rate_reduction'],
+        'povertyRateReductionSE': ratio_standard_error(children_out, households['children'], weight, strata, population_counts),
+        'distributional': [
+            {
+                'decile': int(row.income_decile),
+                'relative_change_pct': row.relative_change * 100,
+                'relative_change_pct_se': 100 * ratio_standard_error(
+                    income_change * (decile == row.income_decile),
+                    households['baseline_income'] * (decile == row.income_decile),
+                    weight, strata, population_counts,
+                ),
+            }
+            for row in deciles.itertuples()
+        ],
+    }
+
+
+def progressive_estimates(year=2026, child_limit=np.inf, dataset=DATASET, fractions=FRACTIONS, seed=0):
+    """Yield estimates from growing stratified samples, ending with the full population"""
+    Microsimulation, Scenario = simulation_classes(dataset)
+    scenario = Scenario(parameter_changes=child_limit_changes(year, child_limit))
+
+    # Strata only use dataset inputs, so the full baseline is not simulated until the last stage
+    full_baseline = Microsimulation(dataset=dataset)
+    strata = household_strata(full_baseline, year)
+    household_weight = full_baseline.calculate("household_weight", year).values
+    order = stratified_order(strata, seed)
+
+    for fraction in fractions:
+        start = time.perf_counter()
+        if fraction >= 1:
+            sample = np.arange(len(strata))
+            baseline = full_baseline
+            reformed = Microsimulation(dataset=dataset, scenario=scenario)
+        else:
+            sample, weights = sample_households(strata, household_weight, fraction, order=order)
+            subset = subset_dataset(dataset, full_baseline, year, sample, weights)
+            baseline = Microsimulation(dataset=subset)
+            reformed = Microsimulation(dataset=subset, scenario=scenario)
+
+        sample_strata, population_counts = variance_strata(strata, sample)
+        estimates = stage_estimates(baseline, reformed, year, sample_strata, population_counts)
+        yield {
+            'fraction': min(fraction, 1.0),
+            'households': len(sample),
+            'seconds': time.perf_counter() - start,
+            **estimates,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Progressively refined estimates for a child limit reform")
+    parser.add_argument("--dataset", default=DATASET)
+    parser.add_argument("--year", type=int, default=2026)
+    parser.add_argument("--child-limit", default="none", help='child limit to simulate, or "none" to abolish it')
+    parser.add_argument("--fractions", type=float, nargs="+", default=FRACTIONS,
+                        help="sample fractions in order; a final full run is added if missing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write every stage to this JSON file")
+    args = parser.parse_args()
+
+    child_limit = np.inf if args.child_limit == "none" else int(args.child_limit)
+    fractions = sorted(args.fractions)
+    if fractions[-1] < 1:
+        fractions.append(1.0)
+
+    print(f"{'Sample':>8} {'Households':>11} {'Seconds':>8} {'Cost (£bn)':>18} {'Children out of poverty':>26} {'Rate reduction':>20}")
+    stages = []
+    for result in progressive_estimates(args.year, child_limit, args.dataset, fractions, args.seed):
+        stages.append(result)
+        print(f"{result['fraction']:>8.1%} {result['households']:>11,} {result['seconds']:>8.2f} "
+              f"{result['cost']/1e9:>9.2f} ± {result['costSE']/1e9:<6.2f} "
+              f"{result['childrenOutOfPoverty']:>13,.0f} ± {result['childrenOutOfPovertySE']:<10,.0f} "
+              f"{result['povertyRateReduction']:>10.2%} ± {result['povertyRateReductionSE']:<7.2%}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(stages, f, indent=2)
+        print(f"Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Adaptive response curves for the continuous reform parameters.
+
+Rather than evaluating every point of a fixed grid, each curve starts from a
+few anchor settings and bisects only the intervals where the headline metrics
+are not linear: an interval is split when the metrics at its midpoint differ
+from straight-line interpolation by more than the tolerance (relative to the
+largest value on the curve). The result is a compact piecewise-linear lookup
+table, response-curves.json, that the app interpolates at any setting.
+
+The third+ child element rate is the only continuous parameter; the child and
+age limits are whole numbers, every one of which is already in
+all-results.csv. A reduced element is derived by scaling full abolition by the
+rate, as in generate_all_csvs.py, so each rate is evaluated from the year's
+full abolition row without a simulation, and bisection stops at the first
+midpoint. generate_all_csvs.py writes the curves with the other exports; to
+rebuild them from an existing all-results.csv:
+
+    python response_curves.py --output-dir public/data
+"""
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from checkpoints import atomic_path
+
+CURVE_METRICS = ['cost', 'childrenOutOfPoverty', 'povertyRateReduction']
+
+# Parameter range, anchors and finest step for each curve, in the units of all-results.csv
+CURVES = {
+    'lower-third-child-element': {'anchors': [50, 100], 'step': 1},
+}
+
+RESPONSE_CURVES_FILE = "response-curves.json"
+
+
+def interval_error(lower, upper, mid, x_lower, x_upper, x_mid, scale):
+    """Largest relative gap between the midpoint metrics and linear interpolation"""
+    t = (x_mid - x_lower) / (x_upper - x_lower)
+    errors = [
+        abs(mid[metric] - (lower[metric] + t * (upper[metric] - lower[metric]))) / scale[metric]
+        for metric in CURVE_METRICS
+        if scale[metric] > 0
+    ]
+    return max(errors, default=0.0)
+
+
+def refine_curve(evaluate, anchors, step, tolerance=0.01):
+    """Evaluate anchors, then bisect intervals until linear interpolation is within tolerance
+
+    Returns a dict mapping each evaluated parameter value to its metrics.
+    """
+    points = {x: evaluate(x) for x in anchors}
+    scale = {
+        metric: max(abs(values[metric]) for values in points.values())
+        for metric in CURVE_METRICS
+    }
+
+    intervals = list(zip(anchors[:-1], anchors[1:]))
+    while intervals:
+        x_lower, x_upper = intervals.pop()
+        x_mid = round(round((x_lower + x_upper) / 2 / step) * step, 10)
+        if not x_lower < x_mid < x_upper:
+            continue
+        points[x_mid] = evaluate(x_mid)
+        error = interval_error(points[x_lower], points[x_upper], points[x_mid],
+                               x_lower, x_upper, x_mid, scale)
+        if error > tolerance:
+            intervals.extend([(x_lower, x_mid), (x_mid, x_upper)])
+
+    return dict(sorted(points.items()))
+
+
+def curve_table(points):
+    """Column-oriented lookup table: parameter values and one list per metric"""
+    table = {'parameter': [float(x) for x in points]}
+    for metric in CURVE_METRICS:
+        table[metric] = [float(values[metric]) for values in points.values()]
+    return table
+
+
+def interpolate(table, x, metric):
+    """Piecewise-linear lookup of a metric at any parameter setting"""
+    return float(np.interp(x, table['parameter'], table[metric]))
+
+
+def year_evaluators(results, year):
+    """Metric functions for each curve in one year, from the year's rows of all-results.csv"""
+    rows = results[(results['year'] == year) & (results['policy'] == 'full-abolition')]
+    full = rows.set_index('metric')['value']
+
+    def reduction_rate(rate_pct):
+        return {metric: full[metric] * rate_pct / 100 for metric in CURVE_METRICS}
+
+    return {'lower-third-child-element': reduction_rate}
+
+
+def build_response_curves(results, tolerance=0.01):
+    """Refined lookup tables for every curve and year in an all-results.csv frame"""
+    curves = {policy: {} for policy in CURVES}
+    for year in sorted(results.loc[results['policy'] == 'full-abolition', 'year'].unique()):
+        evaluators = year_evaluators(results, year)
+        for policy, spec in CURVES.items():
+            points = refine_curve(evaluators[policy], spec['anchors'], spec['step'], tolerance)
+            curves[policy][str(year)] = curve_table(points)
+    return {'tolerance': tolerance, 'metrics': CURVE_METRICS, 'curves': curves}
+
+
+def save_response_curves(filename, response_curves):
+    """Save the lookup tables as compact JSON"""
+    with atomic_path(filename) as temporary:
+        with open(temporary, "w") as f:
+            json.dump(response_curves, f, separators=(",", ":"))
+    print(f"Saved: {filename}")
+
+
+def write_response_curves(output_dir, tolerance=0.01):
+    """Write response-curves.json from all-results.csv"""
+    results = pd.read_csv(f"{output_dir}/all-results.csv", float_precision="round_trip")
+    save_response_curves(f"{output_dir}/{RESPONSE_CURVES_FILE}", build_response_curves(results, tolerance))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build adaptive response curves for the reform parameters")
+    parser.add_argument("--output-dir", default="public/data")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="largest interpolation error allowed, relative to each curve's largest value")
+    args = parser.parse_args()
+
+    from exports import write_artefacts
+
+    write_response_curves(args.output_dir, args.tolerance)
+    write_artefacts(args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Results cube: every scenario's totals by income decile, region, children, benefit and year.
+
+Households are put into cells once per year from the baseline:
+
+    decile    household income decile, 1-10
+    region    PolicyEngine region
+    children  children in the household: 0, 1, 2, 3, 4, 5+
+    benefit   'uc' if the household receives universal credit, 'legacy' if it
+              receives child tax credit instead, otherwise 'none'
+
+Baseline totals (households, people, children, income, children in poverty)
+are stored once per cell. Each scenario's household income changes and
+children lifted out of poverty are added with one bincount over combined
+scenario and cell codes. A year is one compressed results-cube-<year>.npz in
+the output directory, and any slice is a sum over cells:
+
+    python results_cube.py --policy full-abolition --year 2026 --region SCOTLAND --children 4+
+    python results_cube.py --policy three-child-limit --parameter 3 --benefit uc --by decile
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from checkpoints import atomic_path
+from metrics import clean_deciles
+from schema import household_child_poverty, household_sums
+from simulations import YEARS
+
+# Categories of each dimension, in cell order
+DIMENSIONS = {
+    'decile': [str(decile) for decile in range(1, 11)],
+    'region': ['UNKNOWN', 'NORTH_EAST', 'NORTH_WEST', 'YORKSHIRE', 'EAST_MIDLANDS', 'WEST_MIDLANDS',
+               'EAST_OF_ENGLAND', 'LONDON', 'SOUTH_EAST', 'SOUTH_WEST', 'WALES', 'SCOTLAND',
+               'NORTHERN_IRELAND'],
+    'children': ['0', '1', '2', '3', '4', '5+'],
+    'benefit': ['none', 'legacy', 'uc'],
+}
+SHAPE = tuple(len(categories) for categories in DIMENSIONS.values())
+N_CELLS = int(np.prod(SHAPE))
+
+BASELINE_MEASURES = ['households', 'people', 'children', 'baseline_income', 'children_in_poverty']
+SCENARIO_MEASURES = ['income_change', 'children_out_of_poverty']
+
+
+def cube_filename(year):
+    """Name of a year's cube in the output directory"""
+    return f"results-cube-{year}.npz"
+
+
+def category_codes(dimension, values):
+    """Position of each value among a dimension's categories, the first category if unknown"""
+    codes = {category: i for i, category in enumerate(DIMENSIONS[dimension])}
+    return np.array([codes.get(str(value), 0) for value in values], dtype=np.int16)
+
+
+class CubeBuilder:
+    """Household cells and baseline totals for one year, accumulating scenarios"""
+
+    def __init__(self, baseline, year, person_household, is_child, baseline_in_poverty):
+        income = baseline.calculate("household_net_income", year).values
+        n_households = len(income)
+        children = household_sums(is_child, person_household, n_households)
+        receives_uc = baseline.calculate("universal_credit", year, map_to="household").values > 0
+        receives_ctc = baseline.calculate("child_tax_credit", year, map_to="household").values > 0
+        self.cell = np.ravel_multi_index((
+            clean_deciles(baseline.calculate("household_income_decile", year).values) - 1,
+            category_codes('region', baseline.calculate("region", year).values),
+            np.minimum(children, len(DIMENSIONS['children']) - 1).astype(np.int16),
+            np.where(receives_uc, 2, np.where(receives_ctc, 1, 0)),
+        ), SHAPE)
+
+        self.year = year
+        self.weight = baseline.calculate("household_weight", year).values.astype(np.float64)
+        self.baseline_child_poor = household_child_poverty(baseline_in_poverty, is_child, person_household, n_households)
+        people = np.bincount(person_household, minlength=n_households)
+        self.baseline = np.stack([
+            np.bincount(self.cell, weights=np.asarray(values, dtype=np.float64) * self.weight, minlength=N_CELLS)
+            for values in (np.ones(n_households), people, children, income, self.baseline_child_poor)
+        ], axis=-1)
+        self.policies = []
+        self.parameters = []
+        self.scenarios = []
+
+    def children_lifted(self, reformed_in_poverty, is_child, person_household):
+        """Children lifted out of poverty in each household, from reformed person-level poverty flags"""
+        return self.baseline_child_poor - household_child_poverty(
+            reformed_in_poverty, is_child, person_household, len(self.weight))
+
+    def add(self, policy, parameters, income_change, children_lifted):
+        """Add scenarios from scenario x household income changes and children lifted out of poverty"""
+        income_change = np.atleast_2d(income_change)
+        n_scenarios = len(income_change)
+        codes = (np.arange(n_scenarios)[:, None] * N_CELLS + self.cell).ravel()
+        totals = [
+            np.bincount(codes, weights=(np.asarray(values, dtype=np.float64) * self.weight).ravel(),
+                        minlength=n_scenarios * N_CELLS).reshape(n_scenarios, N_CELLS)
+            for values in (income_change, np.atleast_2d(children_lifted))
+        ]
+        self.scenarios.append(np.stack(totals, axis=-1))
+        self.policies += [policy] * n_scenarios
+        self.parameters += [-1 if parameter is None else parameter for parameter in parameters]
+
+    def save(self, path):
+        """Save the year's cube to a compressed .npz file"""
+        with atomic_path(path) as temporary:
+            with open(temporary, "wb") as f:
+                np.savez_compressed(
+                    f, year=self.year, baseline=self.baseline, scenarios=np.concatenate(self.scenarios),
+                    policies=np.array(self.policies), parameters=np.array(self.parameters, dtype=np.int16),
+                )
+        print(f"Saved: {path}")
+
+
+class ResultsCube:
+    """Saved cubes for several years, sliced without any simulation
+
+    `baseline` is year x cell x baseline measure and `scenarios` is year x
+    scenario x cell x scenario measure.
+    """
+
+    def __init__(self, years, policies, parameters, baseline, scenarios):
+        self.years = list(years)
+        self.policies = list(policies)
+        self.parameters = [None if parameter < 0 else int(parameter) for parameter in parameters]
+        self.baseline = baseline
+        self.scenarios = scenarios
+
+    @classmethod
+    def load(cls, output_dir, years=YEARS):
+        """Cubes saved by CubeBuilder for the years present in an output directory"""
+        years = [year for year in years if os.path.exists(f"{output_dir}/{cube_filename(year)}")]
+        if not years:
+            raise FileNotFoundError(f"No results cubes in {output_dir}; run generate_all_csvs.py first")
+        baseline, scenarios = [], []
+        for year in years:
+            with np.load(f"{output_dir}/{cube_filename(year)}") as data:
+                policies, parameters = data['policies'], data['parameters']
+                baseline.append(data['baseline'])
+                scenarios.append(data['scenarios'])
+        return cls(years, policies, parameters, np.stack(baseline), np.stack(scenarios))
+
+    def scenario_index(self, policy, parameter=None):
+        """Row of a scenario in the cube"""
+        for i, key in enumerate(zip(self.policies, self.parameters)):
+            if key == (policy, parameter):
+                return i
+        raise KeyError(f"No scenario {policy} {'' if parameter is None else parameter} in the cube")
+
+    def cell_mask(self, **filters):
+        """Cells matching every filter, each a category or a list of categories
+
+        Children also accept "<n>+", e.g. "4+" for four or more children.
+        """
+        mask = np.ones(SHAPE, dtype=bool)
+        for axis, (dimension, categories) in enumerate(DIMENSIONS.items()):
+            selected = filters.get(dimension)
+            if selected is None:
+                continue
+            selected = [str(value) for value in np.atleast_1d(selected)]
+            if dimension == 'children':
+                selected = [category for value in selected for category in categories
+                            if category == value or (value.endswith("+") and int(category.rstrip("+")) >= int(value[:-1]))]
+            unknown = set(selected) - set(categories)
+            if unknown:
+                raise ValueError(f"Unknown {dimension}: {', '.join(sorted(unknown))} (one of {', '.join(categories)})")
+            keep = np.isin(categories, selected)
+            mask &= keep.reshape([-1 if i == axis else 1 for i in range(len(SHAPE))])
+        return mask.ravel()
+
+    def query(self, policy, parameter=None, year=None, **filters):
+        """Headline totals of a scenario over the matching cells, for one year or each year"""
+        years = self.years if year is None else [year]
+        scenario = self.scenario_index(policy, parameter)
+        mask = self.cell_mask(**filters)
+        results = {}
+        for year in years:
+            y = self.years.index(year)
+            baseline = dict(zip(BASELINE_MEASURES, self.baseline[y][mask].sum(axis=0)))
+            change = dict(zip(SCENARIO_MEASURES, self.scenarios[y, scenario][mask].sum(axis=0)))
+            children, poor = baseline['children'], baseline['children_in_poverty']
+            results[year] = {
+                'households': baseline['households'],
+                'people': baseline['people'],
+                'children': children,
+                'cost': change['income_change'],
+                'relativeChange': change['income_change'] / baseline['baseline_income'] if baseline['baseline_income'] else 0,
+                'childrenOutOfPoverty': change['children_out_of_poverty'],
+                'baselinePovertyRate': poor / children if children else 0,
+                'reformedPovertyRate': (poor - change['children_out_of_poverty']) / children if children else 0,
+            }
+        return results if year is None else results[year]
+
+    def breakdown(self, dimension, policy, parameter=None, year=None, **filters):
+        """query() for each category of a dimension"""
+        return {
+            category: self.query(policy, parameter, year, **{**filters, dimension: category})
+            for category in DIMENSIONS[dimension]
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Slice the precomputed results cube")
+    parser.add_argument("--output-dir", default="public/data")
+    parser.add_argument("--policy", required=True)
+    parser.add_argument("--parameter", type=int, default=None)
+    parser.add_argument("--year", type=int, default=None, help="defaults to every year in the cube")
+    for dimension, categories in DIMENSIONS.items():
+        parser.add_argument(f"--{dimension}", nargs="+", default=None, help=f"one or more of {', '.join(categories)}")
+    parser.add_argument("--by", choices=list(DIMENSIONS), default=None, help="break the results down by a dimension")
+    args = parser.parse_args()
+
+    cube = ResultsCube.load(args.output_dir)
+    filters = {dimension: getattr(args, dimension) for dimension in DIMENSIONS}
+    years = cube.years if args.year is None else [args.year]
+    print(f"{'Year':<6}{(args.by or ''):<18}{'Households':>14}{'Cost (£m)':>12}{'Children out':>14}"
+          f"{'Child poverty':>15}{'Reformed':>10}")
+    for year in years:
+        rows = (cube.breakdown(args.by, args.policy, args.parameter, year, **filters) if args.by
+                else {'': cube.query(args.policy, args.parameter, year, **filters)})
+        for category, result in rows.items():
+            print(f"{year:<6}{category:<18}{result['households']:>14,.0f}{result['cost'] / 1e6:>12,.1f}"
+                  f"{result['childrenOutOfPoverty']:>14,.0f}{result['baselinePovertyRate']:>15.1%}"
+                  f"{result['reformedPovertyRate']:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
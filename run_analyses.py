@@ -0,0 +1,38 @@
+"""
+Run every analysis report back to back, sharing simulations between them.
+
+    python run_analyses.py
+    python run_analyses.py --dataset synthetic:100000:0
+"""
+
+import argparse
+
+import analysis
+import analysis_lower_third_child_element_2026
+import analysis_three_child_limit_2026
+import analysis_under_five_exemption_2026
+import analysis_working_families_exemption_2026
+from simulations import DATASET, simulations_built
+
+ANALYSES = [
+    analysis,
+    analysis_three_child_limit_2026,
+    analysis_under_five_exemption_2026,
+    analysis_working_families_exemption_2026,
+    analysis_lower_third_child_element_2026,
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run all two-child limit analysis reports")
+    parser.add_argument("--dataset", default=DATASET)
+    args = parser.parse_args()
+
+    for module in ANALYSES:
+        module.run(dataset=args.dataset)
+
+    print(f"\nSimulations built: {simulations_built()}")
+
+
+if __name__ == "__main__":
+    main()
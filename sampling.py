@@ -0,0 +1,180 @@
+"""
+Stratified household subsamples with rescaled weights.
+
+Households are stratified by region, household employment income decile and
+number of children, all of which are dataset inputs, so building the strata
+does not run the tax-benefit model. Households are then put in a random order
+that spreads every stratum evenly, so any prefix of the order is itself a
+stratified sample. The weights of a sample are rescaled so each stratum keeps
+its population weight, and a sample of every household keeps the original
+weights exactly.
+"""
+
+import numpy as np
+import pandas as pd
+
+from simulations import simulation_classes
+from synthetic_frs import is_synthetic_dataset, load_synthetic_frs
+
+# Number of children bands: 0, 1, 2, 3+
+CHILDREN_BANDS = [0, 1, 2, 3]
+
+
+def household_strata(simulation, year):
+    """Stratum code per household: region x employment income decile x children band"""
+    region = pd.factorize(np.asarray(simulation.calculate("region", year).values))[0]
+    weight = simulation.calculate("household_weight", year).values
+    income = simulation.calculate("employment_income", year, map_to="household").values
+    children = simulation.calculate("is_child", year, map_to="household").values
+
+    # Weighted employment income deciles
+    order = np.argsort(income, kind="stable")
+    cumulative = np.cumsum(weight[order]) / weight.sum()
+    decile = np.empty(len(income), dtype=int)
+    decile[order] = np.minimum((cumulative * 10).astype(int), 9)
+
+    children_band = np.searchsorted(CHILDREN_BANDS, np.minimum(children, CHILDREN_BANDS[-1]))
+    return (region * 10 + decile) * len(CHILDREN_BANDS) + children_band
+
+
+def stratified_order(strata, seed=0):
+    """Random household order in which every prefix is spread evenly across strata"""
+    rng = np.random.default_rng(seed)
+    n = len(strata)
+    shuffled = rng.permutation(n)
+    stratum = strata[shuffled]
+
+    # Rank each household within its stratum, then interleave strata by relative rank
+    by_stratum = np.argsort(stratum, kind="stable")
+    sizes = np.bincount(stratum)
+    starts = np.cumsum(sizes) - sizes
+    rank = np.empty(n)
+    rank[by_stratum] = np.arange(n) - starts[stratum[by_stratum]]
+    position = (rank + rng.random(n)) / sizes[stratum]
+    return shuffled[np.argsort(position, kind="stable")]
+
+
+def rescaled_weights(household_weight, strata, sample):
+    """Weights for the sampled households that preserve each stratum's total weight
+
+    Strata without any sampled household have their weight spread over the rest
+    in proportion, so the population total is preserved too.
+    """
+    household_weight = np.asarray(household_weight, dtype=float)
+    n_strata = strata.max() + 1
+    population = np.bincount(strata, weights=household_weight, minlength=n_strata)
+    sampled = np.bincount(strata[sample], weights=household_weight[sample], minlength=n_strata)
+    factor = np.divide(population, sampled, out=np.zeros(n_strata), where=sampled > 0)
+    weights = household_weight[sample] * factor[strata[sample]]
+    return weights * household_weight.sum() / weights.sum()
+
+
+def sample_households(strata, household_weight, fraction, seed=0, order=None):
+    """Sorted household indices and rescaled weights for a stratified subsample"""
+    if order is None:
+        order = stratified_order(strata, seed)
+    size = max(1, int(np.ceil(fraction * len(strata))))
+    sample = np.sort(order[:size])
+    return sample, rescaled_weights(household_weight, strata, sample)
+
+
+def variance_strata(strata, sample, max_singleton_share=0.05):
+    """Stratum codes for standard errors, collapsed until few strata hold a single sampled household
+
+    Returns the codes of the sampled households and the population count per code.
+    Codes are collapsed from region x income decile x children band to region x
+    children band, then children band, then a single stratum.
+    """
+    n_bands = len(CHILDREN_BANDS)
+    levels = [
+        strata,
+        (strata // (10 * n_bands)) * n_bands + strata % n_bands,
+        strata % n_bands,
+        np.zeros_like(strata),
+    ]
+    for codes in levels:
+        sampled = np.bincount(codes[sample])
+        if (sampled[codes[sample]] == 1).mean() <= max_singleton_share:
+            break
+    return codes[sample], np.bincount(codes)
+
+
+def subset_dataset(dataset, simulation, year, sample, weights):
+    """Dataset of the sampled households, to pass to Microsimulation(dataset=...)"""
+    if is_synthetic_dataset(dataset):
+        return load_synthetic_frs(dataset).subset(sample, weights)
+
+    from policyengine_uk.data import UKSingleYearDataset
+
+    # As in policyengine_uk.data.filter_dataset, carry across values imputed over the whole population
+    single_year = simulation.dataset[year].copy()
+    person = single_year.person
+    for variable in ("months_since_last_birthday", "attends_private_school"):
+        if variable not in person.columns:
+            values = pd.Series(
+                np.asarray(simulation.calculate(variable, year)),
+                index=np.asarray(simulation.calculate("person_id", year)),
+            )
+            person = person.assign(**{variable: values.loc[person.person_id].values})
+
+    household_id = np.asarray(simulation.calculate("household_id", year).values)[sample]
+    household = single_year.household.set_index("household_id").loc[household_id].reset_index()
+    household["household_weight"] = weights
+    person = person[person.person_household_id.isin(household_id)]
+    benunit = single_year.benunit[single_year.benunit.benunit_id.isin(person.person_benunit_id.unique())]
+
+    return UKSingleYearDataset(person=person, benunit=benunit, household=household, fiscal_year=year)
+
+
+def sample_label(fraction, seed=0):
+    """Name of a subsample for output labels and file names, e.g. sample0p01-seed0"""
+    return f"sample{fraction:g}-seed{seed}".replace(".", "p")
+
+
+def sample_datasets(dataset, years, fraction, seed=0):
+    """The same stratified household subsample of a dataset for each year
+
+    Households are drawn once, from strata on the first year's inputs, and their
+    weights are rescaled to each year's stratum totals. Returns the datasets by
+    year and the number of sampled households.
+    """
+    Microsimulation, _ = simulation_classes(dataset)
+    full_baseline = Microsimulation(dataset=dataset)
+    strata = household_strata(full_baseline, years[0])
+    household_weight = full_baseline.calculate("household_weight", years[0]).values
+    sample, _ = sample_households(strata, household_weight, fraction, seed)
+
+    datasets = {}
+    for year in years:
+        weights = rescaled_weights(full_baseline.calculate("household_weight", year).values, strata, sample)
+        datasets[year] = subset_dataset(dataset, full_baseline, year, sample, weights)
+    return datasets, len(sample)
+
+
+def stratified_standard_error(values, weights, strata, population_counts):
+    """Standard error of a weighted total from a stratified sample
+
+    `values` are per sampled household (or per household linearised values for a
+    ratio), `strata` their stratum codes and `population_counts` the number of
+    households in each stratum. The finite population correction makes the
+    error zero once every household is sampled.
+    """
+    z = np.asarray(weights, dtype=float) * np.asarray(values, dtype=float)
+    n_strata = len(population_counts)
+    n = np.bincount(strata, minlength=n_strata)
+    mean = np.divide(np.bincount(strata, weights=z, minlength=n_strata), n, out=np.zeros(n_strata), where=n > 0)
+    squares = np.bincount(strata, weights=(z - mean[strata]) ** 2, minlength=n_strata)
+    fpc = 1 - np.divide(n, population_counts, out=np.ones(n_strata), where=population_counts > 0)
+    variance = np.divide(n * fpc * squares, n - 1, out=np.zeros(n_strata), where=n > 1)
+    return float(np.sqrt(variance.sum()))
+
+
+def ratio_standard_error(numerator, denominator, weights, strata, population_counts):
+    """Standard error of a ratio of weighted totals, by linearisation"""
+    weights = np.asarray(weights, dtype=float)
+    total = (weights * denominator).sum()
+    if total == 0:
+        return 0.0
+    ratio = (weights * numerator).sum() / total
+    linearised = (np.asarray(numerator) - ratio * np.asarray(denominator)) / total
+    return stratified_standard_error(linearised, weights, strata, population_counts)
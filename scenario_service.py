@@ -0,0 +1,352 @@
+"""
+Local on-demand scenario service.
+
+Serves reform results for any combination of settings, not just the
+precomputed grid, over HTTP on 127.0.0.1 only:
+
+    python scenario_service.py --warm
+    curl "http://127.0.0.1:8765/scenario?year=2026&child_limit=3&age_limit=5"
+
+Query parameters:
+    year             2026-2029
+    child_limit      simulated UC and CTC child limit, 2-16 (default 2, "none" to abolish)
+    age_limit        children under this age (1-19) are exempt from the remaining limit
+    reduction_rate   percent of the child element paid for children still limited (default 0)
+
+The baseline arrays for each year are kept warm in memory, and simulations
+are built from snapshots of each year's uprated dataset (see
+dataset_snapshots.py) unless --no-snapshots is given. Reforms are kept as
+sparse deltas from the baseline (see sparse_delta.py): full abolition per year,
+and each simulated child limit in an LRU, at a few kilobytes each. Age exemptions and
+reduced elements close part of each household's gap between the simulated
+limit and full abolition. The exempt share of each household comes from the
+year's abolition deltas (see derived_reforms.py), weighted by benefit gain as
+in generate_all_csvs.py, so with the default limit of 2 the service matches
+the published results. For higher limits the same shares, which count the
+children limited at 2, are applied to the smaller remaining gap.
+Identical concurrent requests share one evaluation, and results are cached in
+an LRU. A failed evaluation is reported as a 500 with a JSON error.
+
+Binding to 127.0.0.1 does not stop a web page in the user's browser from
+calling the service, so browser requests are refused unless their origin was
+allowed with --allow-origin, which is then echoed for CORS:
+
+    python scenario_service.py --allow-origin http://localhost:3000
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from dataset_snapshots import SNAPSHOT_DIR, snapshot_dataset
+from derived_reforms import build_abolition_deltas
+from metrics import delta_decile_changes
+from schema import household_child_poverty, household_sums, person_household_index
+from simulations import DATASET, YEARS, child_limit_changes, simulation_classes
+from sparse_delta import SparseDelta
+
+HOST = "127.0.0.1"
+
+# Highest simulated child limit; higher limits affect almost no families, so use "none"
+MAX_CHILD_LIMIT = 16
+# Children are people under 20
+MAX_AGE_LIMIT = 19
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+def parse_scenario(query):
+    """Validate query parameters into a hashable scenario key"""
+    def value(name, default):
+        return query.get(name, [default])[0]
+
+    year = int(value("year", YEARS[0]))
+    if year not in YEARS:
+        raise ValueError(f"year must be one of {YEARS}")
+
+    child_limit = value("child_limit", "2")
+    child_limit = None if child_limit == "none" else int(child_limit)
+    if child_limit is not None and not 2 <= child_limit <= MAX_CHILD_LIMIT:
+        raise ValueError(f"child_limit must be between 2 and {MAX_CHILD_LIMIT}, or none")
+
+    age_limit = value("age_limit", None)
+    age_limit = None if age_limit is None else int(age_limit)
+    if age_limit is not None and not 1 <= age_limit <= MAX_AGE_LIMIT:
+        raise ValueError(f"age_limit must be between 1 and {MAX_AGE_LIMIT}")
+
+    reduction_rate = float(value("reduction_rate", 0))
+    if not 0 <= reduction_rate <= 100:
+        raise ValueError("reduction_rate must be between 0 and 100")
+
+    return (year, child_limit, age_limit, reduction_rate)
+
+
+class ScenarioPool:
+    """Warm per-year arrays, simulated child limits and cached scenario results"""
+
+    def __init__(self, dataset=DATASET, cache_size=256, limit_cache_size=64, snapshot_dir=None):
+        self.dataset = dataset
+        self.snapshot_dir = snapshot_dir
+        self.Microsimulation, self.Scenario = simulation_classes(dataset)
+        self.results = LRUCache(cache_size)
+        self.limits = LRUCache(limit_cache_size)
+        self._years = {}
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        # One simulation at a time keeps peak memory bounded
+        self._simulation_lock = threading.Lock()
+
+    def _reform_arrays(self, simulation, year, base):
+        """Household income and children in poverty for a simulation"""
+        in_poverty = simulation.calculate("in_poverty", year, map_to="person").values
+        return {
+            'income': simulation.calculate("household_net_income", year).values,
+            'child_poor': household_child_poverty(in_poverty, base['is_child'], base['person_household'], base['n_households']),
+        }
+
+    def _reform_deltas(self, simulation, year, base):
+        """Sparse household income and children in poverty changes from the baseline"""
+        arrays = self._reform_arrays(simulation, year, base)
+        return {name: SparseDelta.between(base['baseline'][name], values) for name, values in arrays.items()}
+
+    def year_state(self, year):
+        """Baseline and full abolition arrays for a year, built on first use"""
+        with self._simulation_lock:
+            if year in self._years:
+                return self._years[year]
+
+            dataset = snapshot_dataset(self.dataset, year, self.snapshot_dir)
+            baseline = self.Microsimulation(dataset=dataset)
+            household_id = baseline.calculate("household_id", year).values
+            base = {
+                'n_households': len(household_id),
+                'person_household': person_household_index(baseline.calculate("household_id", year, map_to="person").values, household_id),
+                'is_child': baseline.calculate("is_child", year, map_to="person").values,
+                'weight': baseline.calculate("household_weight", year).values,
+                'decile': baseline.calculate("household_income_decile", year).values,
+            }
+            base['children'] = household_sums(base['is_child'], base['person_household'], base['n_households'])
+            base['baseline'] = self._reform_arrays(baseline, year, base)
+
+            reformed = self.Microsimulation(dataset=dataset, scenario=self.Scenario(parameter_changes=child_limit_changes(year, np.inf)))
+            base['full'] = self._reform_deltas(reformed, year, base)
+            base['deltas'] = build_abolition_deltas(baseline, reformed, year)
+
+            self._years[year] = base
+            return base
+
+    def limit_state(self, year, child_limit):
+        """Household deltas from the baseline under a simulated child limit"""
+        base = self.year_state(year)
+        if child_limit is None:
+            return base['full']
+        if child_limit == 2:
+            return {name: SparseDelta.empty(base['n_households']) for name in base['full']}
+
+        key = (year, child_limit)
+        arrays = self.limits.get(key)
+        if arrays is None:
+            with self._simulation_lock:
+                arrays = self.limits.get(key)
+                if arrays is None:
+                    scenario = self.Scenario(parameter_changes=child_limit_changes(year, child_limit))
+                    dataset = snapshot_dataset(self.dataset, year, self.snapshot_dir)
+                    simulation = self.Microsimulation(dataset=dataset, scenario=scenario)
+                    arrays = self._reform_deltas(simulation, year, base)
+                    self.limits.put(key, arrays)
+        return arrays
+
+    def compute(self, scenario):
+        """Headline metrics and decile changes for one scenario"""
+        year, child_limit, age_limit, reduction_rate = scenario
+        base = self.year_state(year)
+        limited = self.limit_state(year, child_limit)
+        full = base['full']
+
+        # Share of each household's remaining limit gap closed by the exemption and reduced element
+        exempt_share = np.zeros(base['n_households'])
+        if age_limit is not None:
+            deltas = base['deltas']
+            exempt_share = deltas.child_exemption(deltas.child['age'] < age_limit)['household_share']
+        closed = exempt_share + (1 - exempt_share) * reduction_rate / 100
+
+        income_change = limited['income'] + (full['income'] - limited['income']).scale(closed)
+        child_poor_change = limited['child_poor'] + (full['child_poor'] - limited['child_poor']).scale(closed)
+
+        weight = base['weight']
+        total_children = (base['children'] * weight).sum()
+        baseline_poverty_rate = (base['baseline']['child_poor'] * weight).sum() / total_children
+        reformed_poverty_rate = baseline_poverty_rate + child_poor_change.total(weight) / total_children
+        deciles = delta_decile_changes(base['baseline']['income'], income_change, weight, base['decile'])
+
+        return {
+            'year': year,
+            'childLimit': child_limit,
+            'ageLimit': age_limit,
+            'reductionRate': reduction_rate,
+            'cost': float(income_change.total(weight)),
+            'childrenOutOfPoverty': float((baseline_poverty_rate - reformed_poverty_rate) * total_children),
+            'baselinePovertyRate': float(baseline_poverty_rate),
+            'reformedPovertyRate': float(reformed_poverty_rate),
+            'povertyRateReduction': float(baseline_poverty_rate - reformed_poverty_rate),
+            'totalChildren': float(total_children),
+            'distributional': [
+                {'decile': int(row.income_decile), 'relative_change_pct': float(row.relative_change * 100)}
+                for row in deciles.itertuples()
+            ],
+        }
+
+    def evaluate(self, scenario):
+        """Cached result for a scenario; concurrent identical requests share one evaluation"""
+        result = self.results.get(scenario)
+        if result is not None:
+            return result, True
+
+        with self._inflight_lock:
+            future = self._inflight.get(scenario)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[scenario] = future
+
+        if not owner:
+            return future.result(), True
+
+        try:
+            result = self.compute(scenario)
+            self.results.put(scenario, result)
+            future.set_result(result)
+            return result, False
+        except Exception as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[scenario]
+
+
+def make_handler(pool, allowed_origins=()):
+    """Request handler class bound to a scenario pool, accepting browser requests from `allowed_origins`"""
+    allowed_origins = set(allowed_origins)
+
+    class ScenarioHandler(BaseHTTPRequestHandler):
+        def request_allowed(self):
+            """Whether the request comes from outside a browser or from an allowed origin"""
+            origin = self.headers.get("Origin")
+            if origin is not None:
+                return origin in allowed_origins
+            # Cross-site requests that carry no Origin, such as images, come from other web pages
+            return self.headers.get("Sec-Fetch-Site") not in ("cross-site", "same-site")
+
+        def send_json(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            origin = self.headers.get("Origin")
+            if origin in allowed_origins:
+                self.send_header("Access-Control-Allow-Origin", origin)
+                self.send_header("Vary", "Origin")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if not self.request_allowed():
+                self.send_json(403, {'error': "origin not allowed; start the service with --allow-origin"})
+                return
+            if url.path == "/health":
+                self.send_json(200, {
+                    'status': 'ok',
+                    'warmYears': sorted(pool._years),
+                    'cachedScenarios': len(pool.results),
+                    'cachedLimits': len(pool.limits),
+                })
+                return
+            if url.path != "/scenario":
+                self.send_json(404, {'error': f"unknown path {url.path}"})
+                return
+
+            try:
+                scenario = parse_scenario(parse_qs(url.query))
+            except ValueError as error:
+                self.send_json(400, {'error': str(error)})
+                return
+
+            start = time.perf_counter()
+            try:
+                result, cached = pool.evaluate(scenario)
+            except Exception as error:
+                self.log_error("scenario %s failed: %r", scenario, error)
+                self.send_json(500, {'error': f"{type(error).__name__}: {error}"})
+                return
+            self.send_json(200, {**result, 'cached': cached, 'seconds': time.perf_counter() - start})
+
+        def log_message(self, format, *args):
+            print(f"{self.address_string()} {format % args}")
+
+    return ScenarioHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve two-child limit reform scenarios on localhost")
+    parser.add_argument("--dataset", default=DATASET)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache-size", type=int, default=256, help="scenario results kept in the LRU")
+    parser.add_argument("--limit-cache-size", type=int, default=64, help="simulated child limits kept in memory")
+    parser.add_argument("--warm", action="store_true", help="build every year's baseline before serving")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, help="where snapshots of each year's uprated dataset are kept")
+    parser.add_argument("--no-snapshots", action="store_true", help="load and uprate the dataset for every simulation")
+    parser.add_argument("--allow-origin", action="append", default=[], metavar="ORIGIN",
+                        help="web origin allowed to call the service from a browser, e.g. http://localhost:3000 (repeatable)")
+    args = parser.parse_args()
+
+    pool = ScenarioPool(args.dataset, args.cache_size, args.limit_cache_size,
+                        None if args.no_snapshots else args.snapshot_dir)
+    if args.warm:
+        for year in YEARS:
+            start = time.perf_counter()
+            pool.year_state(year)
+            print(f"Warmed {year} in {time.perf_counter() - start:.1f}s")
+
+    server = ThreadingHTTPServer((HOST, args.port), make_handler(pool, args.allow_origin))
+    print(f"Serving scenarios on http://{HOST}:{args.port}/scenario")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
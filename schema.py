@@ -0,0 +1,101 @@
+"""
+Compact dtypes for the arrays and frames the pipeline keeps per year.
+
+PolicyEngine returns every variable as float64, int64 or object, including ids
+and flags. The pipeline only needs ids to compare equal, flags to be true or
+false and money and weights to a fraction of a penny, so arrays are stored as:
+
+    ids                   int32 (order-preserving codes if the ids overflow int32)
+    flags                 bool
+    ages, deciles         int16 / int8
+    weights and incomes   float32
+
+Sums over float32 arrays lose precision quickly, so totals are always taken in
+float64 with weighted_sum().
+
+Person-level arrays are summed into households with person_household_index()
+and household_sums().
+"""
+
+import numpy as np
+import pandas as pd
+
+# Flags stored as bool; any non-zero value is true
+FLAGS = {
+    'is_child',
+    'is_adult',
+    'in_poverty',
+    'uc_is_child_limit_affected',
+    'uc_is_child_born_before_child_limit',
+    'ctc_child_limit_affected',
+}
+
+# Small integers
+INTEGERS = {
+    'age': np.int16,
+    'household_income_decile': np.int8,
+    'region': np.int8,
+}
+
+INT32 = np.iinfo(np.int32)
+
+
+def compact_ids(values):
+    """Ids as int32, or as sorted int32 codes when they do not fit
+
+    Codes agree between two arrays holding the same set of ids, such as
+    household_id at household and at person level.
+    """
+    values = np.asarray(values)
+    if len(values) and values.min() >= INT32.min and values.max() <= INT32.max:
+        return values.astype(np.int32)
+    return pd.factorize(values, sort=True)[0].astype(np.int32)
+
+
+def compact(variable, values):
+    """Values of a variable in its compact dtype"""
+    values = np.asarray(values)
+    if variable.endswith("_id"):
+        return compact_ids(values)
+    if variable in FLAGS:
+        return values.astype(bool) if values.dtype != bool else values
+    if variable in INTEGERS:
+        return values.astype(INTEGERS[variable])
+    if values.dtype.kind == 'f':
+        return values.astype(np.float32)
+    return values
+
+
+def calculate_compact(simulation, variable, year, map_to=None):
+    """A variable calculated by the simulation, in its compact dtype"""
+    return compact(variable, simulation.calculate(variable, year, map_to=map_to).values)
+
+
+def compact_frame(simulation, variables, year, map_to="person"):
+    """DataFrame of calculated variables in their compact dtypes"""
+    return pd.DataFrame({
+        variable: calculate_compact(simulation, variable, year, map_to) for variable in variables
+    })
+
+
+def weighted_sum(values, weights=None):
+    """Total of values (times weights) accumulated in float64"""
+    values = np.asarray(values)
+    if weights is None:
+        return np.sum(values, dtype=np.float64)
+    return np.sum(np.multiply(values, weights, dtype=np.float64))
+
+
+def person_household_index(person_household_id, household_id):
+    """Position of each person's household in the household-level arrays"""
+    return pd.Index(household_id).get_indexer(person_household_id)
+
+
+def household_sums(person_values, person_household, n_households):
+    """Sum a person-level array within households"""
+    return np.bincount(person_household, weights=np.asarray(person_values, dtype=float), minlength=n_households)
+
+
+def household_child_poverty(in_poverty, is_child, person_household, n_households):
+    """Number of children in poverty in each household"""
+    return household_sums(np.asarray(in_poverty) * np.asarray(is_child), person_household, n_households)
@@ -0,0 +1,115 @@
+"""
+Shared simulations and calculated arrays for the analysis scripts.
+
+Each baseline and child-limit reform is built once per process and every
+calculated variable is kept as a NumPy array, so running several reports back
+to back pays for the baseline and abolition simulations only once:
+
+    baseline = baseline_simulation(dataset)
+    reformed = abolition_simulation(year, dataset)
+    income = calculate(baseline, "household_net_income", year)
+"""
+
+import numpy as np
+import pandas as pd
+
+from synthetic_frs import is_synthetic_dataset
+
+DATASET = "hf://policyengine/policyengine-uk-data/enhanced_frs_2023_24.h5"
+
+# Years to analyze
+YEARS = [2026, 2027, 2028, 2029]
+
+UC_CHILD_LIMIT_PARAMETER = "gov.dwp.universal_credit.elements.child.limit.child_count"
+CTC_CHILD_LIMIT_PARAMETER = "gov.dwp.tax_credits.child_tax_credit.limit.child_count"
+
+# Person-level variables the analysis scripts share
+ANALYSIS_VARIABLES = [
+    'person_id',
+    'household_id',
+    'benunit_id',
+    'is_child',
+    'uc_is_child_limit_affected',
+    'uc_is_child_born_before_child_limit',
+    'ctc_child_limit_affected',
+    'universal_credit',
+    'child_tax_credit',
+    'person_weight',
+    'household_weight',
+]
+
+
+def simulation_classes(dataset):
+    """Return the Microsimulation and Scenario classes to use for a dataset"""
+    if is_synthetic_dataset(dataset):
+        from synthetic_frs import SyntheticMicrosimulation, Scenario
+        return SyntheticMicrosimulation, Scenario
+    from policyengine_uk import Microsimulation, Scenario
+    return Microsimulation, Scenario
+
+
+def child_limit_changes(year, child_limit):
+    """Parameter changes setting the UC and CTC child limit from `year`"""
+    return {
+        UC_CHILD_LIMIT_PARAMETER: {
+            str(year): child_limit
+        },
+        CTC_CHILD_LIMIT_PARAMETER: {
+            str(year): child_limit
+        }
+    }
+
+
+_simulations = {}
+_arrays = {}
+
+
+def get_simulation(year=None, child_limit=None, dataset=DATASET):
+    """The baseline (no child_limit) or a child-limit reform, built once per process"""
+    key = (dataset, None, None) if child_limit is None else (dataset, year, child_limit)
+    if key not in _simulations:
+        Microsimulation, Scenario = simulation_classes(dataset)
+        if child_limit is None:
+            _simulations[key] = Microsimulation(dataset=dataset)
+        else:
+            scenario = Scenario(parameter_changes=child_limit_changes(year, child_limit))
+            _simulations[key] = Microsimulation(dataset=dataset, scenario=scenario)
+    return _simulations[key]
+
+
+def baseline_simulation(dataset=DATASET):
+    """Status quo with the two-child limit"""
+    return get_simulation(dataset=dataset)
+
+
+def abolition_simulation(year, dataset=DATASET):
+    """Two-child limit removed from `year`"""
+    return get_simulation(year, np.inf, dataset)
+
+
+def calculate(simulation, variable, year, map_to=None):
+    """A variable's values as a NumPy array, computed once per simulation"""
+    # Keep the simulation alongside its arrays so its id cannot be reused
+    _, arrays = _arrays.setdefault(id(simulation), (simulation, {}))
+    key = (variable, year, map_to)
+    if key not in arrays:
+        arrays[key] = np.asarray(simulation.calculate(variable, year, map_to=map_to).values)
+    return arrays[key]
+
+
+def person_frame(simulation, variables, year):
+    """Person-level DataFrame of the given variables"""
+    return pd.DataFrame({
+        var: calculate(simulation, var, year, map_to="person") for var in variables
+    })
+
+
+def simulations_built():
+    """Number of distinct simulations constructed in this process"""
+    return len(_simulations)
+
+
+def clear_cache():
+    """Drop every cached simulation and array"""
+    _simulations.clear()
+    _arrays.clear()
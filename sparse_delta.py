@@ -0,0 +1,142 @@
+"""
+Sparse reform deltas: the few entities a reform changes, and by how much.
+
+A child limit reform changes the income of a small share of households, so its
+effect is stored as sorted indices into the baseline arrays plus the change at
+each one:
+
+    delta = SparseDelta.between(baseline_income, reformed_income, "household")
+    cost = delta.total(household_weight)
+    by_decile = delta.group_totals(income_decile, household_weight, 11)
+    reformed_income = delta.apply(baseline_income)
+
+Poverty changes are deltas of the person-level flags (+1 into poverty, -1 out).
+Deltas map between entities with to_members() (household to person) and
+to_groups() (person to household), and save to a few kilobytes each.
+"""
+
+import numpy as np
+
+
+class SparseDelta:
+    """Changes to an entity-level array at sorted indices"""
+
+    def __init__(self, indices, values, size, entity="household"):
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.values = np.asarray(values)
+        self.size = int(size)
+        self.entity = entity
+
+    @classmethod
+    def between(cls, baseline, reformed, entity="household"):
+        """Delta from baseline to reformed values, keeping only the entities that changed
+
+        Float changes are kept in float64, so apply() restores float32 values exactly.
+        """
+        baseline = np.asarray(baseline)
+        reformed = np.asarray(reformed)
+        indices = np.flatnonzero(reformed != baseline)
+        if baseline.dtype == bool:
+            values = reformed[indices].astype(np.int8) - baseline[indices].astype(np.int8)
+        else:
+            values = reformed[indices].astype(np.float64) - baseline[indices]
+        return cls(indices, values, len(baseline), entity)
+
+    @classmethod
+    def empty(cls, size, entity="household", dtype=np.float64):
+        """A delta that changes nothing"""
+        return cls(np.zeros(0, dtype=np.int32), np.zeros(0, dtype=dtype), size, entity)
+
+    def __len__(self):
+        return len(self.indices)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the indices and values"""
+        return self.indices.nbytes + self.values.nbytes
+
+    def dense(self):
+        """The delta as a full-length array"""
+        values = np.zeros(self.size, dtype=self.values.dtype)
+        values[self.indices] = self.values
+        return values
+
+    def apply(self, baseline):
+        """Reformed values: the baseline with the delta added, in the baseline's dtype"""
+        baseline = np.asarray(baseline)
+        reformed = baseline.copy()
+        if baseline.dtype == bool:
+            reformed[self.indices] = baseline[self.indices] + self.values > 0
+        else:
+            reformed[self.indices] = baseline[self.indices] + self.values
+        return reformed
+
+    def __add__(self, other):
+        """Sum of two deltas on the same entity"""
+        indices = np.union1d(self.indices, other.indices)
+        values = np.zeros(len(indices), dtype=np.result_type(self.values, other.values))
+        values[np.searchsorted(indices, self.indices)] += self.values
+        values[np.searchsorted(indices, other.indices)] += other.values
+        return SparseDelta(indices, values, self.size, self.entity)
+
+    def __neg__(self):
+        return SparseDelta(self.indices, -self.values, self.size, self.entity)
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def scale(self, factor):
+        """Delta multiplied by a scalar or by a per-entity factor"""
+        if not np.isscalar(factor):
+            factor = np.asarray(factor)[self.indices]
+        return SparseDelta(self.indices, self.values * factor, self.size, self.entity)
+
+    def total(self, weights=None):
+        """Weighted sum of the delta, accumulated in float64"""
+        if weights is None:
+            return np.sum(self.values, dtype=np.float64)
+        return np.sum(np.multiply(self.values, np.asarray(weights)[self.indices], dtype=np.float64))
+
+    def group_totals(self, groups, weights=None, n_groups=None):
+        """Weighted sum of the delta within each group, such as income deciles"""
+        groups = np.asarray(groups)[self.indices]
+        values = self.values.astype(np.float64)
+        if weights is not None:
+            values = values * np.asarray(weights)[self.indices]
+        return np.bincount(groups, weights=values, minlength=n_groups or 0)
+
+    def to_members(self, member_parent, entity="person"):
+        """Delta on each member of a changed parent, such as the people of a household
+
+        `member_parent` is the parent index of every member, as from
+        schema.person_household_index().
+        """
+        member_parent = np.asarray(member_parent)
+        if len(self.indices) == 0:
+            return SparseDelta.empty(len(member_parent), entity, self.values.dtype)
+        position = np.minimum(np.searchsorted(self.indices, member_parent), len(self.indices) - 1)
+        members = np.flatnonzero(self.indices[position] == member_parent)
+        return SparseDelta(members, self.values[position[members]], len(member_parent), entity)
+
+    def to_groups(self, member_parent, n_parents, entity="household"):
+        """Sum of member deltas within each parent, such as people into households"""
+        parents = np.asarray(member_parent)[self.indices]
+        indices, inverse = np.unique(parents, return_inverse=True)
+        values = np.bincount(inverse, weights=self.values, minlength=len(indices)).astype(self.values.dtype)
+        keep = values != 0
+        return SparseDelta(indices[keep], values[keep], n_parents, entity)
+
+    def arrays(self, prefix=""):
+        """Arrays to store the delta, e.g. in an .npz file"""
+        return {
+            f"{prefix}indices": self.indices,
+            f"{prefix}values": self.values,
+            f"{prefix}size": np.array(self.size),
+            f"{prefix}entity": np.array(self.entity),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix=""):
+        """Delta stored by arrays()"""
+        return cls(arrays[f"{prefix}indices"], arrays[f"{prefix}values"],
+                   int(arrays[f"{prefix}size"]), str(arrays[f"{prefix}entity"]))
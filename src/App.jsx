@@ -1,8 +1,9 @@
 'use client'
 
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import Sidebar from './components/Sidebar'
 import Results from './components/Results'
+import { fetchData, hasData } from './dataFiles'
 import './App.css'
 
 function App() {
@@ -81,36 +82,106 @@ function App() {
     window.history.replaceState({}, '', newUrl)
   }, [selectedPolicies, policyParams, isInitialized])
 
-  // Function to parse comprehensive CSV data
-  const parseComprehensiveCSV = (text, year, policy, parameter = null) => {
+  // Build the results index from the comprehensive CSV, for data directories without results-index.json
+  const indexComprehensiveCSV = (text) => {
     const lines = text.trim().split('\n')
-    const data = {}
+    const results = {}
 
     // Skip header line
     for (let i = 1; i < lines.length; i++) {
-      const values = lines[i].split(',')
-      const rowYear = values[0]
-      const rowPolicy = values[1]
-      const rowParameter = values[2] === '' || values[2] === 'None' ? null : parseFloat(values[2])
-      const metric = values[3]
-      const value = parseFloat(values[4])
-
-      // Filter for selected year, policy, and parameter (if applicable)
-      if (rowYear === year && rowPolicy === policy) {
-        if (policy === 'three-child-limit' || policy === 'under-five-exemption' || policy === 'lower-third-child-element') {
-          // For policies with parameters, match the specific parameter value
-          // Convert both to numbers for comparison to handle 3 vs 3.0
-          if (Number(rowParameter) === Number(parameter)) {
-            data[metric] = value
-          }
-        } else {
-          // For other policies, ignore parameter
-          data[metric] = value
+      const [year, policy, rawParameter, metric, value] = lines[i].split(',')
+      const parameter = rawParameter === '' || rawParameter === 'None' ? '' : String(Number(rawParameter))
+      results[policy] ??= {}
+      results[policy][parameter] ??= {}
+      results[policy][parameter][year] ??= {}
+      results[policy][parameter][year][metric] = parseFloat(value)
+    }
+
+    return { shared: {}, results }
+  }
+
+  // Pre-indexed results (see exports.py), fetched once
+  const resultsIndex = useRef(null)
+
+  const loadResultsIndex = () => {
+    if (!resultsIndex.current) {
+      resultsIndex.current = (async () => {
+        const indexResponse = await fetchData('results-index.json')
+        if (indexResponse.ok) {
+          return indexResponse.json()
         }
+        const response = await fetchData('all-results.csv')
+        if (!response.ok) {
+          throw new Error('Failed to load analysis data')
+        }
+        return indexComprehensiveCSV(await response.text())
+      })()
+      // Allow a retry after a failed load
+      resultsIndex.current.catch(() => {
+        resultsIndex.current = null
+      })
+    }
+    return resultsIndex.current
+  }
+
+  // Metrics of one policy setting in one year, with the metrics shared by the whole year
+  const lookupResults = (index, year, policy, parameter = null) => {
+    const key = parameter === null ? '' : String(Number(parameter))
+    const entry = index.results[policy]?.[key]?.[year]
+    return entry ? { ...index.shared[year], ...entry } : {}
+  }
+
+  // Response curves (see response_curves.py), fetched once if the manifest lists them
+  const responseCurves = useRef(null)
+
+  const loadResponseCurves = () => {
+    if (!responseCurves.current) {
+      responseCurves.current = (async () => {
+        if (!(await hasData('response-curves.json'))) return null
+        const response = await fetchData('response-curves.json')
+        return response.ok ? response.json() : null
+      })().catch(() => null)
+    }
+    return responseCurves.current
+  }
+
+  // Piecewise-linear lookup in a response curve table (see response_curves.py)
+  const interpolateCurve = (table, x, metric) => {
+    const xs = table.parameter
+    const ys = table[metric]
+    if (x <= xs[0]) return ys[0]
+    for (let i = 1; i < xs.length; i++) {
+      if (x <= xs[i]) {
+        const t = (x - xs[i - 1]) / (xs[i] - xs[i - 1])
+        return ys[i - 1] + t * (ys[i] - ys[i - 1])
       }
     }
+    return ys[ys.length - 1]
+  }
 
-    return data
+  // Results for a setting between grid points: nearest grid row, with headline metrics from the curve if there is one
+  const lookupWithCurve = (index, year, policy, parameter, curves) => {
+    const data = lookupResults(index, year, policy, parameter)
+    if (data.cost !== undefined) return data
+
+    const gridParameter = policy === 'lower-third-child-element' ? Math.round(parameter / 10) * 10 : parameter
+    const nearest = lookupResults(index, year, policy, gridParameter)
+    const table = curves?.curves?.[policy]?.[year]
+    if (!table) return nearest
+    const cost = interpolateCurve(table, parameter, 'cost')
+    const povertyRateReduction = interpolateCurve(table, parameter, 'povertyRateReduction')
+    return {
+      ...nearest,
+      cost,
+      childrenOutOfPoverty: interpolateCurve(table, parameter, 'childrenOutOfPoverty'),
+      povertyRateReduction,
+      reformedPovertyRate: nearest.baselinePovertyRate - povertyRateReduction,
+      costPerChild: nearest.cost ? nearest.costPerChild * cost / nearest.cost : nearest.costPerChild,
+      ...(policy === 'lower-third-child-element' && {
+        reductionRate: parameter / 100,
+        reducedElement: Math.round((nearest.standardElement || 3626) * parameter / 100),
+      }),
+    }
   }
 
   const handleAnalyze = async () => {
@@ -124,14 +195,9 @@ function App() {
     // setResults({})
 
     try {
-      // Fetch comprehensive CSV data
-      const response = await fetch(`${process.env.NEXT_PUBLIC_BASE_PATH || ""}/data/all-results.csv`)
-
-      if (!response.ok) {
-        throw new Error('Failed to load analysis data')
-      }
-
-      const csvText = await response.text()
+      const index = await loadResultsIndex()
+      // Response curves are optional: without them settings between grid points use the nearest grid row
+      const curves = await loadResponseCurves()
       const allResults = {}
 
       // Process each selected policy
@@ -152,7 +218,7 @@ function App() {
         // Get data for all years (2026-2029)
         const years = ['2026', '2027', '2028', '2029']
         const allYearsData = years.map(year => {
-          const yearData = parseComprehensiveCSV(csvText, year, selectedPolicy, parameter)
+          const yearData = lookupWithCurve(index, year, selectedPolicy, parameter, curves)
           return {
             year: year,
             cost: yearData.cost,
@@ -167,7 +233,7 @@ function App() {
         })
 
         // Get data for 2026 (for main results display)
-        const data2026 = parseComprehensiveCSV(csvText, '2026', selectedPolicy, parameter)
+        const data2026 = lookupWithCurve(index, '2026', selectedPolicy, parameter, curves)
         console.log(`Data for ${selectedPolicy}:`, data2026)
         console.log(`All years data for ${selectedPolicy}:`, allYearsData)
 
@@ -2,6 +2,7 @@
 
 import { useEffect, useRef, useState } from 'react'
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts'
+import { fetchData } from '../dataFiles'
 import './Results.css'
 
 function Results({ data, policies, policyParams }) {
@@ -262,66 +263,96 @@ function Results({ data, policies, policyParams }) {
     URL.revokeObjectURL(url)
   }
 
+  // Packed decile bundles (see exports.py), fetched once per year
+  const decileBundles = useRef({})
+
+  const loadDecileBundle = (year) => {
+    if (!decileBundles.current[year]) {
+      decileBundles.current[year] = (async () => {
+        const indexResponse = await fetchData(`deciles-${year}.json`)
+        if (!indexResponse.ok) {
+          throw new Error(`No decile bundle for ${year}`)
+        }
+        const index = await indexResponse.json()
+        const dataResponse = await fetchData(index.data)
+        if (!dataResponse.ok) {
+          throw new Error(`Failed to load ${index.data}: ${dataResponse.status}`)
+        }
+        const buffer = await dataResponse.arrayBuffer()
+        // One float32 per decile for every row in the index
+        const rowCount = Object.values(index.rows).reduce((count, rows) => count + Object.keys(rows).length, 0)
+        const expectedBytes = rowCount * index.deciles.length * Float32Array.BYTES_PER_ELEMENT
+        if (buffer.byteLength !== expectedBytes) {
+          throw new Error(`${index.data} has ${buffer.byteLength} bytes, expected ${expectedBytes}`)
+        }
+        const values = new Float32Array(buffer)
+        return { index, values }
+      })()
+      // Allow a retry after a failed load
+      decileBundles.current[year].catch(() => {
+        delete decileBundles.current[year]
+      })
+    }
+    return decileBundles.current[year]
+  }
+
+  // Relative change by decile for a policy setting, interpolating between grid settings
+  const sliceDeciles = (bundle, policyId, parameter) => {
+    const rows = bundle.index.rows[policyId]
+    if (!rows) return null
+    const width = bundle.index.deciles.length
+    const row = (index) => bundle.values.subarray(index * width, (index + 1) * width)
+
+    const key = parameter === null ? '' : String(parameter)
+    if (rows[key] !== undefined) return row(rows[key])
+    if (parameter === null) return null
+
+    const settings = Object.keys(rows).map(Number).sort((a, b) => a - b)
+    const upper = settings.find(value => value > parameter)
+    const lower = settings.filter(value => value < parameter).pop()
+    if (upper === undefined || lower === undefined) return null
+
+    const t = (parameter - lower) / (upper - lower)
+    const lowerRow = row(rows[String(lower)])
+    const upperRow = row(rows[String(upper)])
+    return lowerRow.map((value, i) => value + t * (upperRow[i] - value))
+  }
+
   // Load distributional analysis data for all selected policies
   useEffect(() => {
     const loadDistData = async () => {
       try {
+        const bundle = await loadDecileBundle(distYear)
         const allDistData = {}
 
-        // Track which policies have data loaded
-        const policiesWithData = []
-
-        // Load distributional data for each selected policy
         for (const policyId of policies) {
-          let filename = ''
           const params = policyParams?.[policyId]
+          let parameter = null
 
-          if (policyId === 'full-abolition') {
-            filename = `distributional-analysis-full-abolition-${distYear}.csv`
-          } else if (policyId === 'three-child-limit' && params?.childLimit) {
-            filename = `distributional-analysis-three-child-limit-${distYear}-limit${params.childLimit}.csv`
+          if (policyId === 'three-child-limit' && params?.childLimit) {
+            parameter = params.childLimit
           } else if (policyId === 'under-five-exemption' && params?.ageLimit) {
-            filename = `distributional-analysis-under-five-exemption-${distYear}-age${params.ageLimit}.csv`
-          } else if (policyId === 'disabled-child-exemption') {
-            filename = `distributional-analysis-disabled-child-exemption-${distYear}.csv`
-          } else if (policyId === 'working-families-exemption') {
-            filename = `distributional-analysis-working-families-exemption-${distYear}.csv`
+            parameter = params.ageLimit
           } else if (policyId === 'lower-third-child-element' && params?.reductionRate) {
-            const ratePct = Math.round(params.reductionRate * 100)
-            filename = `distributional-analysis-lower-third-child-element-${distYear}-rate${ratePct}.csv`
-          } else {
+            parameter = Math.round(params.reductionRate * 100)
+          } else if (!['full-abolition', 'disabled-child-exemption', 'working-families-exemption'].includes(policyId)) {
             // Skip policies that don't have distributional analysis
             continue
           }
 
-          try {
-            const response = await fetch(`${process.env.NEXT_PUBLIC_BASE_PATH || ""}/data/${filename}`)
-            if (response.ok) {
-              const csvText = await response.text()
-              const lines = csvText.trim().split('\n')
-
-              // Skip header line
-              for (let i = 1; i < lines.length; i++) {
-                const values = lines[i].split(',')
-                const decile = parseInt(values[0])
-                const relativeChange = parseFloat(values[1])
-
-                if (!allDistData[decile]) {
-                  allDistData[decile] = { decile }
-                }
-                allDistData[decile][policyId] = relativeChange
-              }
-
-              // Mark this policy as having data
-              if (!policiesWithData.includes(policyId)) {
-                policiesWithData.push(policyId)
-              }
-            } else {
-              console.log(`No distributional data file found for ${policyId}: ${filename}`)
-            }
-          } catch (err) {
-            console.error(`Failed to load distributional data for ${policyId}:`, err)
+          const deciles = sliceDeciles(bundle, policyId, parameter)
+          if (!deciles) {
+            console.log(`No distributional data found for ${policyId}: ${parameter}`)
+            continue
           }
+
+          bundle.index.deciles.forEach((decile, i) => {
+            if (Number.isNaN(deciles[i])) return
+            if (!allDistData[decile]) {
+              allDistData[decile] = { decile }
+            }
+            allDistData[decile][policyId] = deciles[i]
+          })
         }
 
         // Convert to array format for recharts
@@ -132,7 +132,7 @@ function Sidebar({ selectedPolicies, onPolicyToggle, policyParams, onParamChange
                 type="range"
                 min="0.5"
                 max="1"
-                step="0.1"
+                step="0.01"
                 value={params.reductionRate || 0.7}
                 onChange={(e) => onParamChange(policyId, 'reductionRate', parseFloat(e.target.value))}
                 style={{
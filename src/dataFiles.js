@@ -0,0 +1,28 @@
+// Resolves logical data file names to the content-hashed files listed in
+// data/manifest.json (see exports.py), falling back to the plain names.
+
+const dataPath = () => `${process.env.NEXT_PUBLIC_BASE_PATH || ""}/data`
+
+let manifestRequest = null
+
+const loadManifest = () => {
+  if (!manifestRequest) {
+    manifestRequest = fetch(`${dataPath()}/manifest.json`, { cache: 'no-cache' })
+      .then(response => (response.ok ? response.json() : { files: {} }))
+      .catch(() => ({ files: {} }))
+  }
+  return manifestRequest
+}
+
+export const dataUrl = async (name) => {
+  const manifest = await loadManifest()
+  return `${dataPath()}/${manifest.files?.[name]?.file || name}`
+}
+
+export const fetchData = async (name) => fetch(await dataUrl(name))
+
+// Whether the manifest lists a file, for optional files that may not be published
+export const hasData = async (name) => {
+  const manifest = await loadManifest()
+  return Boolean(manifest.files?.[name])
+}
@@ -0,0 +1,584 @@
+"""
+Synthetic FRS-shaped population for offline runs and benchmarks.
+
+Generates persons, benefit units and households with ages, weights,
+employment income and family sizes in the same entity structure as the
+enhanced FRS, plus a small stand-in for the PolicyEngine UK model so the
+pipeline can run against it without network access:
+
+    python synthetic_frs.py --persons 1000000 --seed 0 --output synthetic.npz
+    python generate_all_csvs.py --dataset synthetic.npz --output-dir synthetic_output
+
+A dataset can also be given inline as "synthetic:<persons>[:<seed>]".
+The tax-benefit rules below are deliberately simplified: they reproduce the
+shape of the two-child limit (child elements, tapers, poverty lines), not
+official figures.
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+from microdf import MicroSeries
+
+DATASET_YEAR = 2023
+DEFAULT_PERIOD = 2026
+
+# Weighted totals the household weights are scaled to
+UK_POPULATION = 67_000_000
+
+REGIONS = [
+    'NORTH_EAST', 'NORTH_WEST', 'YORKSHIRE', 'EAST_MIDLANDS', 'WEST_MIDLANDS',
+    'EAST_OF_ENGLAND', 'LONDON', 'SOUTH_EAST', 'SOUTH_WEST', 'WALES',
+    'SCOTLAND', 'NORTHERN_IRELAND',
+]
+REGION_SHARES = [0.04, 0.11, 0.08, 0.07, 0.09, 0.09, 0.13, 0.14, 0.08, 0.05, 0.09, 0.03]
+
+# Probability of 0, 1, 2, ... children in the first benefit unit of a household
+CHILD_COUNT_PROBABILITIES = [0.64, 0.14, 0.13, 0.055, 0.022, 0.008, 0.005]
+
+# 2026-27 annual amounts, uprated by CPI for later years
+UC_STANDARD_ALLOWANCE_SINGLE = 4_802
+UC_STANDARD_ALLOWANCE_COUPLE = 7_537
+UC_CHILD_ELEMENT = 3_626
+UC_WORK_ALLOWANCE = 5_000
+UC_TAPER = 0.55
+CTC_CHILD_ELEMENT = 3_455
+CTC_THRESHOLD = 7_955
+CTC_TAPER = 0.41
+CHILD_BENEFIT_ELDEST = 1_355
+CHILD_BENEFIT_ADDITIONAL = 897
+PERSONAL_ALLOWANCE = 12_570
+HIGHER_RATE_THRESHOLD = 50_270
+CPI_GROWTH = 0.02
+EARNINGS_GROWTH = 0.03
+
+# Absolute poverty lines are 60% of this year's median, held constant in real terms, as in HBAI
+POVERTY_REFERENCE_YEAR = 2025
+
+UC_CHILD_LIMIT_PARAMETER = "gov.dwp.universal_credit.elements.child.limit.child_count"
+CTC_CHILD_LIMIT_PARAMETER = "gov.dwp.tax_credits.child_tax_credit.limit.child_count"
+DEFAULT_CHILD_LIMIT = 2
+CHILD_LIMIT_START_YEAR = 2017
+
+
+# Stored arrays indexed by each entity
+ENTITY_ARRAYS = {
+    'person': ['person_benunit', 'age', 'employment_income', 'dla', 'pip'],
+    'benunit': ['benunit_household', 'claims_legacy_benefits', 'takes_up_benefits'],
+    'household': ['household_weight', 'region', 'rent', 'mortgage'],
+}
+
+# Format marker in the metadata of every population saved by SyntheticFRS.save()
+FILE_FORMAT = "synthetic_frs"
+
+# Input variables uprated from the stored arrays to each year
+UPRATED_INPUTS = ['employment_income', 'dla', 'pip', 'rent', 'housing_costs']
+
+
+class SyntheticFRS:
+    """Entity arrays for a synthetic FRS-shaped population
+
+    `inputs` holds variables already uprated to a year, keyed by (variable,
+    year), as restored from a snapshot (see dataset_snapshots.py).
+    """
+
+    def __init__(self, arrays, persons, seed, inputs=None):
+        self.arrays = arrays
+        self.persons = persons
+        self.seed = seed
+        self.inputs = inputs or {}
+        self.person_benunit = arrays['person_benunit']
+        self.benunit_household = arrays['benunit_household']
+        self.person_household = self.benunit_household[self.person_benunit]
+        self.baseline_simulation = None
+        self.count = {
+            'person': len(self.person_benunit),
+            'benunit': len(self.benunit_household),
+            'household': len(arrays['household_weight']),
+        }
+
+    @property
+    def name(self):
+        return f"synthetic:{self.persons}:{self.seed}"
+
+    def save(self, path):
+        """Save the population to a compressed .npz file"""
+        meta = json.dumps({'format': FILE_FORMAT, 'persons': self.persons, 'seed': self.seed})
+        np.savez_compressed(path, meta=np.array(meta), **self.arrays)
+        print(f"Saved: {path}")
+
+    def subset(self, households, household_weight):
+        """Population of the given households (sorted indices) with new household weights"""
+        keep_household = np.zeros(self.count['household'], dtype=bool)
+        keep_household[households] = True
+        keep_benunit = keep_household[self.benunit_household]
+        keep_person = keep_benunit[self.person_benunit]
+
+        arrays = {name: self.arrays[name][households] for name in ENTITY_ARRAYS['household']}
+        arrays.update({name: self.arrays[name][keep_benunit] for name in ENTITY_ARRAYS['benunit']})
+        arrays.update({name: self.arrays[name][keep_person] for name in ENTITY_ARRAYS['person']})
+
+        # Renumber the entity links within the subset
+        arrays['benunit_household'] = (np.cumsum(keep_household) - 1)[arrays['benunit_household']].astype(np.int32)
+        arrays['person_benunit'] = (np.cumsum(keep_benunit) - 1)[arrays['person_benunit']].astype(np.int32)
+        arrays['household_weight'] = np.asarray(household_weight, dtype=np.float32)
+        return SyntheticFRS(arrays, int(keep_person.sum()), self.seed)
+
+    @classmethod
+    def load(cls, path):
+        """Load a population written by save()"""
+        if not is_synthetic_file(path):
+            raise ValueError(f"{path} is not a synthetic population saved by synthetic_frs.py")
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            arrays = {key: data[key] for key in data.files if key != 'meta'}
+        return cls(arrays, meta['persons'], meta['seed'])
+
+
+def generate_synthetic_frs(persons=100_000, seed=0):
+    """Generate a synthetic population of approximately `persons` people"""
+    rng = np.random.default_rng(seed)
+
+    # Households hold one family unit, sometimes plus a single non-dependent adult
+    n_households = int(persons / 2.3) + 16
+    second_benunit = rng.random(n_households) < 0.1
+    benunits_per_household = 1 + second_benunit
+    benunit_household = np.repeat(np.arange(n_households), benunits_per_household)
+    is_first_benunit = np.ones(len(benunit_household), dtype=bool)
+    is_first_benunit[1:] = benunit_household[1:] != benunit_household[:-1]
+
+    n_benunits = len(benunit_household)
+    n_adults = np.where(is_first_benunit, 1 + (rng.random(n_benunits) < 0.55), 1)
+    n_children = rng.choice(len(CHILD_COUNT_PROBABILITIES), size=n_benunits, p=CHILD_COUNT_PROBABILITIES)
+    n_children[~is_first_benunit] = 0
+    benunit_size = n_adults + n_children
+
+    # Trim to the first households covering the requested population
+    household_size = np.bincount(benunit_household, weights=benunit_size, minlength=n_households)
+    household_start = np.cumsum(household_size) - household_size
+    n_households = max(1, int(np.searchsorted(household_start, persons, side='left')))
+    keep = benunit_household < n_households
+    benunit_household = benunit_household[keep]
+    is_first_benunit = is_first_benunit[keep]
+    n_adults = n_adults[keep]
+    n_children = n_children[keep]
+    benunit_size = benunit_size[keep]
+    n_benunits = len(benunit_household)
+
+    # Persons: adults first, then children in birth order within each benefit unit
+    person_benunit = np.repeat(np.arange(n_benunits), benunit_size)
+    benunit_start = np.cumsum(benunit_size) - benunit_size
+    position = np.arange(len(person_benunit)) - benunit_start[person_benunit]
+    is_adult = position < n_adults[person_benunit]
+    n_persons = len(person_benunit)
+
+    age = np.where(
+        is_adult,
+        rng.integers(18, 81, n_persons),
+        rng.integers(0, 18, n_persons),
+    )
+    # Oldest child first, so position matches child_index
+    child_rows = np.flatnonzero(~is_adult)
+    child_ages = age[child_rows]
+    sort_within = np.lexsort((-child_ages, person_benunit[child_rows]))
+    age[child_rows] = child_ages[sort_within]
+
+    # Employment is clustered by family and lower in larger families
+    family_propensity = rng.normal(0, 0.6, n_benunits)
+    employment_probability = np.where(n_children[person_benunit] >= 3, 0.55, 0.75)
+    employed = is_adult & (age < 66) & (rng.random(n_persons) < employment_probability)
+    log_earnings = 10.1 + family_propensity[person_benunit] + rng.normal(0, 0.5, n_persons)
+    employment_income = np.where(employed, np.exp(log_earnings), 0)
+
+    disabled_child = ~is_adult & (rng.random(n_persons) < 0.06)
+    disabled_adult = is_adult & (rng.random(n_persons) < 0.08)
+    dla = np.where(disabled_child, rng.normal(4_500, 1_200, n_persons).clip(1_500), 0)
+    pip = np.where(disabled_adult, rng.normal(6_000, 2_000, n_persons).clip(1_500), 0)
+
+    claims_legacy_benefits = (n_children > 0) & (rng.random(n_benunits) < 0.04)
+    takes_up_benefits = rng.random(n_benunits) < 0.9
+
+    household_income_rank = np.bincount(
+        benunit_household, weights=family_propensity, minlength=n_households
+    )
+    renter = rng.random(n_households) < np.where(household_income_rank < 0, 0.55, 0.2)
+    owner_with_mortgage = ~renter & (rng.random(n_households) < 0.4)
+    rent = np.where(renter, rng.lognormal(np.log(8_500), 0.35, n_households), 0)
+    mortgage = np.where(owner_with_mortgage, rng.lognormal(np.log(7_000), 0.4, n_households), 0)
+    region = rng.choice(len(REGIONS), size=n_households, p=REGION_SHARES)
+
+    household_weight = rng.lognormal(0, 0.3, n_households)
+    household_weight *= UK_POPULATION / (household_weight * np.bincount(
+        benunit_household, weights=benunit_size, minlength=n_households
+    )).sum()
+
+    arrays = {
+        'person_benunit': person_benunit.astype(np.int32),
+        'age': age.astype(np.int16),
+        'employment_income': employment_income.astype(np.float32),
+        'dla': dla.astype(np.float32),
+        'pip': pip.astype(np.float32),
+        'benunit_household': benunit_household.astype(np.int32),
+        'claims_legacy_benefits': claims_legacy_benefits,
+        'takes_up_benefits': takes_up_benefits,
+        'household_weight': household_weight.astype(np.float32),
+        'region': region.astype(np.int8),
+        'rent': rent.astype(np.float32),
+        'mortgage': mortgage.astype(np.float32),
+    }
+    return SyntheticFRS(arrays, persons, seed)
+
+
+_loaded_datasets = {}
+
+
+def is_synthetic_file(path):
+    """Whether a file holds a population saved by SyntheticFRS.save(), going by its format marker"""
+    try:
+        with np.load(path) as data:
+            if not hasattr(data, 'files') or 'meta' not in data.files:
+                return False
+            meta = json.loads(str(data['meta']))
+    except (OSError, ValueError):
+        return False
+    return isinstance(meta, dict) and meta.get('format') == FILE_FORMAT
+
+
+def is_synthetic_dataset(dataset):
+    """Whether a dataset reference points at a synthetic population
+
+    Only "synthetic:" references, SyntheticFRS objects and files carrying the
+    synthetic format marker count, so other .npz files (such as snapshots of a
+    PolicyEngine dataset) never run under the synthetic model.
+    """
+    if isinstance(dataset, SyntheticFRS):
+        return True
+    if not isinstance(dataset, str):
+        return False
+    return dataset.startswith("synthetic:") or (dataset.endswith(".npz") and is_synthetic_file(dataset))
+
+
+def load_synthetic_frs(dataset):
+    """Resolve a synthetic dataset reference, generating or loading it once per process"""
+    if isinstance(dataset, SyntheticFRS):
+        return dataset
+    if dataset not in _loaded_datasets:
+        if dataset.startswith("synthetic:"):
+            spec = dataset.split(":")[1:]
+            persons = int(spec[0])
+            seed = int(spec[1]) if len(spec) > 1 else 0
+            _loaded_datasets[dataset] = generate_synthetic_frs(persons, seed)
+        else:
+            _loaded_datasets[dataset] = SyntheticFRS.load(dataset)
+    return _loaded_datasets[dataset]
+
+
+class Scenario:
+    """Parameter changes in the same shape as policyengine_uk.Scenario"""
+
+    def __init__(self, parameter_changes=None):
+        self.parameter_changes = parameter_changes or {}
+
+
+def _weighted_quantile(values, weights, quantile):
+    order = np.argsort(values, kind='stable')
+    cumulative = np.cumsum(weights[order])
+    index = np.searchsorted(cumulative, quantile * cumulative[-1])
+    return values[order][min(index, len(values) - 1)]
+
+
+class SyntheticMicrosimulation:
+    """Stand-in for policyengine_uk.Microsimulation over a synthetic population"""
+
+    def __init__(self, dataset=None, scenario=None):
+        self.data = load_synthetic_frs(dataset or "synthetic:100000:0")
+        self.scenario = scenario
+        self._cache = {key: (VARIABLES[key[0]][0], values) for key, values in self.data.inputs.items()}
+
+    # ----- Entities and mapping -----
+
+    def _entity_index(self, entity):
+        if entity == 'benunit':
+            return self.data.person_benunit
+        if entity == 'household':
+            return self.data.person_household
+        return None
+
+    def _map(self, values, entity, target):
+        if entity == target:
+            return values
+        if entity == 'person':
+            index = self._entity_index(target)
+            return np.bincount(index, weights=values, minlength=self.data.count[target])
+        if target == 'person':
+            return values[self._entity_index(entity)]
+        if entity == 'benunit':
+            return np.bincount(self.data.benunit_household, weights=values,
+                               minlength=self.data.count['household'])
+        return values[self.data.benunit_household]
+
+    def _person_sum(self, values, target):
+        return self._map(values, 'person', target)
+
+    # ----- Parameters -----
+
+    def _parameter(self, name, year, default):
+        changes = getattr(self.scenario, 'parameter_changes', None) or {}
+        value = default
+        applicable = [
+            (int(str(start)[:4]), setting)
+            for start, setting in changes.get(name, {}).items()
+            if int(str(start)[:4]) <= year
+        ]
+        if applicable:
+            value = max(applicable, key=lambda item: item[0])[1]
+        return value
+
+    def _baseline(self):
+        if self.scenario is None:
+            return self
+        # Kept on the population itself, so a subset never reuses another population's baseline
+        if self.data.baseline_simulation is None:
+            self.data.baseline_simulation = SyntheticMicrosimulation(self.data)
+        return self.data.baseline_simulation
+
+    # ----- Public API -----
+
+    def calculate(self, variable, period=None, map_to=None):
+        """Calculate a variable for a year, optionally mapped to another entity"""
+        year = int(period or DEFAULT_PERIOD)
+        entity, values = self._compute(variable, year)
+        target = map_to or entity
+        if values.dtype.kind in 'biuf':
+            values = self._map(values, entity, target)
+        elif entity != target:
+            values = values[self._entity_index(entity)]
+        weights = self._compute(f"{target}_weight", year)[1]
+        return MicroSeries(values, weights=weights)
+
+    def _compute(self, variable, year):
+        key = (variable, year)
+        if key not in self._cache:
+            if variable not in VARIABLES:
+                raise ValueError(f"Variable {variable} is not in the synthetic model")
+            entity, formula = VARIABLES[variable]
+            self._cache[key] = (entity, np.asarray(formula(self, year)))
+        return self._cache[key]
+
+    def _get(self, variable, year):
+        return self._compute(variable, year)[1]
+
+
+# ===== VARIABLE FORMULAS =====
+
+def _cpi(year):
+    return (1 + CPI_GROWTH) ** (year - 2026)
+
+
+def _earnings_growth(year):
+    return (1 + EARNINGS_GROWTH) ** (year - DATASET_YEAR)
+
+
+def _child_index(sim, year):
+    is_child = sim._get('is_child', year)
+    benunit = sim.data.person_benunit
+    # Children are stored after adults in birth order within each benefit unit
+    child_rank = np.cumsum(is_child) - 1
+    rows = np.flatnonzero(is_child)
+    first_child_rank = np.full(sim.data.count['benunit'], len(is_child))
+    np.minimum.at(first_child_rank, benunit[rows], child_rank[rows])
+    return np.where(is_child, child_rank - first_child_rank[benunit] + 1, 0)
+
+
+def _child_eligible(sim, year, limit):
+    child_index = sim._get('child_index', year)
+    born_before = sim._get('uc_is_child_born_before_child_limit', year)
+    return sim._get('is_child', year) & ((child_index <= limit) | born_before)
+
+
+def _uc_child_limit(sim, year):
+    return sim._parameter(UC_CHILD_LIMIT_PARAMETER, year, DEFAULT_CHILD_LIMIT)
+
+
+def _ctc_child_limit(sim, year):
+    return sim._parameter(CTC_CHILD_LIMIT_PARAMETER, year, DEFAULT_CHILD_LIMIT)
+
+
+def _universal_credit_for_limit(sim, year, limit):
+    elements = np.where(_child_eligible(sim, year, limit), UC_CHILD_ELEMENT * _cpi(year), 0)
+    n_adults = sim._person_sum(sim._get('is_adult', year).astype(float), 'benunit')
+    n_children = sim._person_sum(sim._get('is_child', year).astype(float), 'benunit')
+    standard_allowance = np.where(n_adults > 1, UC_STANDARD_ALLOWANCE_COUPLE, UC_STANDARD_ALLOWANCE_SINGLE)
+    housing = sim._map(sim._get('rent', year), 'household', 'benunit')
+    is_first_benunit = np.ones(sim.data.count['benunit'], dtype=bool)
+    is_first_benunit[1:] = sim.data.benunit_household[1:] != sim.data.benunit_household[:-1]
+    maximum = standard_allowance * _cpi(year) + sim._person_sum(elements, 'benunit') + housing * is_first_benunit
+    earnings = sim._person_sum(sim._get('employment_income', year), 'benunit')
+    work_allowance = np.where(n_children > 0, UC_WORK_ALLOWANCE * _cpi(year), 0)
+    entitlement = np.maximum(0, maximum - UC_TAPER * np.maximum(0, earnings - work_allowance))
+    claimant = sim.data.arrays['takes_up_benefits'] & ~sim.data.arrays['claims_legacy_benefits']
+    return np.where(claimant, entitlement, 0)
+
+
+def _child_tax_credit_for_limit(sim, year, limit):
+    elements = np.where(_child_eligible(sim, year, limit), CTC_CHILD_ELEMENT * _cpi(year), 0)
+    maximum = sim._person_sum(elements, 'benunit')
+    earnings = sim._person_sum(sim._get('employment_income', year), 'benunit')
+    entitlement = np.maximum(0, maximum - CTC_TAPER * np.maximum(0, earnings - CTC_THRESHOLD * _cpi(year)))
+    claimant = sim.data.arrays['takes_up_benefits'] & sim.data.arrays['claims_legacy_benefits']
+    return np.where(claimant, entitlement, 0)
+
+
+def _income_tax(sim, year):
+    income = sim._get('employment_income', year)
+    basic = np.clip(income - PERSONAL_ALLOWANCE, 0, HIGHER_RATE_THRESHOLD - PERSONAL_ALLOWANCE)
+    higher = np.maximum(0, income - HIGHER_RATE_THRESHOLD)
+    return 0.2 * basic + 0.4 * higher
+
+
+def _national_insurance(sim, year):
+    income = sim._get('employment_income', year)
+    main = np.clip(income - PERSONAL_ALLOWANCE, 0, HIGHER_RATE_THRESHOLD - PERSONAL_ALLOWANCE)
+    upper = np.maximum(0, income - HIGHER_RATE_THRESHOLD)
+    return 0.08 * main + 0.02 * upper
+
+
+def _child_benefit(sim, year):
+    n_children = sim._person_sum(sim._get('is_child', year).astype(float), 'benunit')
+    amount = CHILD_BENEFIT_ELDEST + CHILD_BENEFIT_ADDITIONAL * np.maximum(0, n_children - 1)
+    return np.where(n_children > 0, amount * _cpi(year), 0)
+
+
+def _household_net_income(sim, year):
+    person_income = (
+        sim._get('employment_income', year)
+        - sim._get('income_tax', year)
+        - sim._get('national_insurance', year)
+        + sim._get('dla', year)
+        + sim._get('pip', year)
+    )
+    benunit_income = (
+        sim._get('universal_credit', year)
+        + sim._get('child_tax_credit', year)
+        + sim._get('child_benefit', year)
+    )
+    return sim._person_sum(person_income, 'household') + sim._map(benunit_income, 'benunit', 'household')
+
+
+def _equivalisation(sim, year, first_adult, other_adult, young_child):
+    age = sim._get('age', year)
+    household = sim.data.person_household
+    older = (age >= 14).astype(float)
+    n_older = np.bincount(household, weights=older, minlength=sim.data.count['household'])
+    n_young = np.bincount(household, weights=1 - older, minlength=sim.data.count['household'])
+    return first_adult + other_adult * np.maximum(0, n_older - 1) + young_child * n_young
+
+
+def _equiv_income_bhc(sim, year):
+    return sim._get('household_net_income', year) / sim._get('household_equivalisation_bhc', year)
+
+
+def _equiv_income_ahc(sim, year):
+    income = sim._get('household_net_income', year) - sim._get('housing_costs', year)
+    return income / _equivalisation(sim, year, 0.58, 0.42, 0.2)
+
+
+def _poverty_threshold(income_variable):
+    def formula(sim, year):
+        # Lines are fixed by the baseline so reforms cannot move them
+        baseline = sim._baseline()
+        income = baseline._get(income_variable, POVERTY_REFERENCE_YEAR)
+        weights = (baseline._get('household_weight', POVERTY_REFERENCE_YEAR)
+                   * baseline._get('household_count_people', POVERTY_REFERENCE_YEAR))
+        median = _weighted_quantile(income, weights, 0.5)
+        return np.full(sim.data.count['household'], 0.6 * median * _cpi(year) / _cpi(POVERTY_REFERENCE_YEAR))
+    return formula
+
+
+def _household_income_decile(sim, year):
+    income = sim._get('equiv_hbai_household_net_income', year)
+    weights = sim._get('household_weight', year) * sim._get('household_count_people', year)
+    order = np.argsort(income, kind='stable')
+    cumulative = np.cumsum(weights[order])
+    decile = np.empty(len(income), dtype=np.int64)
+    decile[order] = np.minimum(10, np.floor(10 * (cumulative - weights[order] / 2) / cumulative[-1]) + 1)
+    return decile
+
+
+VARIABLES = {
+    # Identifiers and weights
+    'person_id': ('person', lambda sim, year: np.arange(sim.data.count['person'])),
+    'benunit_id': ('benunit', lambda sim, year: np.arange(sim.data.count['benunit'])),
+    'household_id': ('household', lambda sim, year: np.arange(sim.data.count['household'])),
+    'household_weight': ('household', lambda sim, year: sim.data.arrays['household_weight'].astype(float)),
+    'benunit_weight': ('benunit', lambda sim, year: sim._map(sim._get('household_weight', year), 'household', 'benunit')),
+    'person_weight': ('person', lambda sim, year: sim._map(sim._get('household_weight', year), 'household', 'person')),
+    'household_count_people': ('household', lambda sim, year: np.bincount(
+        sim.data.person_household, minlength=sim.data.count['household']).astype(float)),
+    'region': ('household', lambda sim, year: np.array(REGIONS)[sim.data.arrays['region']]),
+
+    # Demographics
+    'age': ('person', lambda sim, year: sim.data.arrays['age'].astype(float)),
+    'is_child': ('person', lambda sim, year: sim._get('age', year) < 18),
+    'is_adult': ('person', lambda sim, year: ~sim._get('is_child', year)),
+    'child_index': ('person', _child_index),
+    'uc_is_child_born_before_child_limit': ('person', lambda sim, year: sim._get('is_child', year) & (
+        DATASET_YEAR - sim._get('age', year) < CHILD_LIMIT_START_YEAR)),
+
+    # Earnings and taxes
+    'employment_income': ('person', lambda sim, year: sim.data.arrays['employment_income'] * _earnings_growth(year)),
+    'employment_status': ('person', lambda sim, year: np.where(
+        sim._get('employment_income', year) > 0, 'FT_EMPLOYED', 'UNEMPLOYED')),
+    'income_tax': ('person', _income_tax),
+    'national_insurance': ('person', _national_insurance),
+
+    # Disability benefits
+    'dla': ('person', lambda sim, year: sim.data.arrays['dla'] * _cpi(year)),
+    'pip': ('person', lambda sim, year: sim.data.arrays['pip'] * _cpi(year)),
+
+    # Child limit and means-tested benefits
+    'uc_individual_child_element': ('person', lambda sim, year: np.where(
+        _child_eligible(sim, year, _uc_child_limit(sim, year)), UC_CHILD_ELEMENT * _cpi(year), 0)),
+    'universal_credit': ('benunit', lambda sim, year: _universal_credit_for_limit(sim, year, _uc_child_limit(sim, year))),
+    'child_tax_credit': ('benunit', lambda sim, year: _child_tax_credit_for_limit(sim, year, _ctc_child_limit(sim, year))),
+    'child_benefit': ('benunit', _child_benefit),
+    'uc_is_child_limit_affected': ('person', lambda sim, year: sim._get('is_child', year) & ~_child_eligible(
+        sim, year, _uc_child_limit(sim, year)) & sim._map(
+        _universal_credit_for_limit(sim, year, np.inf) > sim._get('universal_credit', year), 'benunit', 'person')),
+    'ctc_child_limit_affected': ('benunit', lambda sim, year: (
+        _child_tax_credit_for_limit(sim, year, np.inf) > sim._get('child_tax_credit', year))),
+
+    # Household income and poverty
+    'household_net_income': ('household', _household_net_income),
+    'rent': ('household', lambda sim, year: sim.data.arrays['rent'] * _cpi(year)),
+    'housing_costs': ('household', lambda sim, year: sim._get('rent', year) + sim.data.arrays['mortgage'] * _cpi(year)),
+    'household_equivalisation_bhc': ('household', lambda sim, year: _equivalisation(sim, year, 0.67, 0.33, 0.2)),
+    'equiv_hbai_household_net_income': ('household', _equiv_income_bhc),
+    'equiv_hbai_household_net_income_ahc': ('household', _equiv_income_ahc),
+    'poverty_threshold_bhc': ('household', _poverty_threshold('equiv_hbai_household_net_income')),
+    'poverty_threshold_ahc': ('household', _poverty_threshold('equiv_hbai_household_net_income_ahc')),
+    'in_poverty_bhc': ('household', lambda sim, year: sim._get('equiv_hbai_household_net_income', year) < sim._get('poverty_threshold_bhc', year)),
+    'in_poverty_ahc': ('household', lambda sim, year: sim._get('equiv_hbai_household_net_income_ahc', year) < sim._get('poverty_threshold_ahc', year)),
+    'in_poverty': ('household', lambda sim, year: sim._get('in_poverty_bhc', year)),
+    'household_income_decile': ('household', _household_income_decile),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic FRS-shaped population")
+    parser.add_argument("--persons", type=int, default=100_000, help="approximate number of persons (10k to 10M)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="synthetic_frs.npz")
+    args = parser.parse_args()
+
+    data = generate_synthetic_frs(args.persons, args.seed)
+    print(f"Persons: {data.count['person']:,}  Benefit units: {data.count['benunit']:,}  "
+          f"Households: {data.count['household']:,}")
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    data.save(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Small enough for a full grid in seconds, large enough that every child limit changes some households
+DATASET = "synthetic:5000:0"
+
+
+def pipeline_command(directory, output_dir, *args):
+    """generate_all_csvs.py on the test dataset, keeping every cache under `directory`"""
+    return [sys.executable, "-W", "ignore", f"{ROOT}/generate_all_csvs.py", "--dataset", DATASET,
+            "--output-dir", str(output_dir), "--checkpoint-dir", str(directory / "checkpoints"),
+            "--snapshot-dir", str(directory / "snapshots"), "--profile-report", str(directory / "run-report.json"),
+            *args]
+
+
+def run_pipeline(directory, output_dir, *args):
+    """Run pipeline_command() to completion"""
+    subprocess.run(pipeline_command(directory, output_dir, *args), cwd=directory, check=True, capture_output=True)
+
+
+def output_files(output_dir):
+    """Relative path and contents of every file in an output directory"""
+    files = {}
+    for root, _, names in os.walk(output_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, output_dir)] = f.read()
+    return files
+
+
+@pytest.fixture(scope="session")
+def pipeline_output(tmp_path_factory):
+    """Output directory of one single-process run of the full grid"""
+    directory = tmp_path_factory.mktemp("pipeline")
+    run_pipeline(directory, directory / "output", "--check-poverty")
+    return directory / "output"
@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from bootstrap import Bootstrap
+
+
+@pytest.mark.parametrize("method", ["poisson", "bayesian"])
+def test_replicate_totals_match_reweighted_sums(method):
+    rng = np.random.default_rng(4)
+    weight = rng.uniform(100, 2_000, 300).astype(np.float32)
+    columns = [rng.normal(0, 1_000, 300).astype(np.float32), rng.integers(0, 4, 300)]
+    bootstrap = Bootstrap(replicates=20, method=method)
+
+    totals = bootstrap.replicate_totals(weight, columns)
+    multipliers = bootstrap.multipliers(300)
+    assert multipliers.dtype == np.float64 and bootstrap.multipliers(300) is multipliers
+    for r in range(20):
+        replicate_weight = multipliers[r] * weight
+        for k, column in enumerate(columns):
+            assert totals[r, k] == pytest.approx(np.sum(column * replicate_weight, dtype=np.float64), rel=1e-12)
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import DATASET
+from derived_reforms import abolition_deltas, delta_filename, delta_meta, load_deltas
+
+YEAR = 2026
+
+
+@pytest.fixture(scope="module")
+def stores(tmp_path_factory):
+    """A store built from the simulations, and the same store loaded back"""
+    directory = tmp_path_factory.mktemp("deltas")
+    built = abolition_deltas(DATASET, YEAR, str(directory / "deltas"), str(directory / "snapshots"))
+    return built, load_deltas(DATASET, YEAR, delta_meta(DATASET), str(directory / "deltas")), directory
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+def test_store_is_saved_under_its_dataset_and_model_and_loaded_back(stores):
+    built, loaded, directory = stores
+    assert loaded is not None and loaded.year == YEAR
+    for entity in ('household', 'benunit', 'child'):
+        for name, values in getattr(built, entity).items():
+            assert np.array_equal(getattr(loaded, entity)[name], values), f"{entity}/{name}"
+
+    other = {**delta_meta(DATASET), 'sample': 0.5}
+    assert delta_filename(DATASET, YEAR, other) != delta_filename(DATASET, YEAR, delta_meta(DATASET))
+    assert load_deltas(DATASET, YEAR, other, str(directory / "deltas")) is None
+
+
+def test_exempting_every_family_is_full_abolition(stores, pipeline_output):
+    _, deltas, _ = stores
+    results = pd.read_csv(pipeline_output / "all-results.csv")
+    full = results[(results['year'] == YEAR) & (results['policy'] == 'full-abolition')].set_index('metric')['value']
+
+    result = deltas.family_exemption(np.ones(len(deltas.benunit['weight']), dtype=bool))
+    assert result['cost'] == pytest.approx(full['cost'], rel=1e-12)
+    assert result['children_out_of_poverty'] == pytest.approx(full['childrenOutOfPoverty'], rel=1e-12)
+    assert result['families_share'] == pytest.approx(1)
+
+
+def test_exempting_every_limited_child_exempts_their_families(stores):
+    _, deltas, _ = stores
+    children = deltas.child_exemption(np.ones(len(deltas.child['weight']), dtype=bool))
+    families = deltas.family_exemption(deltas.benunit['limited_children'] > 0)
+    for measure in ('cost', 'children_out_of_poverty', 'children_exempt'):
+        assert children[measure] == pytest.approx(families[measure], rel=1e-12)
+
+
+def test_age_limits_match_the_published_grid(stores, pipeline_output):
+    _, deltas, _ = stores
+    results = pd.read_csv(pipeline_output / "all-results.csv")
+    ages = results[(results['year'] == YEAR) & (results['policy'] == 'under-five-exemption')]
+    assert len(ages)
+    for age, rows in ages.groupby('parameter'):
+        published = rows.set_index('metric')['value']
+        result = deltas.child_exemption(deltas.child['age'] < age)
+        assert result['cost'] == pytest.approx(published['cost'], rel=1e-12)
+        assert result['children_out_of_poverty'] == pytest.approx(published['childrenOutOfPoverty'], rel=1e-12)
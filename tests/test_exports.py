@@ -0,0 +1,56 @@
+import gzip
+import json
+import shutil
+
+import pandas as pd
+import pytest
+
+from exports import results_index, write_artefacts
+
+
+def test_artefacts_have_gzip_variants(pipeline_output, tmp_path):
+    output = tmp_path / "output"
+    shutil.copytree(pipeline_output, output)
+    manifest = json.loads((output / "manifest.json").read_text())['files']
+    assert manifest
+    for entry in manifest.values():
+        data = (output / entry['file']).read_bytes()
+        compressed = (output / f"{entry['file']}.gz").read_bytes()
+        assert gzip.decompress(compressed) == data
+        assert entry['gzipBytes'] == len(compressed)
+
+    # Variants of the previous generation are kept with their file, then pruned a generation later
+    previous = manifest['all-results.csv']['file']
+    with open(output / "all-results.csv", "a") as f:
+        f.write("\n")
+    write_artefacts(output)
+    assert (output / f"{previous}.gz").exists()
+    write_artefacts(output)
+    assert not (output / previous).exists() and not (output / f"{previous}.gz").exists()
+
+
+def test_only_baseline_figures_are_shared(tmp_path):
+    rows = [
+        (policy, parameter, 2026, metric, value)
+        for policy, parameter in [('full-abolition', None), ('lower-third-child-element', 50),
+                                  ('lower-third-child-element', 60)]
+        for metric, value in [('fullReformCost', 3e9), ('baselinePovertyRate', 0.18),
+                              ('cost', 1e9 if parameter == 50 else 2e9)]
+    ] + [
+        ('lower-third-child-element', rate, 2026, metric, value)
+        for rate in (50, 60) for metric, value in [('thirdPlusChildren', 1e6), ('standardElement', 3455.0)]
+    ]
+    pd.DataFrame(rows, columns=['policy', 'parameter', 'year', 'metric', 'value']).to_csv(
+        tmp_path / "all-results.csv", index=False)
+
+    index = results_index(tmp_path)
+    assert index['shared'] == {'2026': {'fullReformCost': 3e9, 'baselinePovertyRate': 0.18}}
+    for rate in ('50', '60'):
+        entry = index['results']['lower-third-child-element'][rate]['2026']
+        assert entry['thirdPlusChildren'] == 1e6 and entry['standardElement'] == 3455.0
+
+    rows[0] = ('full-abolition', None, 2026, 'fullReformCost', 4e9)
+    pd.DataFrame(rows, columns=['policy', 'parameter', 'year', 'metric', 'value']).to_csv(
+        tmp_path / "all-results.csv", index=False)
+    with pytest.raises(ValueError, match="fullReformCost differs"):
+        results_index(tmp_path)
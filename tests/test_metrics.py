@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from metrics import CHANGE_BANDS, decile_band_matrix, decile_changes, scenario_metrics
+
+
+@pytest.fixture
+def households():
+    rng = np.random.default_rng(1)
+    n = 2_000
+    baseline = rng.lognormal(10, 0.6, n).astype(np.float32)
+    # Scenarios changing a few households each, including losses and changes inside the no-change band
+    reformed = np.repeat(baseline[None], 4, axis=0)
+    for scenario in reformed:
+        changed = rng.random(n) < 0.1
+        scenario[changed] *= rng.choice([0.9, 0.99, 0.9995, 1.0005, 1.02, 1.2], changed.sum()).astype(np.float32)
+    return {
+        'baseline': baseline,
+        'reformed': reformed,
+        'weight': rng.uniform(100, 2_000, n).astype(np.float32),
+        'decile': rng.integers(1, 11, n),
+    }
+
+
+def test_scenario_metrics_match_single_scenarios(households):
+    baseline, weight, decile = households['baseline'], households['weight'], households['decile']
+    n_people = 3 * len(baseline)
+    rng = np.random.default_rng(2)
+    baseline_in_poverty = rng.random(n_people) < 0.2
+    reformed_in_poverty = np.array([baseline_in_poverty & (rng.random(n_people) > 0.05) for _ in households['reformed']])
+    child_weights = rng.random(n_people) * (rng.random(n_people) < 0.3)
+
+    sweep = scenario_metrics(baseline, households['reformed'], weight, decile,
+                             baseline_in_poverty, reformed_in_poverty, child_weights)
+    for i, reformed in enumerate(households['reformed']):
+        assert sweep['cost'][i] == pytest.approx(np.sum((reformed.astype(np.float64) - baseline) * weight), rel=1e-12)
+        children_out = (baseline_in_poverty.astype(float) - reformed_in_poverty[i]) @ child_weights
+        assert sweep['children_out_of_poverty'][i] == pytest.approx(children_out, rel=1e-12)
+
+        single = decile_changes(baseline, reformed, weight, decile)
+        np.testing.assert_allclose(single['avg_change'], sweep['avg_change'][i], rtol=4e-15, atol=0)
+        np.testing.assert_allclose(single['relative_change'], sweep['relative_change'][i], rtol=4e-15, atol=0)
+        np.testing.assert_allclose(single[CHANGE_BANDS].values, sweep['band_shares'][i], rtol=4e-15, atol=0)
+
+
+def test_band_shares_sum_to_one(households):
+    _, band_shares = decile_band_matrix(households['baseline'], households['reformed'],
+                                        households['weight'], households['decile'])
+    np.testing.assert_allclose(band_shares.sum(axis=2), 1)
+
+
+def test_bands_match_each_households_relative_change(households):
+    baseline, weight, decile = households['baseline'], households['weight'], households['decile']
+    deciles, band_shares = decile_band_matrix(baseline, households['reformed'], weight, decile)
+    edges = [-np.inf, -0.05, -0.001, 0.001, 0.05, np.inf]
+    for i, reformed in enumerate(households['reformed']):
+        relative_change = (reformed.astype(np.float64) - baseline) / np.maximum(baseline, 1)
+        for d, income_decile in enumerate(deciles):
+            in_decile = decile == income_decile
+            for band in range(len(CHANGE_BANDS)):
+                in_band = in_decile & (relative_change > edges[band]) & (relative_change <= edges[band + 1])
+                expected = weight[in_band].astype(np.float64).sum() / weight[in_decile].astype(np.float64).sum()
+                assert band_shares[i, d, band] == pytest.approx(expected, rel=1e-12, abs=1e-15)
@@ -0,0 +1,75 @@
+import subprocess
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import DATASET, output_files, pipeline_command
+from metrics import headline_impact
+from results_cube import ResultsCube
+from simulations import YEARS, abolition_simulation, baseline_simulation
+
+
+def results(output_dir):
+    frame = pd.read_csv(output_dir / "all-results.csv")
+    frame['parameter'] = frame['parameter'].fillna(-1).astype(int)
+    return frame.set_index(['year', 'policy', 'parameter', 'metric'])['value']
+
+
+def test_grid_runs_offline_on_the_synthetic_population(pipeline_output):
+    values = results(pipeline_output)
+    assert sorted(values.index.unique('year')) == YEARS
+    for year in YEARS:
+        assert values[(year, 'full-abolition', -1, 'cost')] > 0
+        assert values[(year, 'full-abolition', -1, 'childrenOutOfPoverty')] > 0
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+def test_compact_arrays_stay_close_to_the_float64_model(pipeline_output):
+    values = results(pipeline_output)
+    baseline = baseline_simulation(DATASET)
+    for year in YEARS:
+        impact = headline_impact(baseline, abolition_simulation(year, DATASET), year)
+        key = (year, 'full-abolition', -1)
+        assert values[key + ('cost',)] == pytest.approx(impact['cost'], rel=5e-6)
+        assert values[key + ('childrenOutOfPoverty',)] == pytest.approx(impact['children_out_of_poverty'], rel=5e-6)
+
+
+def test_queue_workers_match_a_single_process_run(pipeline_output, tmp_path):
+    command = pipeline_command(tmp_path, tmp_path / "output", "--queue", str(tmp_path / "queue"), "--lease", "60")
+    workers = [subprocess.Popen([*command, "--worker-id", f"worker-{i}"], cwd=tmp_path,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE) for i in range(2)]
+    for worker in workers:
+        _, stderr = worker.communicate()
+        assert worker.returncode == 0, stderr.decode()
+    expected = output_files(pipeline_output)
+    assert expected and output_files(tmp_path / "output") == expected
+
+
+def test_results_cube_reproduces_all_results(pipeline_output):
+    cube = ResultsCube.load(pipeline_output)
+    values = results(pipeline_output)
+    checked = 0
+    for year in cube.years:
+        for policy, parameter in zip(cube.policies, cube.parameters):
+            key = (year, policy, -1 if parameter is None else parameter)
+            if key + ('cost',) not in values.index:
+                continue
+            totals = cube.query(policy, parameter, year)
+            assert totals['cost'] == pytest.approx(values[key + ('cost',)], rel=1e-15)
+            assert totals['childrenOutOfPoverty'] == pytest.approx(values[key + ('childrenOutOfPoverty',)], rel=1e-15)
+            checked += 1
+    assert checked >= len(YEARS) * 3
+
+
+def test_absolute_poverty_measure_matches_the_headline(pipeline_output):
+    values = results(pipeline_output)
+    for year in YEARS:
+        measures = pd.read_csv(pipeline_output / f"poverty-measures-{year}.csv")
+        absolute = measures[measures['measure'] == 'absolute_bhc']
+        assert len(absolute)
+        for row in absolute.itertuples():
+            parameter = -1 if pd.isna(row.parameter) else int(row.parameter)
+            expected = values[(year, row.policy, parameter, 'childrenOutOfPoverty')]
+            assert np.isfinite(row.children_out_of_poverty)
+            assert row.children_out_of_poverty == pytest.approx(expected, rel=1e-10, abs=1e-6)
@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from poverty import weighted_medians
+
+
+def test_weighted_medians_match_microdf():
+    microdf = pytest.importorskip("microdf")
+    rng = np.random.default_rng(3)
+    values = rng.normal(20_000, 8_000, (5, 301))
+    weights = rng.uniform(0, 3, 301)
+    weights[::7] = 0
+    expected = [microdf.MicroSeries(row, weights=weights).median() for row in values]
+    np.testing.assert_array_equal(weighted_medians(values, weights), expected)
+
+
+def test_weighted_medians_with_ties_and_heavy_weights():
+    values = np.array([1.0, 2.0, 3.0, 4.0])
+    assert weighted_medians(values, np.array([1.0, 1.0, 5.0, 1.0]))[0] == 3.0
+    assert weighted_medians(values, np.array([1.0, 1.0, 1.0, 1.0]))[0] == 2.0
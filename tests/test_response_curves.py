@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from response_curves import CURVE_METRICS, curve_table, interpolate, refine_curve
+
+
+def curve(function):
+    return lambda x: {metric: function(x) for metric in CURVE_METRICS}
+
+
+def test_linear_curves_stop_after_one_midpoint():
+    evaluated = []
+
+    def evaluate(x):
+        evaluated.append(x)
+        return curve(lambda x: 3 * x + 1)(x)
+
+    assert list(refine_curve(evaluate, [50, 100], 1)) == [50, 75, 100]
+    assert sorted(evaluated) == [50, 75, 100]
+
+
+def test_bends_are_refined_to_the_tolerance():
+    function = lambda x: (x - 50) ** 2  # noqa: E731
+    points = refine_curve(curve(function), [50, 100], 1, tolerance=0.01)
+    assert 3 < len(points) < 51
+    table = curve_table(points)
+    errors = [abs(interpolate(table, x, 'cost') - function(x)) / function(100) for x in range(50, 101)]
+    assert max(errors) <= 0.01
+
+
+def test_published_curves_match_the_grid(pipeline_output):
+    manifest = json.loads((pipeline_output / "manifest.json").read_text())
+    assert 'response-curves.json' in manifest['files']
+
+    curves = json.loads((pipeline_output / "response-curves.json").read_text())['curves']
+    results = pd.read_csv(pipeline_output / "all-results.csv")
+    rows = results[results['policy'] == 'lower-third-child-element']
+    assert len(rows)
+    for (year, rate), setting in rows.groupby(['year', 'parameter']):
+        table = curves['lower-third-child-element'][str(year)]
+        values = setting.set_index('metric')['value']
+        for metric in CURVE_METRICS:
+            assert interpolate(table, rate, metric) == pytest.approx(values[metric], rel=1e-12)
+        assert np.all(np.diff(table['parameter']) > 0)
@@ -0,0 +1,63 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from conftest import DATASET
+from scenario_service import HOST, ScenarioPool, make_handler
+
+APP_ORIGIN = "http://localhost:3000"
+
+
+@pytest.fixture(scope="module")
+def service():
+    server = ThreadingHTTPServer((HOST, 0), make_handler(ScenarioPool(DATASET), [APP_ORIGIN]))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://{HOST}:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url, **headers):
+    """Status, headers and JSON body of a GET request"""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+            return response.status, response.headers, json.load(response)
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, json.load(error)
+
+
+def test_requests_from_outside_a_browser_are_served(service):
+    status, headers, body = get(f"{service}/health")
+    assert status == 200 and body['status'] == 'ok'
+    assert headers.get("Access-Control-Allow-Origin") is None
+
+
+def test_other_web_pages_are_refused(service):
+    for headers in ({'Origin': "https://example.com"}, {'Sec-Fetch-Site': "cross-site"}):
+        status, response_headers, body = get(f"{service}/scenario?year=2026", **headers)
+        assert status == 403 and "--allow-origin" in body['error']
+        assert response_headers.get("Access-Control-Allow-Origin") is None
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+def test_allowed_origin_is_echoed(service, pipeline_output):
+    status, headers, body = get(f"{service}/scenario?year=2026&age_limit=5", Origin=APP_ORIGIN)
+    assert status == 200
+    assert headers["Access-Control-Allow-Origin"] == APP_ORIGIN and headers["Vary"] == "Origin"
+
+    results = pd.read_csv(pipeline_output / "all-results.csv")
+    published = results[(results['year'] == 2026) & (results['policy'] == 'under-five-exemption')
+                        & (results['parameter'] == 5)].set_index('metric')['value']
+    # The service keeps float64 arrays, the pipeline compact ones
+    assert body['cost'] == pytest.approx(published['cost'], rel=5e-6)
+
+
+def test_invalid_settings_are_rejected(service):
+    status, _, body = get(f"{service}/scenario?year=2026&age_limit=25")
+    assert status == 400 and 'error' in body
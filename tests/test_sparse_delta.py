@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from metrics import CHANGE_BANDS, decile_band_matrix, decile_change_matrix, delta_decile_changes
+from sparse_delta import SparseDelta
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def changed_copy(rng, baseline, share=0.1):
+    reformed = baseline.copy()
+    changed = rng.random(len(baseline)) < share
+    reformed[changed] += rng.normal(0, 100, changed.sum()).astype(baseline.dtype)
+    return reformed
+
+
+def test_between_and_apply_restore_float32_exactly(rng):
+    baseline = rng.normal(30_000, 10_000, 1_000).astype(np.float32)
+    reformed = changed_copy(rng, baseline)
+    delta = SparseDelta.between(baseline, reformed)
+    assert len(delta) == np.count_nonzero(reformed != baseline)
+    assert np.array_equal(delta.apply(baseline), reformed)
+    assert delta.apply(baseline).dtype == np.float32
+    np.testing.assert_allclose(delta.dense(), reformed.astype(np.float64) - baseline)
+
+
+def test_bool_flags(rng):
+    baseline = rng.random(500) < 0.2
+    reformed = baseline.copy()
+    reformed[rng.choice(500, 50, replace=False)] ^= True
+    delta = SparseDelta.between(baseline, reformed, "person")
+    assert set(np.unique(delta.values)) <= {-1, 1}
+    assert np.array_equal(delta.apply(baseline), reformed)
+
+
+def test_add_and_sub_match_dense_arithmetic(rng):
+    baseline = rng.normal(0, 1, 200)
+    first = SparseDelta.between(baseline, changed_copy(rng, baseline, 0.3))
+    second = SparseDelta.between(baseline, changed_copy(rng, baseline, 0.3))
+    assert np.intersect1d(first.indices, second.indices).size > 0
+
+    total = first + second
+    assert np.all(np.diff(total.indices) > 0)
+    np.testing.assert_allclose(total.dense(), first.dense() + second.dense())
+    np.testing.assert_allclose((first - second).dense(), first.dense() - second.dense())
+    np.testing.assert_allclose((-first).dense(), -first.dense())
+
+
+def test_scale_total_and_group_totals(rng):
+    baseline = rng.normal(0, 1, 300)
+    delta = SparseDelta.between(baseline, changed_copy(rng, baseline, 0.2))
+    weights = rng.random(300)
+    factor = rng.random(300)
+    groups = rng.integers(0, 10, 300)
+
+    np.testing.assert_allclose(delta.scale(factor).dense(), delta.dense() * factor)
+    np.testing.assert_allclose(delta.scale(0.5).dense(), delta.dense() * 0.5)
+    assert delta.total(weights) == pytest.approx(delta.dense() @ weights)
+    np.testing.assert_allclose(delta.group_totals(groups, weights, 10),
+                               np.bincount(groups, weights=delta.dense() * weights, minlength=10))
+
+
+def test_to_members_and_to_groups_match_dense_mapping(rng):
+    n_households = 100
+    person_household = np.sort(rng.integers(0, n_households, 400))
+    baseline = rng.normal(0, 1, n_households)
+    households = SparseDelta.between(baseline, changed_copy(rng, baseline, 0.2))
+
+    people = households.to_members(person_household)
+    assert people.entity == "person" and people.size == len(person_household)
+    np.testing.assert_allclose(people.dense(), households.dense()[person_household])
+
+    back = people.to_groups(person_household, n_households)
+    counts = np.bincount(person_household, minlength=n_households)
+    np.testing.assert_allclose(back.dense(), households.dense() * counts)
+    assert np.all(back.values != 0)
+
+
+def test_to_members_of_empty_delta():
+    people = SparseDelta.empty(10).to_members(np.arange(10) // 2)
+    assert len(people) == 0 and people.size == 10
+
+
+def test_arrays_round_trip(rng):
+    baseline = rng.normal(0, 1, 50)
+    delta = SparseDelta.between(baseline, changed_copy(rng, baseline, 0.5), "benunit")
+    restored = SparseDelta.from_arrays(delta.arrays("income_"), "income_")
+    assert restored.entity == "benunit" and restored.size == 50
+    assert np.array_equal(restored.indices, delta.indices)
+    assert np.array_equal(restored.values, delta.values)
+
+
+def test_delta_decile_changes_match_the_dense_matrices(rng):
+    n = 2_000
+    baseline = rng.lognormal(10, 0.6, n).astype(np.float32)
+    weight = rng.uniform(100, 2_000, n).astype(np.float32)
+    decile = rng.integers(1, 11, n)
+    # Scenarios changing a few households each, including losses and changes inside the no-change band
+    reformed = np.repeat(baseline[None], 4, axis=0)
+    for scenario in reformed:
+        changed = rng.random(n) < 0.1
+        scenario[changed] *= rng.choice([0.9, 0.99, 0.9995, 1.0005, 1.02, 1.2], changed.sum()).astype(np.float32)
+
+    deciles, avg_change, relative_change = decile_change_matrix(baseline, reformed, weight, decile)
+    _, band_shares = decile_band_matrix(baseline, reformed, weight, decile)
+    for i, scenario in enumerate(reformed):
+        frame = delta_decile_changes(baseline, SparseDelta.between(baseline, scenario), weight, decile)
+        assert np.array_equal(frame['income_decile'], deciles)
+        np.testing.assert_allclose(frame['avg_change'], avg_change[i], rtol=1e-12, atol=1e-9)
+        np.testing.assert_allclose(frame['relative_change'], relative_change[i], rtol=1e-12, atol=1e-15)
+        np.testing.assert_allclose(frame[CHANGE_BANDS].values, band_shares[i], rtol=1e-12, atol=1e-15)
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from simulations import child_limit_changes
+from synthetic_frs import (
+    UK_POPULATION,
+    Scenario,
+    SyntheticFRS,
+    SyntheticMicrosimulation,
+    generate_synthetic_frs,
+    is_synthetic_dataset,
+)
+
+
+def test_same_seed_gives_the_same_population():
+    first, second = generate_synthetic_frs(2_000, 1), generate_synthetic_frs(2_000, 1)
+    assert first.arrays.keys() == second.arrays.keys()
+    for name, values in first.arrays.items():
+        assert np.array_equal(values, second.arrays[name]), name
+    assert not np.array_equal(generate_synthetic_frs(2_000, 2).arrays['age'][:100], first.arrays['age'][:100])
+
+
+def test_entity_structure():
+    data = generate_synthetic_frs(10_000, 0)
+    assert abs(data.count['person'] - 10_000) < 20
+    # People are grouped by benefit unit and benefit units by household, with every entity non-empty
+    assert np.all(np.diff(data.person_benunit) >= 0) and np.all(np.diff(data.benunit_household) >= 0)
+    assert np.array_equal(np.unique(data.person_benunit), np.arange(data.count['benunit']))
+    assert np.array_equal(np.unique(data.benunit_household), np.arange(data.count['household']))
+
+    people = np.bincount(data.person_household, minlength=data.count['household'])
+    assert data.arrays['household_weight'].astype(np.float64) @ people == pytest.approx(UK_POPULATION, rel=1e-6)
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+def test_abolition_only_raises_incomes():
+    data = generate_synthetic_frs(5_000, 0)
+    baseline = SyntheticMicrosimulation(data)
+    reformed = SyntheticMicrosimulation(data, Scenario(child_limit_changes(2026, np.inf)))
+    change = (reformed.calculate("household_net_income", 2026).values
+              - baseline.calculate("household_net_income", 2026).values)
+    assert np.all(change >= 0) and np.any(change > 0)
+
+
+def test_only_marked_files_are_synthetic(tmp_path):
+    data = generate_synthetic_frs(1_000, 0)
+    data.save(tmp_path / "population.npz")
+    np.savez(tmp_path / "other.npz", meta=np.array('{"persons": 1000, "seed": 0}'), age=data.arrays['age'])
+    np.savez(tmp_path / "unlabelled.npz", age=data.arrays['age'])
+
+    assert is_synthetic_dataset("synthetic:1000:0") and is_synthetic_dataset(data)
+    assert is_synthetic_dataset(str(tmp_path / "population.npz"))
+    assert not is_synthetic_dataset(str(tmp_path / "other.npz"))
+    assert not is_synthetic_dataset(str(tmp_path / "unlabelled.npz"))
+    assert not is_synthetic_dataset(str(tmp_path / "missing.npz"))
+    assert not is_synthetic_dataset("hf://policyengine/policyengine-uk-data/enhanced_frs_2023_24.h5")
+
+    loaded = SyntheticFRS.load(str(tmp_path / "population.npz"))
+    assert np.array_equal(loaded.arrays['age'], data.arrays['age'])
+    with pytest.raises(ValueError, match="not a synthetic population"):
+        SyntheticFRS.load(str(tmp_path / "other.npz"))
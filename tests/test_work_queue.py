@@ -0,0 +1,114 @@
+import os
+import threading
+
+import pytest
+
+from work_queue import WorkQueue
+
+TASKS = [
+    {'name': 'baseline'},
+    {'name': 'year 2026', 'requires': ['baseline']},
+    {'name': 'year 2027', 'requires': ['baseline']},
+    {'name': 'merge', 'requires': ['year 2026', 'year 2027']},
+]
+
+
+def queue(directory, worker, **kwargs):
+    queue = WorkQueue(str(directory), worker, **kwargs)
+    queue.add_tasks(TASKS)
+    return queue
+
+
+def test_tasks_wait_for_the_tasks_they_require(tmp_path):
+    first = queue(tmp_path, "first")
+    task = first.claim()
+    assert task['name'] == 'baseline' and task['attempt'] == 0
+    assert first.claim() is None
+    first.complete(task)
+    assert [first.claim()['name'] for _ in range(2)] == ['year 2026', 'year 2027']
+    assert first.status() == {'done': ['baseline'], 'running': ['year 2026', 'year 2027'], 'waiting': ['merge']}
+
+
+def test_workers_never_claim_the_same_task(tmp_path):
+    WorkQueue(str(tmp_path)).add_tasks([{'name': f"task {i}"} for i in range(50)])
+    claimed = {}
+    barrier = threading.Barrier(4)
+
+    def work(worker):
+        worker_queue = WorkQueue(str(tmp_path), worker)
+        barrier.wait()
+        claimed[worker] = []
+        while (task := worker_queue.claim()) is not None:
+            claimed[worker].append(task['name'])
+
+    threads = [threading.Thread(target=work, args=(f"worker {i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    names = [name for tasks in claimed.values() for name in tasks]
+    assert sorted(names) == sorted(f"task {i}" for i in range(50))
+
+
+def test_a_claim_made_after_counting_attempts_wins(tmp_path):
+    first, second = queue(tmp_path, "first"), queue(tmp_path, "second")
+    won = []
+    state = first._state
+
+    def claim_in_between(task, attempts=None):
+        # The other worker claims after the first has counted attempts, but before it creates its claim
+        if not won:
+            won.append(second.claim())
+        return state(task, attempts)
+
+    first._state = claim_in_between
+    assert first.claim() is None
+    assert won[0]['name'] == 'baseline' and won[0]['attempt'] == 0
+    assert second.holds(won[0])
+    assert sorted(os.listdir(tmp_path / "claims")) == ['baseline.0']
+
+
+def test_an_expired_lease_is_claimed_again(tmp_path):
+    first, second = queue(tmp_path, "first", lease=60), queue(tmp_path, "second", lease=60)
+    task = first.claim()
+    assert second.claim() is None
+
+    os.utime(tmp_path / "claims" / "baseline.0", (0, 0))
+    retry = second.claim()
+    assert retry['name'] == 'baseline' and retry['attempt'] == 1
+    assert not first.holds(task) and second.holds(retry)
+
+
+def test_failed_tasks_are_retried_then_reported(tmp_path):
+    WorkQueue(str(tmp_path)).add_tasks([{'name': 'bad'}, {'name': 'good'}, {'name': 'after bad', 'requires': ['bad']}])
+    worker = WorkQueue(str(tmp_path), "worker", max_attempts=3)
+    runs = []
+
+    def execute(task):
+        runs.append(task['name'])
+        if task['name'] == 'bad':
+            raise ValueError("bad task")
+
+    with pytest.raises(RuntimeError, match="bad"):
+        worker.run(execute, poll=0.01)
+    assert runs.count('bad') == 3 and runs.count('good') == 1
+    assert worker.status() == {'failed': ['bad'], 'done': ['good'], 'waiting': ['after bad']}
+
+
+def test_interrupted_tasks_are_released(tmp_path):
+    worker = queue(tmp_path, "worker")
+
+    def execute(task):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        worker.run(execute, poll=0.01)
+    assert worker.claim()['attempt'] == 1
+
+
+def test_run_settings_must_match(tmp_path):
+    first, second = queue(tmp_path, "first"), queue(tmp_path, "second")
+    first.check_run({'dataset': 'synthetic:5000:0'})
+    second.check_run({'dataset': 'synthetic:5000:0'})
+    with pytest.raises(RuntimeError, match="different run settings"):
+        second.check_run({'dataset': 'synthetic:5000:1'})
@@ -0,0 +1,244 @@
+"""
+File-based work queue for splitting the scenario grid across processes and hosts.
+
+Any directory every worker can reach (a network share, or a temporary directory
+for local processes) holds the queue. There is no broker and no lock server:
+
+    <queue>/run.json                    settings every worker must share
+    <queue>/tasks/<task>.json           task definition and the tasks it requires
+    <queue>/claims/<task>.<attempt>     the worker holding an attempt at a task
+    <queue>/done/<task>.json            completion record
+
+A worker claims a task by creating the next attempt's claim file with
+O_CREAT | O_EXCL, which exactly one worker can win: the attempt number is read
+once, and a worker that finds the claim already taken moves on rather than
+trying a later attempt. While the task runs, the
+worker touches its claim every heartbeat. A claim untouched for `lease` seconds
+belongs to a worker that crashed or lost its host, so the next worker claims a
+new attempt. Task outputs are written atomically and do not depend on which
+worker produced them, so a task run twice after an expired lease is wasted work,
+not a wrong result. A task that raises is released and retried by the next
+free worker, and one that fails `max_attempts` times is reported rather than
+retried forever.
+
+Leases are compared with claim file modification times, so `lease` should be
+well above the heartbeat interval plus any clock skew between hosts.
+"""
+
+import json
+import os
+import re
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+from checkpoints import atomic_path
+
+LEASE_SECONDS = 300
+
+
+def default_worker_id():
+    """Worker name unique across hosts sharing a queue"""
+    return safe_name(f"{socket.gethostname()}-{os.getpid()}")
+
+
+def safe_name(name):
+    """A name usable as part of a file name"""
+    return re.sub(r"[^A-Za-z0-9_.-]", "-", str(name))
+
+
+class WorkQueue:
+    """Tasks in a shared directory, claimed with leases and heartbeats"""
+
+    def __init__(self, directory, worker=None, lease=LEASE_SECONDS, max_attempts=3):
+        self.directory = directory
+        self.worker = safe_name(worker) if worker is not None else default_worker_id()
+        self.lease = lease
+        self.heartbeat_seconds = lease / 5
+        self.max_attempts = max_attempts
+        for subdirectory in ("tasks", "claims", "done"):
+            os.makedirs(f"{directory}/{subdirectory}", exist_ok=True)
+
+    def _write_json(self, path, data):
+        with atomic_path(path) as temporary:
+            with open(temporary, "w") as f:
+                json.dump(data, f, indent=2)
+
+    def _read_json(self, path):
+        with open(path) as f:
+            return json.load(f)
+
+    def check_run(self, run):
+        """Record the run settings, or confirm they match those the queue was created with"""
+        path = f"{self.directory}/run.json"
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # The creator writes the file right after creating it
+            for _ in range(50):
+                if os.path.getsize(path) > 0:
+                    break
+                time.sleep(0.1)
+            if self._read_json(path) != run:
+                raise RuntimeError(f"{path} was created with different run settings; "
+                                   "use a new queue directory for a different run")
+            return
+        with os.fdopen(fd, "w") as f:
+            json.dump(run, f, indent=2)
+
+    def add_tasks(self, tasks):
+        """Queue tasks, each a dict with a name and optionally the names it requires
+
+        Every worker may call this with the same list; tasks already queued are kept.
+        Tasks are claimed in list order.
+        """
+        for order, task in enumerate(tasks):
+            path = f"{self.directory}/tasks/{safe_name(task['name'])}.json"
+            if not os.path.exists(path):
+                self._write_json(path, {'requires': [], **task, 'order': order})
+
+    def tasks(self):
+        """Every task definition, in the order they were added"""
+        tasks = [self._read_json(f"{self.directory}/tasks/{filename}")
+                 for filename in os.listdir(f"{self.directory}/tasks") if filename.endswith(".json")]
+        return sorted(tasks, key=lambda task: (task['order'], task['name']))
+
+    def is_done(self, name):
+        return os.path.exists(f"{self.directory}/done/{safe_name(name)}.json")
+
+    def _claim_path(self, name, attempt):
+        return f"{self.directory}/claims/{safe_name(name)}.{attempt}"
+
+    def _attempts(self, name):
+        """Number of claims made on a task so far"""
+        prefix = f"{safe_name(name)}."
+        attempts = [int(filename[len(prefix):]) for filename in os.listdir(f"{self.directory}/claims")
+                    if filename.startswith(prefix) and filename[len(prefix):].isdigit()]
+        return max(attempts) + 1 if attempts else 0
+
+    def _expired(self, path):
+        try:
+            return time.time() - os.path.getmtime(path) > self.lease
+        except FileNotFoundError:
+            return True
+
+    def _state(self, task, attempts=None):
+        """'done', 'running', 'failed', 'waiting' (on required tasks) or 'ready'
+
+        `attempts` is the number of claims already made, if just counted.
+        """
+        name = task['name']
+        if self.is_done(name):
+            return 'done'
+        if attempts is None:
+            attempts = self._attempts(name)
+        if attempts and not self._expired(self._claim_path(name, attempts - 1)):
+            return 'running'
+        if attempts >= self.max_attempts:
+            return 'failed'
+        if not all(self.is_done(required) for required in task['requires']):
+            return 'waiting'
+        return 'ready'
+
+    def claim(self):
+        """Claim the first ready task, returning it with its attempt number, or None"""
+        for task in self.tasks():
+            # Counted once: a claim made since then means another worker won this attempt
+            attempt = self._attempts(task['name'])
+            if self._state(task, attempt) != 'ready':
+                continue
+            try:
+                fd = os.open(self._claim_path(task['name'], attempt), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue  # another worker won this attempt
+            with os.fdopen(fd, "w") as f:
+                json.dump({'worker': self.worker, 'claimed': time.time()}, f)
+            return {**task, 'attempt': attempt}
+        return None
+
+    def holds(self, task):
+        """Whether this worker's claim on a task is still the latest attempt"""
+        return self._attempts(task['name']) == task['attempt'] + 1
+
+    @contextmanager
+    def heartbeat(self, task):
+        """Keep a claimed task's lease alive while the block runs"""
+        stopped = threading.Event()
+        path = self._claim_path(task['name'], task['attempt'])
+
+        def beat():
+            while not stopped.wait(self.heartbeat_seconds):
+                if not self.holds(task):
+                    print(f"WARNING: lease on {task['name']} lost to a later attempt")
+                    return
+                os.utime(path)
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stopped.set()
+            thread.join()
+
+    def complete(self, task, **record):
+        """Mark a task done"""
+        self._write_json(f"{self.directory}/done/{safe_name(task['name'])}.json",
+                         {'worker': self.worker, 'attempt': task['attempt'], 'finished': time.time(), **record})
+
+    def release(self, task):
+        """Give up a claimed task so another worker can retry it straight away"""
+        try:
+            os.utime(self._claim_path(task['name'], task['attempt']), (0, 0))
+        except FileNotFoundError:
+            pass
+
+    def status(self):
+        """Tasks by state"""
+        states = {}
+        for task in self.tasks():
+            states.setdefault(self._state(task), []).append(task['name'])
+        return states
+
+    def run(self, execute, poll=5):
+        """Claim and execute tasks until every task is done
+
+        A task that raises is released for another attempt and the worker moves
+        on. Raises RuntimeError if a task fails `max_attempts` times and nothing
+        else can make progress.
+        """
+        while True:
+            task = self.claim()
+            if task is not None:
+                print(f"\n[{self.worker}] Claimed {task['name']} (attempt {task['attempt'] + 1})")
+                with self.heartbeat(task):
+                    try:
+                        execute(task)
+                    except Exception:
+                        self.release(task)
+                        print(f"[{self.worker}] {task['name']} failed (attempt {task['attempt'] + 1} of {self.max_attempts}):")
+                        traceback.print_exc()
+                        continue
+                    except BaseException:
+                        self.release(task)
+                        raise
+                self.complete(task)
+                continue
+
+            states = self.status()
+            if set(states) <= {'done'}:
+                return
+            if 'failed' in states and not set(states) & {'ready', 'running'}:
+                raise RuntimeError(f"Tasks failed {self.max_attempts} times: {', '.join(states['failed'])}")
+            time.sleep(poll)
+
+
+def print_status(queue):
+    """Print how many tasks are in each state"""
+    states = queue.status()
+    for state in ('done', 'running', 'ready', 'waiting', 'failed'):
+        names = states.get(state, [])
+        shown = ", ".join(names[:6]) + (", ..." if len(names) > 6 else "")
+        print(f"{state:<8} {len(names):>4}  {shown}")